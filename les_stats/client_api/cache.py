@@ -0,0 +1,40 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from les_stats.schemas.client_api.data import DataResponse
+from les_stats.utils.config import get_settings
+
+
+class ResponseCache:
+    """
+    Handled API responses keyed by request URL, each entry has its own ttl.
+    The least recently used entry is evicted when full.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: Dict[str, Tuple[float, int, DataResponse]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[int, DataResponse]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        # Callers own the response they get back
+        return entry[1], entry[2].copy(deep=True)
+
+    def set(self, key: str, status_code: int, data: DataResponse, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, status_code, data.copy(deep=True))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+response_cache = ResponseCache(get_settings().RESPONSE_CACHE_SIZE)
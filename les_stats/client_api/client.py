@@ -1,38 +1,207 @@
 import asyncio
+import math
 from typing import List, Tuple, Union
 
 import httpx
 from tortoise.exceptions import DoesNotExist
 
+from les_stats.client_api.cache import response_cache
+from les_stats.client_api.ratelimit import RateLimiter
+from les_stats.client_api.registry import ClientRegistry
+from les_stats.client_api.retry import (
+    RETRY_STATUS_CODES,
+    RetryBudget,
+    get_backoff,
+    is_retryable,
+)
+from les_stats.client_api.singleflight import SingleFlight
 from les_stats.metrics.metrics import (
+    metric_request_coalesced_total_api,
     metric_request_failed_processing_seconds_api,
+    metric_request_give_up_total_api,
     metric_request_http_code_total_api,
+    metric_request_retry_total_api,
     metric_request_success_processing_seconds_api,
+    metric_response_cache_hit_total_api,
+    metric_response_cache_miss_total_api,
 )
 from les_stats.models.internal.event import Event
 from les_stats.models.internal.stage import Stage
 from les_stats.models.internal.tournament import Tournament
 from les_stats.schemas.client_api.data import DataResponse, ErrorResponse
+from les_stats.utils.config import get_settings
+
+COALESCED_METHODS = ["GET", "HEAD"]
+
+# Requests in flight of every client, keyed on game, method and URL (with params)
+in_flight_requests = SingleFlight()
 
 
 class ClientAPI:
-    def __init__(self, httpx_client: httpx.AsyncClient, game: str):
-        self.session = httpx_client
+    def __init__(
+        self, clients: ClientRegistry, game: str, rate_limiter: RateLimiter = None
+    ):
+        self.clients = clients
         self.game = game
+        self.rate_limiter = rate_limiter
 
     def build_url(self, *args, **kwargs) -> str:
         raise NotImplementedError
 
-    async def make_request(self, reqs: List[httpx.Request]) -> List[httpx.Response]:
+    def build_request(
+        self, method: str, url: str, endpoint: str = None, **kwargs
+    ) -> httpx.Request:
+        """
+        :param endpoint: name of the endpoint, used as rate limit scope (default to url path)
+        """
+        req = self.clients.get(httpx.URL(url).host).build_request(method, url, **kwargs)
+        req.extensions["endpoint"] = endpoint or req.url.path
+        return req
+
+    async def send(
+        self, req: httpx.Request, budget: RetryBudget = None
+    ) -> httpx.Response:
+        """
+        Send a request, transient errors of idempotent requests are retried while budget allows it
+        """
+        settings = get_settings()
+        client = self.clients.get(req.url.host)
+        endpoint = req.extensions.get("endpoint", req.url.path)
+        if budget is None:
+            budget = RetryBudget(settings.RETRY_MAX_ATTEMPTS)
+        attempt = 0
+
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire(req.url.host, endpoint)
+
+            try:
+                resp = await client.send(req)
+            except httpx.TransportError:
+                reason = "transport"
+                if (
+                    not is_retryable(req)
+                    or attempt >= settings.RETRY_MAX_ATTEMPTS
+                    or not budget.spend()
+                ):
+                    metric_request_give_up_total_api.labels(reason, self.game).inc()
+                    raise
+            else:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(req.url.host, endpoint, resp)
+                if resp.status_code not in RETRY_STATUS_CODES:
+                    return resp
+
+                reason = str(resp.status_code)
+                if (
+                    not is_retryable(req)
+                    or attempt >= settings.RETRY_MAX_ATTEMPTS
+                    or not budget.spend()
+                ):
+                    metric_request_give_up_total_api.labels(reason, self.game).inc()
+                    return resp
+
+            attempt += 1
+            metric_request_retry_total_api.labels(reason, self.game).inc()
+            delay = get_backoff(
+                attempt, settings.RETRY_BACKOFF_BASE, settings.RETRY_BACKOFF_MAX
+            )
+            if reason == "429":
+                if self.rate_limiter is not None:
+                    # The rate limiter already waits for Retry-After
+                    delay = 0
+                else:
+                    delay = max(delay, float(resp.headers.get("Retry-After", 0)))
+            await asyncio.sleep(delay)
+
+    async def send_coalesced(
+        self, req: httpx.Request, budget: RetryBudget = None
+    ) -> httpx.Response:
+        """
+        Send a request, identical idempotent requests in flight share one response
+        """
+        if req.method not in COALESCED_METHODS:
+            return await self.send(req, budget)
+
+        resp, shared = await in_flight_requests.do(
+            (self.game, req.method, str(req.url)), lambda: self.send(req, budget)
+        )
+        if shared:
+            metric_request_coalesced_total_api.labels(
+                req.extensions.get("endpoint", req.url.path), self.game
+            ).inc()
+
+        return resp
+
+    async def make_request(
+        self, reqs: List[httpx.Request], retries: int = None
+    ) -> List[httpx.Response]:
+        """
+        :param retries: retry budget shared by all requests (default RETRY_BUDGET_RATIO of the requests, at least RETRY_MAX_ATTEMPTS)
+        """
+        if retries is None:
+            retries = max(
+                get_settings().RETRY_MAX_ATTEMPTS,
+                math.ceil(len(reqs) * get_settings().RETRY_BUDGET_RATIO),
+            )
+        budget = RetryBudget(retries)
         tasks = []
-        responses = []
 
         for req in reqs:
-            tasks.append(asyncio.ensure_future(self.session.send(req)))
+            tasks.append(asyncio.ensure_future(self.send_coalesced(req, budget)))
+
+        return await asyncio.gather(*tasks)
+
+    async def make_cached_request(
+        self, reqs: List[httpx.Request], ttl: float
+    ) -> Tuple[int, List[DataResponse]]:
+        """
+        Send requests not answered from response_cache, same request URLs are sent once
+
+        :param ttl: seconds successful responses are cached, 404 ones are cached NOT_FOUND_CACHE_TTL
+        """
+        http_code = None
+        data = [None] * len(reqs)
+        missing = {}
 
-            responses = await asyncio.gather(*tasks)
+        for index, req in enumerate(reqs):
+            endpoint = req.extensions.get("endpoint", req.url.path)
+            entry = response_cache.get(str(req.url))
+            if entry is None:
+                metric_response_cache_miss_total_api.labels(endpoint, self.game).inc()
+                missing.setdefault(str(req.url), (req, []))[1].append(index)
+            else:
+                metric_response_cache_hit_total_api.labels(endpoint, self.game).inc()
+                status_code, data[index] = entry
+                if http_code is None:
+                    http_code = status_code
+                elif http_code != status_code:
+                    http_code = 207
 
-        return responses
+        if missing:
+            resps = await self.make_request([req for req, _ in missing.values()])
+            _, resps_data = self.handle_response(resps)
+            for (key, (_, indexes)), resp, resp_data in zip(
+                missing.items(), resps, resps_data
+            ):
+                if resp.is_success:
+                    response_cache.set(key, resp.status_code, resp_data, ttl)
+                elif resp.status_code == 404:
+                    response_cache.set(
+                        key,
+                        resp.status_code,
+                        resp_data,
+                        get_settings().NOT_FOUND_CACHE_TTL,
+                    )
+
+                for index in indexes:
+                    data[index] = resp_data.copy(deep=True)
+                    if http_code is None:
+                        http_code = resp.status_code
+                    elif http_code != resp.status_code:
+                        http_code = 207
+
+        return http_code, data
 
     def handle_response(
         self, resps: List[httpx.Response]
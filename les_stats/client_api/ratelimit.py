@@ -0,0 +1,172 @@
+import asyncio
+import time
+from typing import Dict, List, Tuple
+
+import httpx
+
+from les_stats.metrics.metrics import (
+    metric_rate_limit_queue_depth,
+    metric_rate_limit_wait_seconds,
+)
+from les_stats.utils.config import get_settings
+
+
+def parse_rate_limit(header: str) -> List[Tuple[int, int]]:
+    """
+    :param header: Riot rate limit header value, e.g. "20:1,100:120"
+    :return: list of (requests, seconds)
+    """
+    limits = []
+    if header:
+        for limit in header.split(","):
+            requests, seconds = limit.strip().split(":")
+            limits.append((int(requests), int(seconds)))
+
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, limit: int, period: int) -> None:
+        self.limit = limit
+        self.period = period
+        self.rate = limit / period
+        self.tokens = float(limit)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            float(self.limit), self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """
+        Take a token, the bucket can go in debt to queue requests
+        :return: time at which the request is allowed to start
+        """
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return now
+        return now - self.tokens / self.rate
+
+    def sync(self, count: int, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.tokens, float(self.limit - count))
+
+
+class RateLimit:
+    """Token buckets of one rate limit scope (application or method of a host)"""
+
+    def __init__(self, limits: List[Tuple[int, int]] = None) -> None:
+        self.buckets: Dict[Tuple[int, int], TokenBucket] = {}
+        self.blocked_until = 0.0
+        self.set_limits(limits or [])
+
+    def set_limits(self, limits: List[Tuple[int, int]]) -> None:
+        self.buckets = {
+            limit: self.buckets.get(limit, TokenBucket(*limit)) for limit in limits
+        }
+
+    def reserve(self, now: float) -> float:
+        ready_at = max(now, self.blocked_until)
+        for bucket in self.buckets.values():
+            ready_at = max(ready_at, bucket.reserve(now))
+        return ready_at
+
+    def update(self, limits_header: str, counts_header: str, now: float) -> None:
+        limits = parse_rate_limit(limits_header)
+        if limits:
+            self.set_limits(limits)
+        for count, period in parse_rate_limit(counts_header):
+            for (_, bucket_period), bucket in self.buckets.items():
+                if bucket_period == period:
+                    bucket.sync(count, now)
+
+    def block(self, seconds: float, now: float) -> None:
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class RateLimiter:
+    """
+    Schedule requests following Riot application and method rate limits.
+
+    Limits are learnt from X-App-Rate-Limit / X-Method-Rate-Limit headers and
+    synchronised with their -Count counterparts, requests over the limit wait
+    for their turn instead of being sent, a 429 blocks its scope for Retry-After.
+    """
+
+    def __init__(self, app_limits: str = "") -> None:
+        self.app_limits = parse_rate_limit(app_limits)
+        self.limits: Dict[Tuple[str, str], RateLimit] = {}
+
+    def _get(self, host: str, scope: str) -> RateLimit:
+        if (host, scope) not in self.limits:
+            self.limits[(host, scope)] = RateLimit(
+                self.app_limits if scope == "application" else None
+            )
+        return self.limits[(host, scope)]
+
+    async def acquire(self, host: str, method: str) -> float:
+        """
+        Wait until a request to method on host can be sent
+        :return: seconds waited
+        """
+        start = time.monotonic()
+        application = self._get(host, "application")
+        method_limit = self._get(host, method)
+
+        metric_rate_limit_queue_depth.labels(host).inc()
+        try:
+            ready_at = max(application.reserve(start), method_limit.reserve(start))
+            while True:
+                # A 429 received while waiting blocks the scope a bit longer
+                ready_at = max(
+                    ready_at, application.blocked_until, method_limit.blocked_until
+                )
+                now = time.monotonic()
+                if ready_at <= now:
+                    break
+                await asyncio.sleep(ready_at - now)
+        finally:
+            metric_rate_limit_queue_depth.labels(host).dec()
+
+        waited = time.monotonic() - start
+        metric_rate_limit_wait_seconds.labels(host).observe(waited)
+
+        return waited
+
+    def interval(self, host: str, requests: int) -> float:
+        """
+        :return: seconds needed to send requests on host within its application limits
+        """
+        return max(
+            (
+                requests / bucket.rate
+                for bucket in self._get(host, "application").buckets.values()
+            ),
+            default=0.0,
+        )
+
+    def update(self, host: str, method: str, resp: httpx.Response) -> None:
+        now = time.monotonic()
+        self._get(host, "application").update(
+            resp.headers.get("X-App-Rate-Limit"),
+            resp.headers.get("X-App-Rate-Limit-Count"),
+            now,
+        )
+        self._get(host, method).update(
+            resp.headers.get("X-Method-Rate-Limit"),
+            resp.headers.get("X-Method-Rate-Limit-Count"),
+            now,
+        )
+
+        if resp.status_code == 429:
+            retry_after = float(resp.headers.get("Retry-After", 1))
+            if resp.headers.get("X-Rate-Limit-Type") == "application":
+                self._get(host, "application").block(retry_after, now)
+            else:
+                self._get(host, method).block(retry_after, now)
+
+
+rate_limiter = RateLimiter(get_settings().RIOT_APP_RATE_LIMIT)
@@ -0,0 +1,41 @@
+from typing import Dict
+
+import httpx
+
+from les_stats.utils.config import get_settings
+
+
+class ClientRegistry:
+    """
+    Application scoped httpx clients, one pooled client per host.
+
+    Clients are created on first use and kept open so connections (and TLS
+    sessions) are reused across requests, call aclose() on shutdown.
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def get(self, host: str) -> httpx.AsyncClient:
+        if host not in self._clients:
+            settings = get_settings()
+            self._clients[host] = httpx.AsyncClient(
+                http2=settings.HTTP_CLIENT_HTTP2,
+                timeout=settings.HTTP_CLIENT_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+                ),
+            )
+
+        return self._clients[host]
+
+    async def aclose(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.aclose()
+
+
+client_registry = ClientRegistry()
@@ -0,0 +1,33 @@
+import random
+
+import httpx
+
+# Errors worth another try, anything else is returned to the caller
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class RetryBudget:
+    """Number of retries shared by all the requests of one call"""
+
+    def __init__(self, retries: int) -> None:
+        self.retries = retries
+
+    def spend(self) -> bool:
+        if self.retries <= 0:
+            return False
+        self.retries -= 1
+        return True
+
+
+def is_retryable(req: httpx.Request) -> bool:
+    return req.method in IDEMPOTENT_METHODS
+
+
+def get_backoff(attempt: int, base: float, cap: float) -> float:
+    """
+    Exponential backoff with full jitter
+    :param attempt: retry number, starting at 1
+    :return: seconds to wait before the retry
+    """
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
@@ -1,32 +1,38 @@
-import datetime
-from typing import List, Tuple, Union
+import asyncio
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Set, Tuple, Union
 
 import httpx
-from tortoise.exceptions import DoesNotExist
+from tortoise.exceptions import DoesNotExist, IntegrityError
 from tortoise.transactions import in_transaction
 
 from les_stats.client_api.client import ClientAPI
+from les_stats.client_api.ratelimit import rate_limiter
+from les_stats.client_api.registry import client_registry
 from les_stats.metrics.internal.metrics import metric_game
 from les_stats.models.internal.event import Event
 from les_stats.models.internal.stage import Stage
 from les_stats.models.internal.tournament import Tournament
 from les_stats.models.lol.game import LolGame
-from les_stats.models.tft.game import (
-    TFTAugment,
-    TFTCompanion,
-    TFTCurrentTrait,
-    TFTCurrentUnit,
-    TFTGame,
-    TFTItem,
-    TFTParticipant,
-    TFTPlayer,
-    TFTTrait,
-    TFTUnit,
-)
+from les_stats.models.tft.game import TFTGame
 from les_stats.models.valorant.game import ValorantGame
 from les_stats.schemas.client_api.data import DataResponse, ErrorResponse
-from les_stats.schemas.riot.game import GameSaveIn_Pydantic, RiotGame, RiotHost
+from les_stats.schemas.riot.game import (
+    GameSaveIn_Pydantic,
+    RiotGame,
+    RiotHost,
+    get_match_host,
+)
+from les_stats.utils.archive import get_match_archive
+from les_stats.utils.cache import invalidate_groups, invalidate_matches
+from les_stats.utils.chunks import chunks
 from les_stats.utils.config import get_settings
+from les_stats.utils.known_matches import tft_known_matches
+from les_stats.utils.rollup import add_tft_games, remove_tft_games
+from les_stats.utils.tft_bulk import TFTBulkSaver
+
+# Maximum count of a match list request
+MATCH_LIST_PAGE_SIZE = 100
 
 
 class RiotAPI(ClientAPI):
@@ -34,9 +40,7 @@ class RiotAPI(ClientAPI):
         self.routing = game
         self.api_key = game
         self.base_api_url = "api.riotgames.com"
-        super().__init__(
-            httpx.AsyncClient(headers={"X-Riot-Token": self.api_key}), game
-        )
+        super().__init__(client_registry, game, rate_limiter)
 
     @property
     def api_key(self):
@@ -75,22 +79,14 @@ class RiotAPI(ClientAPI):
     def build_url(self, host: str, endpoint: str) -> str:
         return f"https://{host}.{self.base_api_url}{endpoint}"
 
-    @classmethod
-    def get_region(cls, text):
-        if any(
-            routing.upper() in text.upper() for routing in ["BR", "LAN", "LAS", "NA"]
-        ):
-            host = RiotHost.americas
-        elif any(routing.upper() in text.upper() for routing in ["JP", "KR"]):
-            host = RiotHost.asia
-        elif any(
-            routing.upper() in text.upper() for routing in ["EUNE", "EUW", "RU", "TR"]
-        ):
-            host = RiotHost.europe
-        else:
-            host = RiotHost.sea
+    def build_request(self, method: str, url: str, **kwargs) -> httpx.Request:
+        return super().build_request(
+            method, url, headers={"X-Riot-Token": self.api_key}, **kwargs
+        )
 
-        return host
+    @classmethod
+    def get_region(cls, text) -> RiotHost:
+        return get_match_host(text)
 
     async def save_valorant_games(
         self, matches: List[GameSaveIn_Pydantic]
@@ -123,13 +119,20 @@ class RiotAPI(ClientAPI):
         matches: List[GameSaveIn_Pydantic],
         min_player: int = 0,
         players: List[str] = [],
+        concurrency: int = None,
     ) -> List[DataResponse]:
         http_code = None
         data = []
+        players = set(players)
+        saver = TFTBulkSaver()
+        semaphore = asyncio.Semaphore(
+            concurrency or get_settings().RIOT_FETCH_CONCURRENCY
+        )
+        known = await tft_known_matches.saved([match.id for match in matches])
+        fetches = []
 
         for match in matches:
-            try:
-                await TFTGame.get(match_id=match.id)
+            if match.id in known:
                 if http_code is None:
                     http_code = 409
                 elif http_code != 409:
@@ -142,8 +145,7 @@ class RiotAPI(ClientAPI):
                     )
                 )
                 continue
-            except DoesNotExist:
-                pass
+            known.add(match.id)
 
             game_tags = {}
             try:
@@ -163,144 +165,164 @@ class RiotAPI(ClientAPI):
             except DoesNotExist:
                 continue
 
-            req_http_code, req = await self.get_matches([match.id])
-            req = req[0]
-            if req.data:
-                g = req.data
-            else:
-                if http_code is None:
-                    http_code = req_http_code
-                elif http_code != req_http_code:
-                    http_code = 207
-                data.append(req)
-                continue
-
-            if len(players) > 0:
-                nb_players_matched = sum(
-                    participant in players
-                    for participant in g["metadata"]["participants"]
+            data.append(None)
+            fetches.append(
+                asyncio.ensure_future(
+                    self._fetch_tft_game(semaphore, len(data) - 1, match, game_tags)
                 )
-                if min_player > nb_players_matched:
+            )
+
+        pending = []
+        try:
+            # Matches are persisted batch by batch while the next ones are still being fetched
+            for fetch in asyncio.as_completed(fetches):
+                index, match, game_tags, req_http_code, req = await fetch
+                if req.data:
+                    g = req.data
+                else:
                     if http_code is None:
-                        http_code = 200
+                        http_code = req_http_code
                     elif http_code != req_http_code:
                         http_code = 207
-                    data.append(
-                        DataResponse(
+                    data[index] = req
+                    continue
+
+                if len(players) > 0:
+                    nb_players_matched = sum(
+                        participant in players
+                        for participant in g["metadata"]["participants"]
+                    )
+                    if min_player > nb_players_matched:
+                        if http_code is None:
+                            http_code = 200
+                        elif http_code != req_http_code:
+                            http_code = 207
+                        data[index] = DataResponse(
                             error=ErrorResponse(
                                 status_code=200,
                                 message=f"{nb_players_matched} players matched, needed {min_player}",
                             )
                         )
-                    )
-                    continue
+                        continue
 
-            async with in_transaction("default") as connection:
-                metadata = g["metadata"]
-                info = g["info"]
-                game = await TFTGame(
-                    match_id=metadata["match_id"],
-                    data_version=metadata["data_version"],
-                    game_datetime=datetime.datetime.utcfromtimestamp(
-                        int(str(info["game_datetime"])[:-3])
-                    ),
-                    game_length=info["game_length"],
-                    game_version=info["game_version"],
-                    queue_id=info["queue_id"],
-                    tft_set_number=info["tft_set_number"],
-                    tft_game_type=info["tft_game_type"],
-                )
-                if "tft_set_core_name" in info:
-                    game.tft_set_core_name = info["tft_set_core_name"]
-                if match.event:
-                    game.event = game_tags["event"]
-                if match.tournament:
-                    game.tournament = game_tags["tournament"]
-                if match.stage:
-                    game.stage = game_tags["stage"]
-                await game.save(using_db=connection)
-
-                for p in info["participants"]:
-                    player, _ = await TFTPlayer.get_or_create(
-                        puuid=p["puuid"],
-                        region=self.get_region(metadata["match_id"]),
-                        using_db=connection,
-                    )
-                    companion, _ = await TFTCompanion.get_or_create(
-                        content_id=p["companion"]["content_ID"],
-                        skin_id=p["companion"]["skin_ID"],
-                        species=p["companion"]["species"],
-                        using_db=connection,
-                    )
-                    participant = await TFTParticipant(
-                        gold_left=p["gold_left"],
-                        last_round=p["last_round"],
-                        level=p["level"],
-                        placement=p["placement"],
-                        players_eliminated=p["players_eliminated"],
-                        time_eliminated=p["time_eliminated"],
-                        total_damage_to_players=p["total_damage_to_players"],
-                        companion=companion,
-                        player=player,
-                        game=game,
+                pending.append((index, match, game_tags, g))
+                if len(pending) >= saver.batch_size:
+                    http_code = await self._save_tft_batch(
+                        saver, pending, http_code, data
                     )
-                    await participant.save(using_db=connection)
+                    pending = []
 
-                    for a in p["augments"]:
-                        augment, _ = await TFTAugment.get_or_create(
-                            name=a, using_db=connection
-                        )
-                        await participant.augments.add(augment)
+            if pending:
+                http_code = await self._save_tft_batch(saver, pending, http_code, data)
+        finally:
+            for fetch in fetches:
+                fetch.cancel()
 
-                    for t in p["traits"]:
-                        trait, _ = await TFTTrait.get_or_create(
-                            name=t["name"], using_db=connection
-                        )
-                        current_trait = await TFTCurrentTrait(
-                            num_units=t["num_units"],
-                            style=t["style"],
-                            tier_current=t["tier_current"],
-                            tier_total=t["tier_total"],
-                            trait=trait,
-                            participant=participant,
-                        )
-                        await current_trait.save(using_db=connection)
+        return http_code, data
 
-                    for u in p["units"]:
-                        unit, _ = await TFTUnit.get_or_create(
-                            character_id=u["character_id"], using_db=connection
-                        )
-                        current_unit = await TFTCurrentUnit(
-                            name=u["name"],
-                            rarity=u["rarity"],
-                            tier=u["tier"],
-                            unit=unit,
-                            participant=participant,
-                        )
-                        if "chosen" in u:
-                            current_unit.chosen = u["chosen"]
-                        await current_unit.save(using_db=connection)
+    async def _fetch_tft_game(
+        self,
+        semaphore: asyncio.Semaphore,
+        index: int,
+        match: GameSaveIn_Pydantic,
+        game_tags: Dict[str, Any],
+    ) -> Tuple[int, GameSaveIn_Pydantic, Dict[str, Any], int, DataResponse]:
+        try:
+            async with semaphore:
+                req_http_code, req = await self.get_matches([match.id])
+        except httpx.TransportError as e:
+            # Retries are exhausted, only this match fails, other fetches and saved batches go on
+            return (
+                index,
+                match,
+                game_tags,
+                503,
+                DataResponse(
+                    error=ErrorResponse(
+                        status_code=503, message=f"Game {match.id} not fetched: {e!r}"
+                    )
+                ),
+            )
 
-                        for i in range(0, len(u["items"])):
-                            item, _ = await TFTItem.get_or_create(
-                                id=u["items"][i], using_db=connection
-                            )
-                            if "itemNames" in u:
-                                item.name = u["itemNames"][i]
-                                await item.save(using_db=connection)
-                            await current_unit.items.add(item)
+        return index, match, game_tags, req_http_code, req[0]
+
+    async def _save_tft_batch(
+        self,
+        saver: TFTBulkSaver,
+        pending: List[Tuple[int, GameSaveIn_Pydantic, Dict[str, Any], Dict[str, Any]]],
+        http_code: int,
+        data: List[DataResponse],
+    ) -> int:
+        pending = sorted(pending, key=lambda p: p[0])
+        _, saved = await self.save_tft_payloads(
+            saver, [(match, game_tags, g) for _, match, game_tags, g in pending]
+        )
 
+        for index, match, _, _ in pending:
+            if match.id in saved:
+                if http_code is None:
+                    http_code = 409
+                elif http_code != 409:
+                    http_code = 207
+                data[index] = DataResponse(
+                    error=ErrorResponse(
+                        status_code=409, message=f"Game {match.id} already saved"
+                    )
+                )
+                continue
             if http_code is None:
                 http_code = 200
             elif http_code != 200:
                 http_code = 207
-            data.append(DataResponse(data=f"Game {match.id} saved"))
+            data[index] = DataResponse(data=f"Game {match.id} saved")
 
+        return http_code
+
+    async def save_tft_payloads(
+        self,
+        saver: TFTBulkSaver,
+        games: List[Tuple[GameSaveIn_Pydantic, Dict[str, Any], Dict[str, Any]]],
+    ) -> Tuple[int, Set[str]]:
+        """
+        Save one batch of Riot match payloads not saved yet
+
+        :param games: list of (match, game tags, Riot match payload)
+        :return: number of rows written, match ids found saved meanwhile (not written)
+        """
+        archive = get_match_archive()
+        if archive is not None:
+            # Raw payloads are archived first so games can be reprocessed without Riot API
+            await asyncio.get_running_loop().run_in_executor(
+                None, archive.append, [g for _, _, g in games]
+            )
+        try:
+            rows = await saver.save_batch([(g, game_tags) for _, game_tags, g in games])
+            saved = set()
+        except IntegrityError:
+            # Games saved by another process since the known matches index was built
+            saved = await tft_known_matches.confirm([match.id for match, _, _ in games])
+            if not saved:
+                raise
+            games = [game for game in games if game[0].id not in saved]
+            rows = 0
+            if games:
+                rows = await saver.save_batch(
+                    [(g, game_tags) for _, game_tags, g in games]
+                )
+        tft_known_matches.add(match.id for match, _, _ in games)
+        invalidate_groups(
+            {
+                (match.event or None, match.tournament or None, match.stage or None)
+                for match, _, _ in games
+            }
+        )
+
+        for match, _, _ in games:
             metric_game.labels(
-                match.event, match.tournament, match.stage, self.game.value
+                self.game.value, match.event, match.tournament, match.stage
             ).inc()
 
-        return http_code, data
+        return rows, saved
 
     async def update_tft_games(
         self, matches: List[GameSaveIn_Pydantic]
@@ -317,10 +339,12 @@ class RiotAPI(ClientAPI):
     ) -> List[DataResponse]:
         http_code = None
         data = []
+        saved = await self._get_games_group([match.id for match in matches], game_type)
+        resolved_tags = {}
+        updates = {}
+
         for match in matches:
-            try:
-                game = await game_type.get(match_id=match.id)
-            except DoesNotExist:
+            if match.id not in saved:
                 if http_code is None:
                     http_code = 404
                 elif http_code != 404:
@@ -334,51 +358,71 @@ class RiotAPI(ClientAPI):
                 )
                 continue
 
-            game_tags = {}
-            try:
-                for instance, value in [
-                    (Event, match.event),
-                    (Tournament, match.tournament),
-                    (Stage, match.stage),
-                ]:
-                    http_code, result = await self._get_game_tags(
-                        http_code, instance, value
-                    )
-                    if isinstance(result, instance):
-                        game_tags[type(result).__name__.lower()] = result
-                    elif isinstance(result, DataResponse):
-                        data.append(result)
-                        raise DoesNotExist
-            except DoesNotExist:
+            # Tags are resolved once per distinct (event, tournament, stage)
+            group = (match.event or None, match.tournament or None, match.stage or None)
+            if group not in resolved_tags:
+                game_tags = {}
+                try:
+                    for instance, value in [
+                        (Event, match.event),
+                        (Tournament, match.tournament),
+                        (Stage, match.stage),
+                    ]:
+                        http_code, result = await self._get_game_tags(
+                            http_code, instance, value
+                        )
+                        if isinstance(result, instance):
+                            game_tags[type(result).__name__.lower()] = result
+                        elif isinstance(result, DataResponse):
+                            game_tags = result
+                            raise DoesNotExist
+                except DoesNotExist:
+                    pass
+                resolved_tags[group] = game_tags
+
+            if isinstance(resolved_tags[group], DataResponse):
+                if http_code is None:
+                    http_code = 404
+                elif http_code != 404:
+                    http_code = 207
+                data.append(resolved_tags[group])
                 continue
 
-            old_event = game.event if hasattr(game, "event") else None
-            old_tournament = game.tournament if hasattr(game, "tournament") else None
-            old_stage = game.stage if hasattr(game, "stage") else None
-            if match.event:
-                game.event = game_tags["event"]
-            else:
-                game.event = None
-            if match.tournament:
-                game.tournament = game_tags["tournament"]
-            else:
-                game.tournament = None
-            if match.stage:
-                game.stage = game_tags["stage"]
-            else:
-                game.stage = None
-            await game.save()
+            updates[match.id] = group
             if http_code is None:
                 http_code = 200
             elif http_code != 200:
                 http_code = 207
             data.append(DataResponse(data=f"Game {match.id} updated"))
-            metric_game.labels(
-                self.game.value, old_event, old_tournament, old_stage
-            ).dec()
-            metric_game.labels(
-                self.game.value, match.event, match.tournament, match.stage
-            ).inc()
+
+        groups_update = {}
+        for match_id, group in updates.items():
+            groups_update.setdefault(group, []).append(match_id)
+
+        if "event" in game_type._meta.fk_fields:
+            async with in_transaction("default") as connection:
+                # Retagged games move from the rollups of their old group to the new one
+                if game_type is TFTGame and updates:
+                    await remove_tft_games(list(updates), connection)
+                for group, matches_id in groups_update.items():
+                    for ids in chunks(matches_id):
+                        await game_type.filter(match_id__in=ids).using_db(
+                            connection
+                        ).update(
+                            event_id=group[0],
+                            tournament_id=group[1],
+                            stage_id=group[2],
+                        )
+                if game_type is TFTGame and updates:
+                    await add_tft_games(list(updates), connection)
+
+        self._update_metric_game(
+            [saved[match_id] for match_id in updates], list(updates.values())
+        )
+
+        if game_type is TFTGame and updates:
+            groups = {saved[match_id] for match_id in updates} | set(groups_update)
+            invalidate_groups(groups)
 
         return http_code, data
 
@@ -387,11 +431,11 @@ class RiotAPI(ClientAPI):
     ) -> List[DataResponse]:
         http_code = None
         data = []
+        saved = await self._get_games_group(matches_id, game_type)
+        deleted = {}
 
         for match_id in matches_id:
-            try:
-                game = await game_type.get(match_id=match_id)
-            except DoesNotExist:
+            if match_id not in saved or match_id in deleted:
                 if http_code is None:
                     http_code = 404
                 elif http_code != 404:
@@ -404,21 +448,64 @@ class RiotAPI(ClientAPI):
                     )
                 )
                 continue
-            old_event = game.event if hasattr(game, "event") else None
-            old_tournament = game.tournament if hasattr(game, "tournament") else None
-            old_stage = game.stage if hasattr(game, "stage") else None
-            await game.delete()
+
+            deleted[match_id] = saved[match_id]
             if http_code is None:
                 http_code = 200
             elif http_code != 200:
                 http_code = 207
             data.append(DataResponse(data=f"Game {match_id} deleted"))
-            metric_game.labels(
-                self.game.value, old_event, old_tournament, old_stage
-            ).dec()
+
+        async with in_transaction("default") as connection:
+            if game_type is TFTGame and deleted:
+                await remove_tft_games(list(deleted), connection)
+            for ids in chunks(list(deleted)):
+                await game_type.filter(match_id__in=ids).using_db(connection).delete()
+
+        self._update_metric_game(list(deleted.values()), [])
+
+        if game_type is TFTGame and deleted:
+            groups = set(deleted.values())
+            invalidate_groups(groups)
+            invalidate_matches(deleted)
+            tft_known_matches.discard(deleted)
 
         return http_code, data
 
+    async def _get_games_group(
+        self, matches_id: List[str], game_type: Union[TFTGame, ValorantGame]
+    ) -> Dict[str, Tuple[str, str, str]]:
+        """
+        :return: saved games among matches_id with their (event, tournament, stage)
+        """
+        group_fields = [
+            f"{tag}_id"
+            for tag in ["event", "tournament", "stage"]
+            if tag in game_type._meta.fk_fields
+        ]
+        saved = {}
+        for ids in chunks(list(set(matches_id))):
+            for row in await game_type.filter(match_id__in=ids).values(
+                "match_id", *group_fields
+            ):
+                saved[row["match_id"]] = (
+                    row.get("event_id"),
+                    row.get("tournament_id"),
+                    row.get("stage_id"),
+                )
+
+        return saved
+
+    def _update_metric_game(
+        self,
+        old_groups: List[Tuple[str, str, str]],
+        new_groups: List[Tuple[str, str, str]],
+    ) -> None:
+        for group, count in Counter(old_groups).items():
+            metric_game.labels(self.game.value, *group).dec(count)
+        for group, count in Counter(new_groups).items():
+            metric_game.labels(self.game.value, *group).inc(count)
+
     async def get_summoners_name(
         self, encrypted_puuids: List[str]
     ) -> Tuple[int, List[DataResponse]]:
@@ -433,16 +520,17 @@ class RiotAPI(ClientAPI):
                 match_list_url = f"/{self.game.value}/summoner/v1/summoners/by-puuid/{encrypted_puuid}"
 
             reqs.append(
-                self.session.build_request(
+                self.build_request(
                     "GET",
                     self.build_url(
                         self.routing,
                         match_list_url,
                     ),
+                    endpoint=f"{self.game.value}-summoner.getByPUUID",
                 )
             )
 
-        return self.handle_response(await self.make_request(reqs))
+        return await self.make_cached_request(reqs, get_settings().SUMMONER_CACHE_TTL)
 
     async def get_summoners_puuid(
         self, summoners_name: List[str]
@@ -464,16 +552,17 @@ class RiotAPI(ClientAPI):
                 )
 
             reqs.append(
-                self.session.build_request(
+                self.build_request(
                     "GET",
                     self.build_url(
                         self.routing,
                         match_list_url,
                     ),
+                    endpoint=f"{self.game.value}-summoner.getBySummonerName",
                 )
             )
 
-        return self.handle_response(await self.make_request(reqs))
+        return await self.make_cached_request(reqs, get_settings().SUMMONER_CACHE_TTL)
 
     async def get_matches_list(
         self,
@@ -510,15 +599,96 @@ class RiotAPI(ClientAPI):
                 params["startTime"] = start_time
 
             reqs.append(
-                self.session.build_request(
+                self.build_request(
                     "GET",
                     self.build_url(self.routing, match_list_url),
+                    endpoint=f"{self.game.value}-match.getMatchIdsByPUUID",
                     params=params,
                 )
             )
 
         return self.handle_response(await self.make_request(reqs))
 
+    async def iter_matches_list(
+        self,
+        puuid: str,
+        end_time: int = None,
+        start_time: int = None,
+        limit: int = None,
+        page_size: int = MATCH_LIST_PAGE_SIZE,
+    ) -> AsyncIterator[Tuple[int, DataResponse]]:
+        """
+        Match ids of a player page by page, newest first. The next page is
+        requested before a page is yielded so callers can fetch matches meanwhile.
+
+        Pages stop after a partial page (start_time boundary or end of history),
+        an error or limit match ids.
+        """
+        start = 0
+
+        def fetch_page() -> Tuple[asyncio.Future, int]:
+            count = page_size if limit is None else min(page_size, limit - start)
+            return (
+                asyncio.ensure_future(
+                    self.get_matches_list([puuid], start, end_time, start_time, count)
+                ),
+                count,
+            )
+
+        next_page, count = fetch_page()
+        try:
+            while next_page is not None:
+                http_code, datas = await next_page
+                data = datas[0]
+                next_page = None
+                start += count
+                if (
+                    data.data is not None
+                    and len(data.data) == count
+                    and (limit is None or start < limit)
+                ):
+                    next_page, count = fetch_page()
+
+                yield http_code, data
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+
+    async def get_all_matches_list(
+        self,
+        puuids: List[str],
+        end_time: int = None,
+        start_time: int = None,
+        limit: int = None,
+    ) -> Tuple[int, List[DataResponse]]:
+        """
+        Every match ids of players, pages of players are fetched concurrently
+        """
+
+        async def get_player_matches_list(puuid: str) -> Tuple[int, DataResponse]:
+            matches_id = []
+            async for http_code, data in self.iter_matches_list(
+                puuid, end_time, start_time, limit
+            ):
+                if data.error is not None:
+                    return http_code, data
+                matches_id.extend(data.data)
+
+            return 200, DataResponse(data=matches_id)
+
+        http_code = None
+        data = []
+        for req_http_code, req in await asyncio.gather(
+            *[get_player_matches_list(puuid) for puuid in puuids]
+        ):
+            if http_code is None:
+                http_code = req_http_code
+            elif http_code != req_http_code:
+                http_code = 207
+            data.append(req)
+
+        return http_code, data
+
     async def get_matches(
         self, matches_id: List[str]
     ) -> Tuple[int, List[DataResponse]]:
@@ -532,11 +702,12 @@ class RiotAPI(ClientAPI):
         reqs = []
         for match_id in matches_id:
             reqs.append(
-                self.session.build_request(
+                self.build_request(
                     "GET",
                     self.build_url(
                         self.get_region(match_id), f"{match_url}/{match_id}"
                     ),
+                    endpoint=f"{self.game.value}-match.getMatch",
                 )
             )
 
@@ -555,10 +726,11 @@ class RiotAPI(ClientAPI):
         reqs = []
         for summoner_id in summoners_id:
             reqs.append(
-                self.session.build_request(
+                self.build_request(
                     "GET",
                     self.build_url(self.routing, f"{match_url}/{summoner_id}"),
+                    endpoint=f"{self.game.value}-league.getLeagueEntriesForSummoner",
                 )
             )
 
-        return self.handle_response(await self.make_request(reqs))
+        return await self.make_cached_request(reqs, get_settings().RANK_CACHE_TTL)
@@ -0,0 +1,34 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Share the result of identical calls running at the same time, a call started
+    while another one with the same key is in flight waits for it instead.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(
+        self, key: Hashable, func: Callable[[], Awaitable[T]]
+    ) -> Tuple[T, bool]:
+        """
+        :return: result of func and whether it was shared with a call in flight
+        """
+        future = self._calls.get(key)
+        shared = future is not None
+        if not shared:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._forget(key, future))
+
+        # A cancelled caller must not cancel the call the others are waiting for
+        return await asyncio.shield(future), shared
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
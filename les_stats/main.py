@@ -1,5 +1,7 @@
+import asyncio
 import importlib.metadata
 import logging
+import signal
 
 import sentry_sdk
 import uvicorn
@@ -12,9 +14,14 @@ from sentry_sdk.integrations.fastapi import FastApiIntegration
 from sentry_sdk.integrations.starlette import StarletteIntegration
 from tortoise.contrib.fastapi import register_tortoise
 
+from les_stats.client_api.registry import client_registry
 from les_stats.metrics.main import init_metrics
 from les_stats.routers.api import api_router
-from les_stats.utils.config import get_settings
+from les_stats.utils.config import get_settings, reload_settings
+from les_stats.utils.jobs import job_queue
+from les_stats.utils.known_matches import tft_known_matches
+from les_stats.utils.migrate import upgrade_db
+from les_stats.utils.watch import tft_watch_service
 
 title = "Lyon e-Sport stats API"
 version = importlib.metadata.version("les_stats")
@@ -39,6 +46,9 @@ def create_app() -> FastAPI:
     )
 
     application.include_router(api_router)
+    application.add_event_handler("shutdown", job_queue.stop)
+    application.add_event_handler("shutdown", tft_watch_service.stop)
+    application.add_event_handler("shutdown", client_registry.aclose)
 
     return application
 
@@ -84,7 +94,18 @@ if __name__ == "__main__":
     @app.on_event("startup")
     async def startup_event():
         logger.info(f"App version {version}")
+        for migration_version, migration_name in await upgrade_db():
+            logger.info(f"Applied migration {migration_version:04d}_{migration_name}")
+        await tft_known_matches.load()
+        # Games are counted before anything can save one, a game saved while
+        # counting would be overwritten by the counts
         await init_metrics()
+        await job_queue.start()
+        await tft_watch_service.start()
+        if hasattr(signal, "SIGHUP"):
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGHUP, reload_settings
+            )
         start_http_server(
             addr=get_settings().EXPORTER_ADDR, port=get_settings().EXPORTER_PORT
         )
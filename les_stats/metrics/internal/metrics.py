@@ -8,3 +8,7 @@ metric_game = Gauge(
     "number of game registered in system",
     ["game", "event", "tournament", "stage"],
 )
+metric_init_metrics_seconds = Gauge(
+    "les_stats_init_metrics_seconds",
+    "time spent initialising metrics from the database at startup",
+)
@@ -1,6 +1,11 @@
+import time
+
+from tortoise.functions import Count
+
 from les_stats.metrics.internal.metrics import (
     metric_event,
     metric_game,
+    metric_init_metrics_seconds,
     metric_stage,
     metric_tournament,
 )
@@ -15,19 +20,38 @@ async def init_metrics() -> None:
     from les_stats.models.tft.game import TFTGame
     from les_stats.models.valorant.game import ValorantGame
 
+    start = time.perf_counter()
+
     metric_event.set(await Event.all().count())
     metric_tournament.set(await Tournament.all().count())
     metric_stage.set(await Stage.all().count())
 
-    for game_type, games in [
-        (RiotGame.tft, await TFTGame.all()),
-        (RiotGame.valorant, await ValorantGame.all()),
-        (RiotGame.lol, await LolGame.all()),
+    for game_type, game_model in [
+        (RiotGame.tft, TFTGame),
+        (RiotGame.valorant, ValorantGame),
+        (RiotGame.lol, LolGame),
     ]:
-        for game in games:
-            metric_game.labels(
-                game_type,
-                game.event if hasattr(game, "event") else None,
-                game.tournament if hasattr(game, "tournament") else None,
-                game.stage if hasattr(game, "stage") else None,
-            ).set(await games.count())
+        group_fields = [
+            f"{tag}_id"
+            for tag in ["event", "tournament", "stage"]
+            if tag in game_model._meta.fk_fields
+        ]
+        if group_fields:
+            groups = (
+                await game_model.annotate(count_game=Count("match_id"))
+                .group_by(*group_fields)
+                .values(*group_fields, "count_game")
+            )
+        else:
+            groups = [{"count_game": await game_model.all().count()}]
+
+        for group in groups:
+            if group["count_game"] > 0:
+                metric_game.labels(
+                    game_type.value,
+                    group.get("event_id"),
+                    group.get("tournament_id"),
+                    group.get("stage_id"),
+                ).set(group["count_game"])
+
+    metric_init_metrics_seconds.set(time.perf_counter() - start)
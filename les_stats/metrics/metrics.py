@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Summary
+from prometheus_client import Counter, Gauge, Summary
 
 metric_request_success_processing_seconds_api = Summary(
     "les_stats_request_success_processing_seconds",
@@ -15,3 +15,38 @@ metric_request_http_code_total_api = Counter(
     "number of request per HTTP code",
     ["http_code", "game"],
 )
+metric_request_retry_total_api = Counter(
+    "les_stats_request_retry",
+    "number of API request retried per reason",
+    ["reason", "game"],
+)
+metric_request_give_up_total_api = Counter(
+    "les_stats_request_give_up",
+    "number of API request failed after exhausting retries per reason",
+    ["reason", "game"],
+)
+metric_rate_limit_queue_depth = Gauge(
+    "les_stats_rate_limit_queue_depth",
+    "number of API requests waiting for rate limit",
+    ["host"],
+)
+metric_request_coalesced_total_api = Counter(
+    "les_stats_request_coalesced",
+    "number of API requests sharing the response of an identical request in flight",
+    ["endpoint", "game"],
+)
+metric_response_cache_hit_total_api = Counter(
+    "les_stats_response_cache_hit",
+    "number of API requests answered from cache per endpoint",
+    ["endpoint", "game"],
+)
+metric_response_cache_miss_total_api = Counter(
+    "les_stats_response_cache_miss",
+    "number of API requests not found in cache per endpoint",
+    ["endpoint", "game"],
+)
+metric_rate_limit_wait_seconds = Summary(
+    "les_stats_rate_limit_wait_seconds",
+    "time spent waiting for rate limit before sending API request",
+    ["host"],
+)
@@ -0,0 +1,31 @@
+from prometheus_client import Counter, Gauge, Summary
+
+metric_tft_save_rows_total = Counter(
+    "les_stats_tft_save_rows",
+    "number of rows written by the TFT batch save",
+    ["table"],
+)
+metric_tft_save_rows_per_second = Gauge(
+    "les_stats_tft_save_rows_per_second",
+    "rows written per second by the last TFT batch save",
+)
+metric_tft_watch_cycle_seconds = Summary(
+    "les_stats_tft_watch_cycle_seconds",
+    "time spent by a TFT watch cycle listing and saving new matches",
+)
+metric_tft_watch_backlog = Gauge(
+    "les_stats_tft_watch_backlog",
+    "new TFT matches found by the last watch cycle which could not be saved yet",
+)
+metric_tft_watch_interval_seconds = Gauge(
+    "les_stats_tft_watch_interval_seconds",
+    "seconds until the next TFT watch cycle",
+)
+metric_tft_watch_saved_total = Counter(
+    "les_stats_tft_watch_saved",
+    "number of TFT matches saved by the watch cycles",
+)
+metric_tft_save_batch_processing_seconds = Summary(
+    "les_stats_tft_save_batch_processing_seconds",
+    "time spent writing a batch of TFT games",
+)
@@ -1,7 +1,9 @@
 from tortoise import Tortoise
 
-from les_stats.models.internal.auth import Api
+from les_stats.models.internal.auth import Api, ApiKeyVersion
 from les_stats.models.internal.event import Event
+from les_stats.models.internal.job import Job
+from les_stats.models.internal.migration import Migration
 from les_stats.models.internal.stage import Stage
 from les_stats.models.internal.tournament import Tournament
 from les_stats.models.lol.game import LolGame
@@ -17,6 +19,15 @@ from les_stats.models.tft.game import (
     TFTTrait,
     TFTUnit,
 )
+from les_stats.models.tft.rollup import (
+    TFTRollupGame,
+    TFTRollupItem,
+    TFTRollupLock,
+    TFTRollupPlayer,
+    TFTRollupTrait,
+    TFTRollupUnit,
+)
+from les_stats.models.tft.watermark import TFTImportWatermark
 from les_stats.models.valorant.game import ValorantGame
 
 Tortoise.init_models(["les_stats.models"], "models")
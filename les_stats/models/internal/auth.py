@@ -15,3 +15,10 @@ class Api(models.Model):
 
     def __str__(self) -> str:
         return f"name: {self.name}, scope: {self.scope.value}"
+
+
+class ApiKeyVersion(models.Model):
+    """Single row counter incremented whenever API keys change"""
+
+    id = fields.IntField(pk=True)
+    version = fields.IntField(default=0)
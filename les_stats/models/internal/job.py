@@ -0,0 +1,27 @@
+from enum import Enum
+
+from tortoise import fields, models
+
+from les_stats.schemas.riot.game import RiotGame
+
+
+class JobStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class Job(models.Model):
+    id = fields.UUIDField(pk=True)
+    game: RiotGame = fields.CharEnumField(RiotGame)
+    status: JobStatus = fields.CharEnumField(JobStatus, default=JobStatus.pending)
+    # Games to save (GameSaveIn) and their result (DataResponse), None until processed
+    matches = fields.JSONField()
+    results = fields.JSONField()
+    http_code = fields.IntField(null=True)
+    created_at = fields.DatetimeField(auto_now_add=True)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"id: {self.id}, game: {self.game.value}, status: {self.status.value}"
@@ -0,0 +1,10 @@
+from tortoise import fields, models
+
+
+class Migration(models.Model):
+    version = fields.IntField(pk=True)
+    name = fields.CharField(max_length=200)
+    applied_at = fields.DatetimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.version:04d}_{self.name}"
@@ -0,0 +1,98 @@
+from tortoise import fields, models
+
+
+class TFTRollup(models.Model):
+    """
+    Unique per group and key, but the group columns are nullable and NULLs are
+    distinct in unique indexes: writers hold the TFTRollupLock, which is what
+    actually keeps one row per group.
+    """
+
+    id = fields.IntField(pk=True)
+    event = fields.ForeignKeyField(
+        "models.Event", related_name=False, on_delete="CASCADE", null=True
+    )
+    tournament = fields.ForeignKeyField(
+        "models.Tournament", related_name=False, on_delete="CASCADE", null=True
+    )
+    stage = fields.ForeignKeyField(
+        "models.Stage", related_name=False, on_delete="CASCADE", null=True
+    )
+
+    class Meta:
+        abstract = True
+
+
+class TFTRollupGame(TFTRollup):
+    games = fields.IntField(default=0)
+    game_length_sum = fields.FloatField(default=0)
+    game_length_min = fields.FloatField()
+    game_length_max = fields.FloatField()
+
+    class Meta:
+        indexes = (("event", "tournament", "stage"),)
+        unique_together = (("event", "tournament", "stage"),)
+
+
+class TFTRollupTrait(TFTRollup):
+    trait = fields.ForeignKeyField(
+        "models.TFTTrait", related_name=False, on_delete="CASCADE"
+    )
+    tier = fields.IntField()
+    count = fields.IntField(default=0)
+
+    class Meta:
+        indexes = (("event", "tournament", "stage"),)
+        unique_together = (("event", "tournament", "stage", "trait", "tier"),)
+
+
+class TFTRollupUnit(TFTRollup):
+    unit = fields.ForeignKeyField(
+        "models.TFTUnit", related_name=False, on_delete="CASCADE"
+    )
+    tier = fields.IntField()
+    count = fields.IntField(default=0)
+
+    class Meta:
+        indexes = (("event", "tournament", "stage"),)
+        unique_together = (("event", "tournament", "stage", "unit", "tier"),)
+
+
+class TFTRollupItem(TFTRollup):
+    item = fields.ForeignKeyField(
+        "models.TFTItem", related_name=False, on_delete="CASCADE"
+    )
+    count = fields.IntField(default=0)
+
+    class Meta:
+        indexes = (("event", "tournament", "stage"),)
+        unique_together = (("event", "tournament", "stage", "item"),)
+
+
+class TFTRollupPlayer(TFTRollup):
+    player = fields.ForeignKeyField(
+        "models.TFTPlayer", related_name=False, on_delete="CASCADE"
+    )
+    games = fields.IntField(default=0)
+    placement_sum = fields.IntField(default=0)
+    placement_min = fields.IntField()
+    placement_max = fields.IntField()
+    players_eliminated_sum = fields.IntField(default=0)
+    players_eliminated_min = fields.IntField()
+    players_eliminated_max = fields.IntField()
+    last_round_sum = fields.IntField(default=0)
+    last_round_min = fields.IntField()
+    last_round_max = fields.IntField()
+    damage_sum = fields.IntField(default=0)
+    damage_min = fields.IntField()
+    damage_max = fields.IntField()
+
+    class Meta:
+        indexes = (("event", "tournament", "stage"),)
+        unique_together = (("event", "tournament", "stage", "player"),)
+
+
+class TFTRollupLock(models.Model):
+    """Single row locked by transactions updating rollups"""
+
+    id = fields.IntField(pk=True)
@@ -0,0 +1,17 @@
+from tortoise import fields, models
+
+
+class TFTImportWatermark(models.Model):
+    """Latest game imported of a player, match lists of --since-last imports start from it"""
+
+    id = fields.IntField(pk=True)
+    puuid = fields.CharField(max_length=200)
+    region = fields.CharField(max_length=200)
+    game_datetime = fields.DatetimeField()
+    match_id = fields.CharField(max_length=200)
+
+    def __str__(self):
+        return f"region:{self.region}, puuid:{self.puuid}, match_id:{self.match_id}"
+
+    class Meta:
+        unique_together = ("puuid", "region")
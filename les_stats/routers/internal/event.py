@@ -15,6 +15,7 @@ from les_stats.models.internal.stage import Stage
 from les_stats.models.internal.tournament import Tournament
 from les_stats.schemas.internal.event import Event_Pydantic, EventIn_Pydantic
 from les_stats.utils.auth import scope_required
+from les_stats.utils.cache import invalidate_tag
 from les_stats.utils.status import Status
 
 router = APIRouter()
@@ -60,6 +61,7 @@ async def delete_event(request: Request, event_name: str):
     deleted_count = await Event.filter(name=event_name).delete()
     if not deleted_count:
         raise HTTPException(status_code=404, detail=f"Event {event_name} not found")
+    invalidate_tag("event", event_name)
     metric_event.dec()
     return Status(message=f"Deleted Event {event_name}")
 
@@ -8,6 +8,7 @@ from les_stats.models.internal.auth import Scope
 from les_stats.models.internal.stage import Stage
 from les_stats.schemas.internal.stage import Stage_Pydantic
 from les_stats.utils.auth import scope_required
+from les_stats.utils.cache import invalidate_tag
 from les_stats.utils.status import Status
 
 router = APIRouter()
@@ -34,6 +35,7 @@ async def delete_stage(request: Request, stage_name: str):
     deleted_count = await Stage.filter(name=stage_name).delete()
     if not deleted_count:
         raise HTTPException(status_code=404, detail=f"Stage {stage_name} not found")
+    invalidate_tag("stage", stage_name)
     metric_stage.dec()
     return Status(message=f"Deleted Stage {stage_name}")
 
@@ -13,6 +13,7 @@ from les_stats.schemas.internal.tournament import (
     TournamentIn_Pydantic,
 )
 from les_stats.utils.auth import scope_required
+from les_stats.utils.cache import invalidate_tag
 from les_stats.utils.status import Status
 
 router = APIRouter()
@@ -59,6 +60,7 @@ async def delete_tournament(request: Request, tournament_name: str):
         raise HTTPException(
             status_code=404, detail=f"Tournament {tournament_name} not found"
         )
+    invalidate_tag("tournament", tournament_name)
     metric_tournament.dec()
     return Status(message=f"Deleted Tournament {tournament_name}")
 
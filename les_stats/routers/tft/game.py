@@ -1,15 +1,19 @@
 from typing import List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Query, Request, Response
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from tortoise.exceptions import DoesNotExist
 
 from les_stats.client_api.riot import RiotAPI
 from les_stats.models.internal.auth import Scope
+from les_stats.models.internal.job import Job
 from les_stats.models.tft.game import TFTGame
 from les_stats.schemas.client_api.data import DataResponse, ErrorResponse
+from les_stats.schemas.internal.job import Job_Pydantic
 from les_stats.schemas.riot.game import GameSaveIn_Pydantic, RiotGame
 from les_stats.utils.auth import scope_required
 from les_stats.utils.internal import generate_kwargs_structure
+from les_stats.utils.jobs import job_queue
 
 router = APIRouter()
 
@@ -24,10 +28,17 @@ async def get_matches_list_from_summoners(
     start_time: int = None,
     count: int = 20,
     puuid: List[str] = Query(),
+    all_pages: bool = Query(default=False, alias="all"),
 ):
-    response.status_code, data = await RiotAPI(RiotGame.tft).get_matches_list(
-        puuid, start, end_time, start_time, count
-    )
+    if all_pages:
+        # Every match between start_time and end_time, start and count are ignored
+        response.status_code, data = await RiotAPI(RiotGame.tft).get_all_matches_list(
+            puuid, end_time, start_time
+        )
+    else:
+        response.status_code, data = await RiotAPI(RiotGame.tft).get_matches_list(
+            puuid, start, end_time, start_time, count
+        )
     return data
 
 
@@ -80,6 +91,25 @@ async def save_matches_in_stat_system(
     return data
 
 
+@router.post("/jobs", response_model=Job_Pydantic)
+@scope_required([Scope.write])
+async def submit_save_matches_job(
+    request: Request, response: Response, matches_id: List[GameSaveIn_Pydantic]
+):
+    job = await job_queue.submit(RiotGame.tft, matches_id)
+    response.status_code = 202
+    return Job_Pydantic.from_orm(job)
+
+
+@router.get("/jobs/{job_id}", response_model=Job_Pydantic)
+@scope_required([Scope.read, Scope.write])
+async def get_save_matches_job(request: Request, response: Response, job_id: UUID):
+    job = await Job.get_or_none(id=job_id, game=RiotGame.tft)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return Job_Pydantic.from_orm(job)
+
+
 @router.put("/matches/save", response_model=List[DataResponse])
 @scope_required([Scope.write])
 async def update_matches_in_stat_system(
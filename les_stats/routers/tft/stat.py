@@ -1,15 +1,20 @@
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from tortoise.exceptions import DoesNotExist
-from tortoise.functions import Avg as TAvg
-from tortoise.functions import Count as TCount
 from tortoise.functions import Max as TMax
 from tortoise.functions import Min as TMin
 from tortoise.functions import Sum as TSum
 
 from les_stats.models.internal.auth import Scope
-from les_stats.models.tft.game import TFTGame, TFTItem, TFTPlayer, TFTTrait, TFTUnit
+from les_stats.models.tft.game import TFTGame, TFTPlayer
+from les_stats.models.tft.rollup import (
+    TFTRollupGame,
+    TFTRollupItem,
+    TFTRollupPlayer,
+    TFTRollupTrait,
+    TFTRollupUnit,
+)
 from les_stats.schemas.client_api.data import ErrorResponse
 from les_stats.schemas.internal.generic import TimeElapsed
 from les_stats.schemas.riot.game import RiotHost
@@ -31,7 +36,7 @@ from les_stats.schemas.tft.stat import (
     TierListCompositionRanks,
     TierListCompositionResponse,
     TierListCompositionTier,
-    TierListItem,
+    TierListItemRank,
     TierListItemRanks,
     TierListItemResponse,
     TierListUnit,
@@ -40,6 +45,7 @@ from les_stats.schemas.tft.stat import (
     TierListUnitTier,
 )
 from les_stats.utils.auth import scope_required
+from les_stats.utils.cache import cache_response
 from les_stats.utils.internal import generate_kwargs_structure
 
 router = APIRouter()
@@ -50,6 +56,7 @@ router = APIRouter()
     response_model=TierListCompositionResponse,
 )
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_tier_list_composition(
     request: Request,
     response: Response,
@@ -59,24 +66,13 @@ async def get_tier_list_composition(
 ):
     try:
         traits = (
-            await TFTTrait.all()
-            .prefetch_related(
-                "current_trait",
-            )
-            .filter(
-                current_trait__tier_current__gt=0,
-                **generate_kwargs_structure(
-                    event,
-                    tournament,
-                    stage,
-                    prefix="current_trait__participant__game__",
-                ),
-            )
-            .group_by("name", "current_trait__tier_current")
-            .annotate(
-                count_tier_list_trait=TCount("current_trait__tier_current"),
+            await TFTRollupTrait.filter(
+                **generate_kwargs_structure(event, tournament, stage)
             )
-            .values("name", "current_trait__tier_current", "count_tier_list_trait")
+            .annotate(count_tier_list_trait=TSum("count"))
+            .group_by("trait_id", "tier")
+            .order_by("trait_id", "tier")
+            .values("trait_id", "tier", "count_tier_list_trait")
         )
 
         if len(traits) == 0:
@@ -85,39 +81,35 @@ async def get_tier_list_composition(
         tiers = {}
 
         for trait in traits:
-            if f"tier{trait['current_trait__tier_current']}" not in tiers:
-                tiers[f"tier{trait['current_trait__tier_current']}"] = {
+            if f"tier{trait['tier']}" not in tiers:
+                tiers[f"tier{trait['tier']}"] = {
                     "min": {
-                        "name": trait["name"],
+                        "name": trait["trait_id"],
                         "count": trait["count_tier_list_trait"],
                     },
                     "max": {
-                        "name": trait["name"],
+                        "name": trait["trait_id"],
                         "count": trait["count_tier_list_trait"],
                     },
                 }
             else:
                 if (
-                    tiers[f"tier{trait['current_trait__tier_current']}"]["min"]["count"]
+                    tiers[f"tier{trait['tier']}"]["min"]["count"]
                     > trait["count_tier_list_trait"]
                 ):
-                    tiers[f"tier{trait['current_trait__tier_current']}"]["min"][
-                        "name"
-                    ] = trait["name"]
-                    tiers[f"tier{trait['current_trait__tier_current']}"]["min"][
-                        "count"
-                    ] = trait["count_tier_list_trait"]
+                    tiers[f"tier{trait['tier']}"]["min"]["name"] = trait["trait_id"]
+                    tiers[f"tier{trait['tier']}"]["min"]["count"] = trait[
+                        "count_tier_list_trait"
+                    ]
 
                 if (
-                    tiers[f"tier{trait['current_trait__tier_current']}"]["max"]["count"]
+                    tiers[f"tier{trait['tier']}"]["max"]["count"]
                     < trait["count_tier_list_trait"]
                 ):
-                    tiers[f"tier{trait['current_trait__tier_current']}"]["max"][
-                        "name"
-                    ] = trait["name"]
-                    tiers[f"tier{trait['current_trait__tier_current']}"]["max"][
-                        "count"
-                    ] = trait["count_tier_list_trait"]
+                    tiers[f"tier{trait['tier']}"]["max"]["name"] = trait["trait_id"]
+                    tiers[f"tier{trait['tier']}"]["max"]["count"] = trait[
+                        "count_tier_list_trait"
+                    ]
 
         for k in TierListCompositionRanks().dict().keys():
             if k in tiers:
@@ -145,57 +137,46 @@ async def get_tier_list_composition(
 
 @router.get("/tier-list/item", response_model=TierListItemResponse)
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_tier_list_item(
     request: Request,
     response: Response,
     event: Optional[str] = None,
     tournament: Optional[str] = None,
     stage: Optional[str] = None,
+    top: Optional[int] = Query(default=None, gt=0),
 ):
     try:
         items = (
-            await TFTItem.all()
-            .prefetch_related("items")
-            .filter(
-                **generate_kwargs_structure(
-                    event, tournament, stage, prefix="items__participant__game__"
-                )
+            await TFTRollupItem.filter(
+                **generate_kwargs_structure(event, tournament, stage)
             )
-            .exclude(items__id=None)
+            .annotate(count=TSum("count"))
+            .group_by("item_id", "item__name")
+            .order_by("-count", "item_id")
+            .values("item_id", "item__name", "count")
         )
 
         if len(items) == 0:
             raise DoesNotExist
 
-        nb_items = await items[0].items.all().count()
-        min = {"id": items[0].id, "name": items[0].name, "count": nb_items}
-        max = {"id": items[0].id, "name": items[0].name, "count": nb_items}
-
-        for item in items:
-            nb_items = await item.items.all().count()
-
-            if min["count"] > nb_items:
-                min["id"] = item.id
-                min["name"] = item.name
-                min["count"] = nb_items
-
-            if max["count"] < nb_items:
-                max["id"] = item.id
-                max["name"] = item.name
-                max["count"] = nb_items
+        total = sum(item["count"] for item in items)
+        ranks = [
+            TierListItemRank(
+                id=item["item_id"],
+                name=item["item__name"],
+                count=item["count"],
+                pick_rate=item["count"] / total,
+            )
+            for item in items
+        ]
 
         data = TierListItemResponse(
             data=TierListItemRanks(
-                min=TierListItem(
-                    id=min["id"],
-                    name=min["name"],
-                    count=min["count"],
-                ),
-                max=TierListItem(
-                    id=max["id"],
-                    name=max["name"],
-                    count=max["count"],
-                ),
+                min=min(ranks, key=lambda rank: (rank.count, rank.id)),
+                max=ranks[0],
+                total=total,
+                ranks=ranks[:top],
             )
         )
     except DoesNotExist:
@@ -211,6 +192,7 @@ async def get_tier_list_item(
 
 @router.get("/tier-list/unit", response_model=TierListUnitResponse)
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_tier_list_unit(
     request: Request,
     response: Response,
@@ -220,21 +202,13 @@ async def get_tier_list_unit(
 ):
     try:
         units = (
-            await TFTUnit.all()
-            .prefetch_related(
-                "current_unit",
+            await TFTRollupUnit.filter(
+                **generate_kwargs_structure(event, tournament, stage)
             )
-            .filter(
-                **generate_kwargs_structure(
-                    event, tournament, stage, prefix="current_unit__participant__game__"
-                )
-            )
-            .exclude(current_unit=None)
-            .group_by("character_id", "current_unit__tier")
-            .annotate(
-                count_tier_list_unit=TCount("current_unit__tier"),
-            )
-            .values("character_id", "current_unit__tier", "count_tier_list_unit")
+            .annotate(count_tier_list_unit=TSum("count"))
+            .group_by("unit_id", "tier")
+            .order_by("unit_id", "tier")
+            .values("unit_id", "tier", "count_tier_list_unit")
         )
 
         if len(units) == 0:
@@ -243,42 +217,40 @@ async def get_tier_list_unit(
         tiers = {}
 
         for unit in units:
-            if f"tier{unit['current_unit__tier']}" not in tiers:
-                tiers[f"tier{unit['current_unit__tier']}"] = {
+            if f"tier{unit['tier']}" not in tiers:
+                tiers[f"tier{unit['tier']}"] = {
                     "min": {
-                        "character_id": unit["character_id"],
+                        "character_id": unit["unit_id"],
                         "count": unit["count_tier_list_unit"],
                     },
                     "max": {
-                        "character_id": unit["character_id"],
+                        "character_id": unit["unit_id"],
                         "count": unit["count_tier_list_unit"],
                     },
                     "total": unit["count_tier_list_unit"],
                 }
             else:
-                tiers[f"tier{unit['current_unit__tier']}"]["total"] += unit[
-                    "count_tier_list_unit"
-                ]
+                tiers[f"tier{unit['tier']}"]["total"] += unit["count_tier_list_unit"]
 
                 if (
-                    tiers[f"tier{unit['current_unit__tier']}"]["min"]["count"]
+                    tiers[f"tier{unit['tier']}"]["min"]["count"]
                     > unit["count_tier_list_unit"]
                 ):
-                    tiers[f"tier{unit['current_unit__tier']}"]["min"][
-                        "character_id"
-                    ] = unit["character_id"]
-                    tiers[f"tier{unit['current_unit__tier']}"]["min"]["count"] = unit[
+                    tiers[f"tier{unit['tier']}"]["min"]["character_id"] = unit[
+                        "unit_id"
+                    ]
+                    tiers[f"tier{unit['tier']}"]["min"]["count"] = unit[
                         "count_tier_list_unit"
                     ]
 
                 if (
-                    tiers[f"tier{unit['current_unit__tier']}"]["max"]["count"]
+                    tiers[f"tier{unit['tier']}"]["max"]["count"]
                     < unit["count_tier_list_unit"]
                 ):
-                    tiers[f"tier{unit['current_unit__tier']}"]["max"][
-                        "character_id"
-                    ] = unit["character_id"]
-                    tiers[f"tier{unit['current_unit__tier']}"]["max"]["count"] = unit[
+                    tiers[f"tier{unit['tier']}"]["max"]["character_id"] = unit[
+                        "unit_id"
+                    ]
+                    tiers[f"tier{unit['tier']}"]["max"]["count"] = unit[
                         "count_tier_list_unit"
                     ]
 
@@ -309,6 +281,7 @@ async def get_tier_list_unit(
 
 @router.get("/player/{puuid}/placement", response_model=PlayerPlacementResponse)
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_player_placement(
     request: Request,
     response: Response,
@@ -319,25 +292,28 @@ async def get_player_placement(
     stage: Optional[str] = None,
 ):
     try:
+        player = await TFTPlayer.get(puuid=puuid, region=region)
         player = (
-            await TFTPlayer.get(puuid=puuid, region=region)
-            .prefetch_related("participant")
-            .filter(
-                **generate_kwargs_structure(
-                    event, tournament, stage, prefix="participant__game__"
-                )
+            await TFTRollupPlayer.filter(
+                player=player,
+                **generate_kwargs_structure(event, tournament, stage),
             )
             .annotate(
-                min_placement=TMax("participant__placement"),
-                avg_placement=TAvg("participant__placement"),
-                max_placement=TMin("participant__placement"),
+                count_game_played=TSum("games"),
+                min_placement=TMax("placement_max"),
+                sum_placement=TSum("placement_sum"),
+                max_placement=TMin("placement_min"),
             )
+            .first()
         )
 
+        if player.count_game_played is None:
+            raise DoesNotExist
+
         data = PlayerPlacementResponse(
             data=PlayerPlacement(
                 min=player.min_placement,
-                avg=player.avg_placement,
+                avg=player.sum_placement / player.count_game_played,
                 max=player.max_placement,
             )
         )
@@ -352,6 +328,7 @@ async def get_player_placement(
 
 @router.get("/player/{puuid}/kill", response_model=PlayerKillResponse)
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_player_kill(
     request: Request,
     response: Response,
@@ -362,26 +339,28 @@ async def get_player_kill(
     stage: Optional[str] = None,
 ):
     try:
+        player = await TFTPlayer.get(puuid=puuid, region=region)
         player = (
-            await TFTPlayer.get(puuid=puuid, region=region)
-            .prefetch_related("participant")
-            .filter(
-                **generate_kwargs_structure(
-                    event, tournament, stage, prefix="participant__game__"
-                )
+            await TFTRollupPlayer.filter(
+                player=player,
+                **generate_kwargs_structure(event, tournament, stage),
             )
             .annotate(
-                min_players_eliminated=TMin("participant__players_eliminated"),
-                avg_players_eliminated=TAvg("participant__players_eliminated"),
-                max_players_eliminated=TMax("participant__players_eliminated"),
-                sum_players_eliminated=TSum("participant__players_eliminated"),
+                count_game_played=TSum("games"),
+                min_players_eliminated=TMin("players_eliminated_min"),
+                max_players_eliminated=TMax("players_eliminated_max"),
+                sum_players_eliminated=TSum("players_eliminated_sum"),
             )
+            .first()
         )
 
+        if player.count_game_played is None:
+            raise DoesNotExist
+
         data = PlayerKillResponse(
             data=PlayerKill(
                 min=player.min_players_eliminated,
-                avg=player.avg_players_eliminated,
+                avg=player.sum_players_eliminated / player.count_game_played,
                 max=player.max_players_eliminated,
                 sum=player.sum_players_eliminated,
             )
@@ -397,6 +376,7 @@ async def get_player_kill(
 
 @router.get("/player/{puuid}/death-round", response_model=DeathRoundResponse)
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_player_death_round(
     request: Request,
     response: Response,
@@ -407,25 +387,28 @@ async def get_player_death_round(
     stage: Optional[str] = None,
 ):
     try:
+        player = await TFTPlayer.get(puuid=puuid, region=region)
         player = (
-            await TFTPlayer.get(puuid=puuid, region=region)
-            .prefetch_related("participant")
-            .filter(
-                **generate_kwargs_structure(
-                    event, tournament, stage, prefix="participant__game__"
-                )
+            await TFTRollupPlayer.filter(
+                player=player,
+                **generate_kwargs_structure(event, tournament, stage),
             )
             .annotate(
-                min_last_round=TMin("participant__last_round"),
-                avg_last_round=TAvg("participant__last_round"),
-                max_last_round=TMax("participant__last_round"),
+                count_game_played=TSum("games"),
+                min_last_round=TMin("last_round_min"),
+                sum_last_round=TSum("last_round_sum"),
+                max_last_round=TMax("last_round_max"),
             )
+            .first()
         )
 
+        if player.count_game_played is None:
+            raise DoesNotExist
+
         data = DeathRoundResponse(
             data=DeathRound(
                 min=player.min_last_round,
-                avg=player.avg_last_round,
+                avg=player.sum_last_round / player.count_game_played,
                 max=player.max_last_round,
             )
         )
@@ -440,6 +423,7 @@ async def get_player_death_round(
 
 @router.get("/games/damage", response_model=GamesDamageResponse)
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_games_damage(
     request: Request,
     response: Response,
@@ -449,25 +433,23 @@ async def get_games_damage(
 ):
     try:
         players = (
-            await TFTPlayer.all()
-            .prefetch_related("participant")
-            .filter(
-                **generate_kwargs_structure(
-                    event, tournament, stage, prefix="participant__game__"
-                )
+            await TFTRollupPlayer.filter(
+                **generate_kwargs_structure(event, tournament, stage)
             )
-            .exclude(participant=None)
             .annotate(
-                min_total_damage_to_players=TMin(
-                    "participant__total_damage_to_players"
-                ),
-                max_total_damage_to_players=TMax(
-                    "participant__total_damage_to_players"
-                ),
-                sum_total_damage_to_players=TSum(
-                    "participant__total_damage_to_players"
-                ),
-                count_game_played=TCount("participant"),
+                min_total_damage_to_players=TMin("damage_min"),
+                max_total_damage_to_players=TMax("damage_max"),
+                sum_total_damage_to_players=TSum("damage_sum"),
+                count_game_played=TSum("games"),
+            )
+            .group_by("player_id", "player__puuid")
+            .order_by("player_id")
+            .values(
+                "player__puuid",
+                "min_total_damage_to_players",
+                "max_total_damage_to_players",
+                "sum_total_damage_to_players",
+                "count_game_played",
             )
         )
 
@@ -477,25 +459,25 @@ async def get_games_damage(
         total = 0
         nb_players = 0
         min = {
-            "puuid": players[0].puuid,
-            "damage": players[0].min_total_damage_to_players,
+            "puuid": players[0]["player__puuid"],
+            "damage": players[0]["min_total_damage_to_players"],
         }
         max = {
-            "puuid": players[0].puuid,
-            "damage": players[0].max_total_damage_to_players,
+            "puuid": players[0]["player__puuid"],
+            "damage": players[0]["max_total_damage_to_players"],
         }
 
         for player in players:
-            total += player.sum_total_damage_to_players
-            nb_players += player.count_game_played
+            total += player["sum_total_damage_to_players"]
+            nb_players += player["count_game_played"]
 
-            if min["damage"] > player.min_total_damage_to_players:
-                min["puuid"] = player.puuid
-                min["damage"] = player.min_total_damage_to_players
+            if min["damage"] > player["min_total_damage_to_players"]:
+                min["puuid"] = player["player__puuid"]
+                min["damage"] = player["min_total_damage_to_players"]
 
-            if max["damage"] < player.max_total_damage_to_players:
-                max["puuid"] = player.puuid
-                max["damage"] = player.max_total_damage_to_players
+            if max["damage"] < player["max_total_damage_to_players"]:
+                max["puuid"] = player["player__puuid"]
+                max["damage"] = player["max_total_damage_to_players"]
 
         data = GamesDamageResponse(
             data=GamesDamageRanks(
@@ -524,6 +506,7 @@ async def get_games_damage(
 
 @router.get("/games/time", response_model=GamesTimeResponse)
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_games_time(
     request: Request,
     response: Response,
@@ -533,24 +516,25 @@ async def get_games_time(
 ):
     try:
         game = (
-            await TFTGame.all()
-            .filter(**generate_kwargs_structure(event, tournament, stage))
+            await TFTRollupGame.filter(
+                **generate_kwargs_structure(event, tournament, stage)
+            )
             .annotate(
-                min_game_length=TMin("game_length"),
-                avg_game_length=TAvg("game_length"),
-                max_game_length=TMax("game_length"),
-                sum_game_length=TSum("game_length"),
+                count_games=TSum("games"),
+                min_game_length=TMin("game_length_min"),
+                max_game_length=TMax("game_length_max"),
+                sum_game_length=TSum("game_length_sum"),
             )
             .first()
         )
 
-        if game.game_length is None:
+        if game.count_games is None:
             raise DoesNotExist
 
         time_elapsed = {}
         for stat, game_time_elapsed in [
             ("min_time", game.min_game_length),
-            ("avg_time", game.avg_game_length),
+            ("avg_time", game.sum_game_length / game.count_games),
             ("max_time", game.max_game_length),
             ("sum_time", game.sum_game_length),
         ]:
@@ -583,6 +567,7 @@ async def get_games_time(
     response_model=GameDamageResponse,
 )
 @scope_required([Scope.read, Scope.write])
+@cache_response
 async def get_game_damage(request: Request, response: Response, match_id: str):
     try:
         game = await TFTGame.get(match_id=match_id).prefetch_related("participant")
@@ -0,0 +1,23 @@
+import datetime
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from les_stats.models.internal.job import JobStatus
+from les_stats.schemas.client_api.data import DataResponse
+from les_stats.schemas.riot.game import GameSaveIn_Pydantic
+
+
+class Job_Pydantic(BaseModel):
+    id: UUID
+    status: JobStatus
+    http_code: Optional[int]
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    matches: List[GameSaveIn_Pydantic]
+    results: List[Optional[DataResponse]]
+
+    class Config:
+        title = "Job"
+        orm_mode = True
@@ -11,6 +11,21 @@ class RiotHost(str, Enum):
     sea = "sea"
 
 
+def get_match_host(match_id: str) -> RiotHost:
+    """Regional routing host of a match, from the platform prefix of its id"""
+    if any(
+        routing.upper() in match_id.upper() for routing in ["BR", "LAN", "LAS", "NA"]
+    ):
+        return RiotHost.americas
+    if any(routing.upper() in match_id.upper() for routing in ["JP", "KR"]):
+        return RiotHost.asia
+    if any(
+        routing.upper() in match_id.upper() for routing in ["EUNE", "EUW", "RU", "TR"]
+    ):
+        return RiotHost.europe
+    return RiotHost.sea
+
+
 class RiotGame(str, Enum):
     valorant = "valorant"
     lol = "lol"
@@ -0,0 +1,63 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class TFTMatchMetadataIn(BaseModel):
+    data_version: str
+    match_id: str
+    participants: List[str]
+
+
+class TFTMatchCompanionIn(BaseModel):
+    content_ID: str
+    skin_ID: int
+    species: str
+
+
+class TFTMatchTraitIn(BaseModel):
+    name: str
+    num_units: int
+    style: int
+    tier_current: int
+    tier_total: int
+
+
+class TFTMatchUnitIn(BaseModel):
+    character_id: str
+    items: List[int]
+    itemNames: Optional[List[str]]
+    rarity: int
+    tier: int
+
+
+class TFTMatchParticipantIn(BaseModel):
+    augments: List[str]
+    companion: TFTMatchCompanionIn
+    gold_left: int
+    last_round: int
+    level: int
+    placement: int
+    players_eliminated: int
+    puuid: str
+    time_eliminated: float
+    total_damage_to_players: int
+    traits: List[TFTMatchTraitIn]
+    units: List[TFTMatchUnitIn]
+
+
+class TFTMatchInfoIn(BaseModel):
+    game_datetime: int
+    game_length: float
+    game_version: str
+    participants: List[TFTMatchParticipantIn]
+    queue_id: int
+    tft_game_type: str
+    tft_set_number: int
+
+
+class TFTMatchIn(BaseModel):
+    """Fields of a Riot TFT match payload read when saving a game"""
+
+    metadata: TFTMatchMetadataIn
+    info: TFTMatchInfoIn
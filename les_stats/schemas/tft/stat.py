@@ -42,9 +42,15 @@ class TierListItem(BaseModel):
     count: int
 
 
+class TierListItemRank(TierListItem):
+    pick_rate: float
+
+
 class TierListItemRanks(BaseModel):
-    min: TierListItem
-    max: TierListItem
+    min: TierListItemRank
+    max: TierListItemRank
+    total: int
+    ranks: List[TierListItemRank] = []
 
 
 class TierListItemResponse(BaseModel):
@@ -0,0 +1,293 @@
+import json
+import mmap
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import asyncclick as click
+from tortoise.transactions import in_transaction
+
+from les_stats.models.tft.game import TFTGame
+from les_stats.utils.cache import get_stat_cache
+from les_stats.utils.chunks import chunks
+from les_stats.utils.config import get_settings
+from les_stats.utils.db import close_db, init_db
+from les_stats.utils.rollup import rebuild_tft_groups
+from les_stats.utils.tft_bulk import TFTBulkSaver
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+class MatchArchive:
+    """
+    Raw Riot match payloads, zlib compressed and appended to segment files.
+    A new segment is started once the current one reaches segment_size.
+
+    The location (segment, offset, length) of every match is appended to an
+    index file, loaded in memory, records are read back through mmap. Records
+    are written before their index line so the index never points to missing
+    data, and appends are serialized with a lock file between processes.
+    An archive can be shared by threads, the app appends from executor threads.
+    """
+
+    def __init__(self, path: str, segment_size: int) -> None:
+        self.path = path
+        self.segment_size = segment_size
+        self.index_path = os.path.join(path, "index")
+        os.makedirs(path, exist_ok=True)
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        self._index_position = 0
+        self._index_lock = threading.RLock()
+        self._refresh_index()
+
+    def __contains__(self, match_id: str) -> bool:
+        self._refresh_index()
+        return match_id in self._index
+
+    def __len__(self) -> int:
+        self._refresh_index()
+        return len(self._index)
+
+    def match_ids(self) -> List[str]:
+        self._refresh_index()
+        return list(self._index)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f"segment-{segment:06d}.zz")
+
+    def _refresh_index(self) -> None:
+        """Load index lines appended since the last read (by this or another process)"""
+        with self._index_lock:
+            try:
+                with open(self.index_path, "rb") as f:
+                    f.seek(self._index_position)
+                    for line in f:
+                        # Ignore a line partially written by a writer still appending it
+                        if not line.endswith(b"\n"):
+                            break
+                        match_id, segment, offset, length = line.decode().split("\t")
+                        self._index[match_id] = (
+                            int(segment),
+                            int(offset),
+                            int(length),
+                        )
+                        self._index_position += len(line)
+            except FileNotFoundError:
+                pass
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        with self._index_lock, open(os.path.join(self.path, "lock"), "w") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, payloads: Iterable[Dict[str, Any]]) -> int:
+        """
+        :param payloads: Riot match payloads, matches already archived are skipped
+        :return: number of matches archived
+        """
+        with self._lock():
+            self._refresh_index()
+
+            segment = max((location[0] for location in self._index.values()), default=1)
+            try:
+                offset = os.path.getsize(self._segment_path(segment))
+            except FileNotFoundError:
+                offset = 0
+
+            lines = []
+            f = open(self._segment_path(segment), "ab")
+            try:
+                for payload in payloads:
+                    match_id = payload["metadata"]["match_id"]
+                    if match_id in self._index:
+                        continue
+
+                    if offset >= self.segment_size:
+                        f.flush()
+                        os.fsync(f.fileno())
+                        f.close()
+                        segment += 1
+                        offset = 0
+                        f = open(self._segment_path(segment), "ab")
+
+                    record = zlib.compress(
+                        json.dumps(payload, separators=(",", ":")).encode()
+                    )
+                    f.write(record)
+                    self._index[match_id] = (segment, offset, len(record))
+                    lines.append(f"{match_id}\t{segment}\t{offset}\t{len(record)}\n")
+                    offset += len(record)
+                f.flush()
+                os.fsync(f.fileno())
+            finally:
+                f.close()
+
+            if lines:
+                with open(self.index_path, "ab") as f:
+                    f.write("".join(lines).encode())
+                self._index_position = os.path.getsize(self.index_path)
+
+        return len(lines)
+
+    def get(self, match_id: str) -> Optional[Dict[str, Any]]:
+        for _, payload in self.iter([match_id]):
+            return payload
+        return None
+
+    def iter(
+        self, match_ids: Optional[Iterable[str]] = None
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Read matches segment by segment in file order, every archived match when match_ids is None
+
+        :return: (match_id, Riot match payload), unknown matches are skipped
+        """
+        self._refresh_index()
+        if match_ids is None:
+            match_ids = self._index
+        locations = sorted(
+            (self._index[match_id], match_id)
+            for match_id in set(match_ids)
+            if match_id in self._index
+        )
+
+        segment, mapping, f = None, None, None
+        try:
+            for (record_segment, offset, length), match_id in locations:
+                if record_segment != segment:
+                    if f is not None:
+                        mapping.close()
+                        f.close()
+                    segment = record_segment
+                    f = open(self._segment_path(segment), "rb")
+                    mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+                end = offset + length
+                yield match_id, json.loads(zlib.decompress(mapping[offset:end]))
+        finally:
+            if f is not None:
+                mapping.close()
+                f.close()
+
+
+@lru_cache()
+def _open_match_archive(path: str, segment_size: int) -> MatchArchive:
+    return MatchArchive(path, segment_size)
+
+
+def get_match_archive() -> Optional[MatchArchive]:
+    """
+    TFT match archive of the process, None when LES_STATS_TFT_ARCHIVE_PATH is not set.
+    It is opened once, later calls only read the index lines appended since.
+    """
+    settings = get_settings()
+    if not settings.TFT_ARCHIVE_PATH:
+        return None
+    return _open_match_archive(
+        settings.TFT_ARCHIVE_PATH, settings.TFT_ARCHIVE_SEGMENT_SIZE
+    )
+
+
+async def reprocess_tft_games(
+    archive: MatchArchive, match_ids: Optional[List[str]] = None
+) -> int:
+    """
+    Rebuild the TFT games tables of saved games from their archived payload,
+    games keep their event, tournament and stage
+
+    :param match_ids: games to reprocess, every archived game when None
+    :return: number of games reprocessed
+    """
+    archived = archive.match_ids()
+    if match_ids is not None:
+        archived = set(archived)
+        match_ids = [match_id for match_id in match_ids if match_id in archived]
+    else:
+        match_ids = archived
+
+    games = {}
+    for ids in chunks(match_ids):
+        for game in await TFTGame.filter(match_id__in=ids).prefetch_related(
+            "event", "tournament", "stage"
+        ):
+            games[game.match_id] = game
+
+    saver = TFTBulkSaver()
+    batch = []
+    for match_id, payload in archive.iter(games):
+        game = games[match_id]
+        batch.append(
+            (
+                payload,
+                {
+                    "event": game.event,
+                    "tournament": game.tournament,
+                    "stage": game.stage,
+                },
+            )
+        )
+        if len(batch) >= saver.batch_size:
+            await _reprocess_batch(saver, batch)
+            batch = []
+    if batch:
+        await _reprocess_batch(saver, batch)
+
+    # Rollups were incremented by the new rows, recompute them from the games
+    await rebuild_tft_groups(
+        {(g.event_id, g.tournament_id, g.stage_id) for g in games.values()}
+    )
+    get_stat_cache().clear()
+
+    return len(games)
+
+
+async def _reprocess_batch(
+    saver: TFTBulkSaver, batch: List[Tuple[Dict[str, Any], Dict[str, Any]]]
+) -> None:
+    async with in_transaction("default") as connection:
+        await TFTGame.filter(
+            match_id__in=[payload["metadata"]["match_id"] for payload, _ in batch]
+        ).using_db(connection).delete()
+        await saver.save_batch(batch)
+
+
+@click.group()
+async def archive() -> None:
+    await init_db()
+
+
+@archive.result_callback()
+async def process_result(result, **kwargs):
+    await close_db()
+
+
+@click.command()
+@click.argument("match_ids", nargs=-1)
+async def reprocess(match_ids: Tuple[str]) -> None:
+    """Rebuild saved TFT games from the archive, every archived game without MATCH_IDS"""
+    match_archive = get_match_archive()
+    if match_archive is None:
+        raise click.ClickException("LES_STATS_TFT_ARCHIVE_PATH is not set")
+
+    count = await reprocess_tft_games(match_archive, list(match_ids) or None)
+
+    click.secho(f"{count} TFT games reprocessed", fg="green")
+
+
+archive.add_command(reprocess)
+
+
+if __name__ == "__main__":
+    archive(_anyio_backend="asyncio")
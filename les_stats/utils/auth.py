@@ -1,14 +1,17 @@
 import hashlib
 import secrets
 import string
+import time
+from collections import OrderedDict
 from functools import wraps
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 import asyncclick as click
-from fastapi import Header, HTTPException
+from fastapi import Header, HTTPException, Request
 from tortoise.exceptions import DoesNotExist
+from tortoise.expressions import F
 
-from les_stats.models.internal.auth import Api, Scope
+from les_stats.models.internal.auth import Api, ApiKeyVersion, Scope
 from les_stats.utils.config import get_settings
 from les_stats.utils.db import close_db, init_db
 
@@ -23,21 +26,114 @@ def get_digest(x_api_key: str) -> str:
     return digest.hex()
 
 
+class ApiKeyCache:
+    """
+    Resolved API key scopes, keyed on a SHA-256 of the raw X-Api-Key header.
+
+    Avoid running PBKDF2 and a key lookup on every request, entries expire
+    after ttl seconds and the least recently used one is evicted when full.
+    The cache is emptied when the API key version it was filled at changes,
+    the version is read again once version_interval seconds passed.
+    """
+
+    def __init__(self, ttl: float, maxsize: int, version_interval: float) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version_interval = version_interval
+        self.version: Optional[int] = None
+        self._version_expire = 0.0
+        self._entries: Dict[bytes, Tuple[float, Scope]] = OrderedDict()
+
+    @staticmethod
+    def _key(x_api_key: str) -> bytes:
+        return hashlib.sha256(x_api_key.encode()).digest()
+
+    def get(self, x_api_key: str) -> Optional[Scope]:
+        key = self._key(x_api_key)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, x_api_key: str, scope: Scope) -> None:
+        key = self._key(x_api_key)
+        self._entries[key] = (time.monotonic() + self.ttl, scope)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def is_version_expired(self) -> bool:
+        return self.version is None or self._version_expire < time.monotonic()
+
+    def set_version(self, version: int) -> None:
+        if version != self.version:
+            self._entries.clear()
+        self.version = version
+        self._version_expire = time.monotonic() + self.version_interval
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.version = None
+
+
+api_key_cache = ApiKeyCache(
+    get_settings().API_KEY_CACHE_TTL,
+    get_settings().API_KEY_CACHE_SIZE,
+    get_settings().API_KEY_VERSION_INTERVAL,
+)
+
+
+async def get_api_key_version() -> int:
+    versions = await ApiKeyVersion.filter(id=1).values_list("version", flat=True)
+    return versions[0] if versions else 0
+
+
+async def bump_api_key_version() -> None:
+    """Invalidate the API key caches of every process (app and commands)"""
+    await ApiKeyVersion.get_or_create(id=1)
+    await ApiKeyVersion.filter(id=1).update(version=F("version") + 1)
+    api_key_cache.clear()
+
+
+async def get_api_key_scope(x_api_key: Optional[str]) -> Optional[Scope]:
+    if x_api_key is None:
+        return None
+
+    # Keys may have been created or deleted by the auth command in another process,
+    # their version is only read every API_KEY_VERSION_INTERVAL seconds
+    if api_key_cache.is_version_expired():
+        api_key_cache.set_version(await get_api_key_version())
+
+    scope = api_key_cache.get(x_api_key)
+    if scope is None:
+        try:
+            api_obj = await Api.get(api_key=get_digest(x_api_key))
+        except DoesNotExist:
+            return None
+        scope = api_obj.scope
+        api_key_cache.set(x_api_key, scope)
+
+    return scope
+
+
 async def is_api_key_scope_valid(api_key: str, scopes: List[Scope]) -> bool:
-    try:
-        api_obj = await Api.get(api_key=get_digest(api_key))
-    except DoesNotExist:
-        return False
-    return api_obj.scope in scopes
+    return await get_api_key_scope(api_key) in scopes
 
 
 def scope_required(scopes: List[Scope]):
     def wrapper(func):
         @wraps(func)
         async def wrap(request, *args, **kwargs):
-            if not await is_api_key_scope_valid(
-                request.headers.get("x-api-key"), scopes
-            ):
+            # Scope already resolved by verify_api_key for this request
+            scope = getattr(request.state, "api_key_scope", None)
+            if scope is None:
+                scope = await get_api_key_scope(request.headers.get("x-api-key"))
+
+            if scope not in scopes:
                 raise HTTPException(status_code=403, detail="X-Api-Key header invalid")
 
             return await func(request, *args, **kwargs)
@@ -47,12 +143,11 @@ def scope_required(scopes: List[Scope]):
     return wrapper
 
 
-async def verify_api_key(x_api_key: str = Header()):
-    if (
-        x_api_key is None
-        or await Api.filter(api_key=get_digest(x_api_key)).count() != 1
-    ):
+async def verify_api_key(request: Request, x_api_key: str = Header()):
+    scope = await get_api_key_scope(x_api_key)
+    if scope is None:
         raise HTTPException(status_code=403, detail="X-Api-Key header invalid")
+    request.state.api_key_scope = scope
     return x_api_key
 
 
@@ -88,6 +183,7 @@ async def create_api_key(name: str, scope: str) -> None:
         )
     )
     await Api.create(name=name, api_key=get_digest(api_key), scope=scope)
+    await bump_api_key_version()
 
     click.secho(api_key, fg="green")
 
@@ -113,6 +209,7 @@ async def delete_api_key(name: str) -> None:
     if not deleted_count:
         raise click.BadParameter("NAME not found")
     else:
+        await bump_api_key_version()
         click.secho("API key deleted", fg="green")
 
 
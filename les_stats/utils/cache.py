@@ -0,0 +1,358 @@
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache, wraps
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from les_stats.utils.config import get_settings
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+class MemoryCacheBackend:
+    """
+    Cached responses kept in process, the least recently used one is evicted when full.
+
+    Invalidations done by other processes (import, watch, archive and rollup
+    commands) are not seen, their games show up once the responses expire.
+    """
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[str, Tuple[float, str, bytes, List[str]]] = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._generations: Dict[str, int] = OrderedDict()
+        # Bumped on clear and when a tag generation is evicted
+        self._generation = 0
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1], entry[2]
+
+    def set(self, key: str, etag: str, body: bytes, tags: List[str]) -> None:
+        self._delete(key)
+        self._entries[key] = (time.monotonic() + self.ttl, etag, body, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._delete(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        self._delete(key)
+
+    def get_generation(self, tags: Iterable[str]) -> Any:
+        return self._generation, [self._generations.get(tag, 0) for tag in tags]
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            self._generations[tag] = self._generations.pop(tag, 0) + 1
+            for key in self._tags.pop(tag, set()):
+                self._delete(key)
+        while len(self._generations) > self.maxsize:
+            del self._generations[next(iter(self._generations))]
+            self._generation += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._generations.clear()
+        self._generation += 1
+
+    def _delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for tag in entry[3]:
+                keys = self._tags.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+
+
+class FileCacheBackend:
+    """
+    Cached responses stored in a local directory, shared by every process using it
+    (the app and the import command) so invalidations done by one are seen by the others.
+
+    Each tag is a directory holding one marker file per entry depending on it.
+    Tag generations are spread over 256 files, a tag shares its generation
+    with the other tags of its file.
+    """
+
+    def __init__(self, ttl: float, path: str) -> None:
+        self.ttl = ttl
+        self.entries_path = os.path.join(path, "entries")
+        self.tags_path = os.path.join(path, "tags")
+        self.generations_path = os.path.join(path, "generations")
+        os.makedirs(self.entries_path, exist_ok=True)
+        os.makedirs(self.tags_path, exist_ok=True)
+        os.makedirs(self.generations_path, exist_ok=True)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.entries_path, _digest(key))
+
+    def _generation_path(self, tag: Optional[str]) -> str:
+        name = "clear" if tag is None else _digest(tag)[:2]
+        return os.path.join(self.generations_path, name)
+
+    def _read_generation(self, tag: Optional[str]) -> str:
+        try:
+            with open(self._generation_path(tag), "r") as f:
+                return f.read()
+        except FileNotFoundError:
+            return ""
+
+    def _bump_generation(self, tag: Optional[str]) -> None:
+        path = self._generation_path(tag)
+        with open(f"{path}.tmp", "w") as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(f"{path}.tmp", path)
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        try:
+            with open(self._entry_path(key), "r") as f:
+                entry = json.loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry["expire"] < time.time():
+            self._delete(_digest(key))
+            return None
+        return entry["etag"], entry["body"].encode()
+
+    def set(self, key: str, etag: str, body: bytes, tags: List[str]) -> None:
+        entry_path = self._entry_path(key)
+        for tag in tags:
+            tag_path = os.path.join(self.tags_path, _digest(tag))
+            os.makedirs(tag_path, exist_ok=True)
+            open(os.path.join(tag_path, _digest(key)), "w").close()
+
+        with open(f"{entry_path}.tmp", "w") as f:
+            f.write(
+                json.dumps(
+                    {
+                        "expire": time.time() + self.ttl,
+                        "etag": etag,
+                        "body": body.decode(),
+                    }
+                )
+            )
+        os.replace(f"{entry_path}.tmp", entry_path)
+
+    def delete(self, key: str) -> None:
+        self._delete(_digest(key))
+
+    def get_generation(self, tags: Iterable[str]) -> Any:
+        return [self._read_generation(tag) for tag in [None, *tags]]
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        for tag in tags:
+            # Bumped before the markers are listed, an entry set after the
+            # listing is deleted by cache_response as the generation changed
+            self._bump_generation(tag)
+            tag_path = os.path.join(self.tags_path, _digest(tag))
+            try:
+                markers = os.listdir(tag_path)
+            except FileNotFoundError:
+                continue
+            for marker in markers:
+                self._delete(marker)
+            shutil.rmtree(tag_path, ignore_errors=True)
+
+    def clear(self) -> None:
+        self._bump_generation(None)
+        for path in [self.entries_path, self.tags_path]:
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path, exist_ok=True)
+
+    def _delete(self, digest: str) -> None:
+        try:
+            os.remove(os.path.join(self.entries_path, digest))
+        except FileNotFoundError:
+            pass
+
+
+class NoCacheBackend:
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        return None
+
+    def set(self, key: str, etag: str, body: bytes, tags: List[str]) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def get_generation(self, tags: Iterable[str]) -> Any:
+        return None
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+
+@lru_cache()
+def _open_cache_backend(backend: str, ttl: float, size: int, path: str):
+    if backend == "memory":
+        return MemoryCacheBackend(ttl, size)
+    if backend == "file":
+        return FileCacheBackend(ttl, path)
+    return NoCacheBackend()
+
+
+def get_stat_cache():
+    """
+    Stat responses cache of the process, opened on first use so importing this
+    module creates nothing. Settings changed by reload_settings open a new one.
+    """
+    settings = get_settings()
+    return _open_cache_backend(
+        settings.STAT_CACHE_BACKEND,
+        settings.STAT_CACHE_TTL,
+        settings.STAT_CACHE_SIZE,
+        settings.STAT_CACHE_PATH,
+    )
+
+
+def get_group_tags(
+    event: Optional[str], tournament: Optional[str], stage: Optional[str]
+) -> List[str]:
+    """Tags of a stat response filtered on event/tournament/stage (None when not filtered)"""
+    return [
+        f"group={json.dumps([event, tournament, stage])}",
+        f"event={json.dumps(event)}",
+        f"tournament={json.dumps(tournament)}",
+        f"stage={json.dumps(stage)}",
+    ]
+
+
+def invalidate_groups(
+    groups: Iterable[Tuple[Optional[str], Optional[str], Optional[str]]]
+) -> None:
+    """Invalidate stat responses including games of groups"""
+    tags = set()
+    for group in groups:
+        for event, tournament, stage in itertools.product(
+            *[{value, None} for value in group]
+        ):
+            tags.add(f"group={json.dumps([event, tournament, stage])}")
+    get_stat_cache().invalidate(tags)
+
+
+def invalidate_tag(name: str, value: str) -> None:
+    """
+    Invalidate stat responses which can include games tagged with an event,
+    tournament or stage, used when it is deleted with its games
+    """
+    get_stat_cache().invalidate([f"{name}={json.dumps(value)}", f"{name}=null"])
+
+
+def invalidate_matches(matches_id: Iterable[str]) -> None:
+    get_stat_cache().invalidate([f"match={match_id}" for match_id in matches_id])
+
+
+def _is_etag_matching(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+
+    for value in if_none_match.split(","):
+        value = value.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        if value in ["*", etag]:
+            return True
+
+    return False
+
+
+async def _serialize(request: Request, result: Any) -> Any:
+    """Serialize result like FastAPI does with the response_model of the route"""
+    route = request.scope.get("route")
+    if getattr(route, "response_field", None) is None:
+        return jsonable_encoder(result)
+
+    return await serialize_response(
+        field=route.secure_cloned_response_field,
+        response_content=result,
+        include=route.response_model_include,
+        exclude=route.response_model_exclude,
+        by_alias=route.response_model_by_alias,
+        exclude_unset=route.response_model_exclude_unset,
+        exclude_defaults=route.response_model_exclude_defaults,
+        exclude_none=route.response_model_exclude_none,
+    )
+
+
+def cache_response(func):
+    """
+    Cache stat responses, tagged by the event/tournament/stage and match they
+    depend on. Responses carry an ETag and If-None-Match is answered with a 304.
+
+    The returned Response skips FastAPI serialization, results are serialized
+    through the response_model of the route here instead.
+    """
+
+    @wraps(func)
+    async def wrap(request: Request, *args, **kwargs):
+        key = f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+        stat_cache = get_stat_cache()
+
+        entry = stat_cache.get(key)
+        if entry is None:
+            tags = get_group_tags(
+                kwargs.get("event"), kwargs.get("tournament"), kwargs.get("stage")
+            )
+            if kwargs.get("match_id") is not None:
+                tags.append(f"match={kwargs['match_id']}")
+            generation = stat_cache.get_generation(tags)
+
+            result = await func(request, *args, **kwargs)
+            if isinstance(result, Response):
+                return result
+
+            status_code = kwargs["response"].status_code or 200
+            body = JSONResponse(await _serialize(request, result)).body
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+            if status_code == 200:
+                stat_cache.set(key, etag, body, tags)
+                # Invalidated while the response was built, it can miss games
+                if stat_cache.get_generation(tags) != generation:
+                    stat_cache.delete(key)
+        else:
+            status_code = 200
+            etag, body = entry
+
+        headers = {"ETag": etag}
+        if status_code == 200 and _is_etag_matching(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type="application/json",
+            headers=headers,
+        )
+
+    return wrap
@@ -0,0 +1,10 @@
+from typing import Any, Iterator, Sequence
+
+# Keep IN (...) lists and multi-row inserts below the SQLite bound variables limit
+CHUNK_SIZE = 500
+
+
+def chunks(values: Sequence[Any], size: int = CHUNK_SIZE) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(values), size):
+        end = start + size
+        yield values[start:end]
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Any, List, Optional, Union
 
 import pytz
@@ -20,6 +21,43 @@ class Settings(BaseSettings):
     LOL_API_ROUTING: str = None
     BACKEND_CORS_ORIGINS: List[HttpUrl] = []
     SENTRY_DSN: Optional[HttpUrl] = ""
+    TFT_SAVE_BATCH_SIZE: int = 50
+    RIOT_FETCH_CONCURRENCY: int = 10
+    HTTP_CLIENT_HTTP2: bool = False
+    HTTP_CLIENT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    RIOT_APP_RATE_LIMIT: str = ""
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BUDGET_RATIO: float = 0.5
+    RETRY_BACKOFF_BASE: float = 0.5
+    RETRY_BACKOFF_MAX: float = 10.0
+    API_KEY_CACHE_TTL: float = 60.0
+    API_KEY_CACHE_SIZE: int = 1024
+    API_KEY_VERSION_INTERVAL: float = 5.0
+    STAT_CACHE_BACKEND: str = "memory"
+    STAT_CACHE_PATH: str = ".cache/stats"
+    STAT_CACHE_TTL: float = 3600.0
+    STAT_CACHE_SIZE: int = 4096
+    TFT_ARCHIVE_PATH: Optional[str] = None
+    TFT_ARCHIVE_SEGMENT_SIZE: int = 64 * 1024 * 1024
+    JOB_WORKERS: int = 2
+    JOB_POLL_INTERVAL: float = 5.0
+    SUMMONER_CACHE_TTL: float = 3600.0
+    RANK_CACHE_TTL: float = 60.0
+    NOT_FOUND_CACHE_TTL: float = 60.0
+    RESPONSE_CACHE_SIZE: int = 4096
+    KNOWN_MATCH_CAPACITY: int = 1000000
+    KNOWN_MATCH_ERROR_RATE: float = 0.01
+    TFT_WATCH_ROSTER_FILE: Optional[str] = None
+    TFT_WATCH_EVENT: Optional[str] = None
+    TFT_WATCH_TOURNAMENT: Optional[str] = None
+    TFT_WATCH_STAGE: Optional[str] = None
+    TFT_WATCH_MIN_INTERVAL: float = 15.0
+    TFT_WATCH_MAX_INTERVAL: float = 300.0
+    TFT_WATCH_ACTIVE_WINDOW: float = 3600.0
+    ROSTER_CACHE_PATH: str = ".cache/rosters"
 
     @validator("APP_PORT", "EXPORTER_PORT", pre=True, allow_reuse=True)
     def check_port_is_valid(cls, v: str) -> int:
@@ -41,6 +79,12 @@ class Settings(BaseSettings):
         else:
             return [] if len(v) == 0 else [i.strip() for i in v.split(",")]
 
+    @validator("STAT_CACHE_BACKEND", pre=True)
+    def check_stat_cache_backend_is_valid(cls, v: str) -> str:
+        if v not in ["memory", "file", "none"]:
+            raise ValueError("Invalid stat cache backend")
+        return v
+
     @validator("SENTRY_DSN", pre=True)
     def sentry_dsn_can_be_blank(cls, v: str) -> Optional[HttpUrl]:
         if len(v) == 0:
@@ -60,5 +104,15 @@ class Settings(BaseSettings):
             return cls.json_loads(raw_val)
 
 
+@lru_cache()
 def get_settings() -> Settings:
     return Settings()
+
+
+def reload_settings() -> Settings:
+    """
+    Drop cached settings and parse environment and .env file again
+    (objects created at import time, like the rate limiter, keep their value)
+    """
+    get_settings.cache_clear()
+    return get_settings()
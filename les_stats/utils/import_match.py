@@ -1,17 +1,40 @@
-from typing import Union
+import asyncio
+import calendar
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple, Union
 from urllib.parse import urlparse
 
 import asyncclick as click
 import httpx
 
-from les_stats.client_api.riot import GameSaveIn_Pydantic, RiotAPI, RiotGame
+from les_stats.client_api.registry import client_registry
+from les_stats.client_api.riot import (
+    MATCH_LIST_PAGE_SIZE,
+    GameSaveIn_Pydantic,
+    RiotAPI,
+    RiotGame,
+)
 from les_stats.models.internal.auth import Scope
 from les_stats.models.internal.event import Event
 from les_stats.models.internal.stage import Stage
 from les_stats.models.internal.tournament import Tournament
+from les_stats.models.tft.game import TFTGame
+from les_stats.models.tft.watermark import TFTImportWatermark
+from les_stats.schemas.client_api.data import DataResponse
 from les_stats.utils.auth import is_api_key_scope_valid
+from les_stats.utils.chunks import CHUNK_SIZE, chunks
 from les_stats.utils.config import get_settings
 from les_stats.utils.db import close_db, init_db
+from les_stats.utils.known_matches import tft_known_matches
+from les_stats.utils.match_files import iter_match_source_chunks, parse_match_sources
+from les_stats.utils.roster import load_roster, read_roster_file
+from les_stats.utils.tft_bulk import TFTBulkSaver
+
+# Number of match sources sent at once to a parsing process
+PARSE_CHUNK_SIZE = 20
 
 
 def validate_url(
@@ -26,6 +49,218 @@ def validate_url(
     return value
 
 
+async def get_game_tags(
+    event: Optional[str], tournament: Optional[str], stage: Optional[str]
+) -> Dict[str, Any]:
+    """
+    :return: game tags mapping event/tournament/stage to its object
+    """
+    game_tags = {}
+    for instance, value in [
+        (Event, event),
+        (Tournament, tournament),
+        (Stage, stage),
+    ]:
+        if value:
+            result = await instance.filter(name=value).first()
+            if result is None:
+                raise click.ClickException(
+                    f"{instance.__name__} {value} does not exist"
+                )
+            game_tags[instance.__name__.lower()] = result
+
+    return game_tags
+
+
+async def get_watermarks(
+    roster: List[str], region: str
+) -> Dict[str, TFTImportWatermark]:
+    watermarks = {}
+    for puuids in chunks(roster):
+        for watermark in await TFTImportWatermark.filter(
+            puuid__in=puuids, region=region
+        ):
+            watermarks[watermark.puuid] = watermark
+
+    return watermarks
+
+
+async def update_watermarks(
+    region: str,
+    roster: List[str],
+    datas: List[DataResponse],
+    watermarks: Dict[str, TFTImportWatermark],
+    skipped: Set[str] = frozenset(),
+) -> None:
+    """
+    Move watermarks of players to their latest match listed which is saved.
+    A listed match neither saved nor skipped failed (Riot API or database error),
+    watermarks stay before it so the next import lists it again.
+
+    :param skipped: listed matches not saved on purpose (not enough players)
+    """
+    matches_id = list(
+        {match_id for data in datas if data.data for match_id in data.data}
+    )
+    saved = {}
+    for match_ids in chunks(matches_id):
+        saved.update(
+            await TFTGame.filter(match_id__in=match_ids).values_list(
+                "match_id", "game_datetime"
+            )
+        )
+
+    created, updated = [], []
+    for player, data in zip(roster, datas):
+        listed = data.data or []
+        # Match lists start from the latest match, only matches older than the
+        # oldest one failed are passed
+        start = 0
+        for position, match_id in enumerate(listed):
+            if match_id not in saved and match_id not in skipped:
+                start = position + 1
+        player_saved = [
+            (saved[match_id], match_id)
+            for match_id in listed[start:]
+            if match_id in saved
+        ]
+        if not player_saved:
+            continue
+        game_datetime, match_id = max(player_saved)
+
+        watermark = watermarks.get(player)
+        if watermark is None:
+            created.append(
+                TFTImportWatermark(
+                    puuid=player,
+                    region=region,
+                    game_datetime=game_datetime,
+                    match_id=match_id,
+                )
+            )
+        elif game_datetime > watermark.game_datetime:
+            watermark.game_datetime = game_datetime
+            watermark.match_id = match_id
+            updated.append(watermark)
+
+    if created:
+        await TFTImportWatermark.bulk_create(
+            created, batch_size=CHUNK_SIZE, ignore_conflicts=True
+        )
+    if updated:
+        await TFTImportWatermark.bulk_update(
+            updated, ["game_datetime", "match_id"], batch_size=CHUNK_SIZE
+        )
+
+
+def report_matches_lists(roster: List[str], datas: List[DataResponse]) -> None:
+    """
+    Print match lists errors and how many fetches players sharing lobbies saved
+
+    :raise click.ClickException: every match list failed
+    """
+    errors = [data.error for data in datas if data.error is not None]
+    if len(errors) == len(datas):
+        raise click.ClickException(
+            f"{errors[0].status_code}: {errors[0].message['status']['message']}"
+        )
+    for player, data in zip(roster, datas):
+        if data.error is not None:
+            click.secho(
+                f"{player} {data.error.status_code}: {data.error.message['status']['message']}",
+                fg="yellow",
+            )
+
+    matches_id = [match_id for data in datas if data.data for match_id in data.data]
+    unique_matches_id = set(matches_id)
+    if len(roster) > 1:
+        click.secho(
+            f"{len(roster)} players, {len(unique_matches_id)} unique matches out of "
+            f"{len(matches_id)} ({len(matches_id) - len(unique_matches_id)} fetches saved)",
+            fg="green",
+        )
+
+
+async def iter_matches_pages(
+    riot_api: RiotAPI,
+    start_times: Dict[int, List[str]],
+    end_time: Optional[str],
+    limit: int,
+    excluded: Dict[str, str],
+    datas: Dict[str, DataResponse],
+) -> AsyncIterator[List[str]]:
+    """
+    Match ids of paginated match lists, yielded as soon as pages are listed
+    while the next pages of every player are still requested. Pages listed
+    while the caller was busy are merged.
+
+    :param start_times: start time -> players
+    :param excluded: player -> match id left out of their match list
+    :param datas: filled with the match list (or error) of every player
+    """
+    pages: asyncio.Queue = asyncio.Queue()
+
+    async def list_player(player: str, player_start_time: int) -> None:
+        matches_id = []
+        async for _, data in riot_api.iter_matches_list(
+            player, end_time, str(player_start_time), limit
+        ):
+            if data.error is not None:
+                datas[player] = data
+                return
+            page = [
+                match_id for match_id in data.data if match_id != excluded.get(player)
+            ]
+            matches_id.extend(page)
+            pages.put_nowait(page)
+        datas[player] = DataResponse(data=matches_id)
+
+    tasks = [
+        asyncio.ensure_future(list_player(player, player_start_time))
+        for player_start_time, group in start_times.items()
+        for player in group
+    ]
+    listing = asyncio.gather(*tasks)
+    listing.add_done_callback(lambda _: pages.put_nowait(None))
+    try:
+        done = False
+        while not done:
+            matches_id = []
+            page = await pages.get()
+            while page is not None:
+                matches_id.extend(page)
+                if pages.empty():
+                    break
+                page = pages.get_nowait()
+            done = page is None
+            if matches_id:
+                yield matches_id
+        await listing
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def parse_match_files(
+    path: str, workers: int
+) -> AsyncIterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Load and validate match payloads in a process pool, results are yielded in
+    source order while at most two chunks per worker are parsed ahead
+    """
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsing = deque()
+        for sources in iter_match_source_chunks(path, PARSE_CHUNK_SIZE):
+            parsing.append(loop.run_in_executor(pool, parse_match_sources, sources))
+            if len(parsing) >= workers * 2:
+                for result in await parsing.popleft():
+                    yield result
+        while parsing:
+            for result in await parsing.popleft():
+                yield result
+
+
 @click.group()
 async def cli() -> None:
     await init_db()
@@ -33,6 +268,7 @@ async def cli() -> None:
 
 @cli.result_callback()
 async def process_result(result, **kwargs):
+    await client_registry.aclose()
     await close_db()
 
 
@@ -56,7 +292,7 @@ async def process_result(result, **kwargs):
     "--puuids-http-json",
     default=None,
     callback=validate_url,
-    help="PUUID players json file used to match player",
+    help="PUUID players json used to match player, an http(s) URL (cached while unchanged) or a local file",
 )
 @click.option(
     "--min-player",
@@ -66,9 +302,9 @@ async def process_result(result, **kwargs):
 )
 @click.option(
     "--count-game",
-    type=click.IntRange(min=1, max=100),
+    type=click.IntRange(min=1),
     default=20,
-    help="Number of game to fetch on selected player",
+    help="Number of game to fetch on selected player, match lists are paginated above 100",
 )
 @click.option(
     "--end-time",
@@ -87,9 +323,23 @@ async def process_result(result, **kwargs):
     required=True,
     help="API Key used to import matches",
 )
-@click.argument("puuid")
+@click.option(
+    "--since-last",
+    is_flag=True,
+    default=False,
+    help="Only fetch matches of players started after the latest one imported (start-time is used for new players)",
+)
+@click.option(
+    "--roster-file",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Players to fetch matches of without PUUID, a json file like puuids-http-json or one PUUID per line",
+)
+@click.argument("puuids", metavar="[PUUID]...", nargs=-1)
 async def import_matches_tft(
-    puuid: str,
+    puuids: Tuple[str],
+    roster_file: str,
+    since_last: bool,
     api_key: str,
     start_time: click.DateTime,
     end_time: click.DateTime,
@@ -103,41 +353,61 @@ async def import_matches_tft(
     if not await is_api_key_scope_valid(api_key, [Scope.write]):
         raise click.BadParameter("Invalid API Key")
 
-    if event and await Event.filter(name=event).count() != 1:
-        raise click.ClickException(f"Event {event} does not exist")
-    if tournament and await Tournament.filter(name=tournament).count() != 1:
-        raise click.ClickException(f"Tournament {tournament} does not exist")
-    if stage and await Stage.filter(name=stage).count() != 1:
-        raise click.ClickException(f"Stage {stage} does not exist")
+    await get_game_tags(event, tournament, stage)
 
     players = []
 
     if puuids_http_json:
-        r = httpx.get(puuids_http_json, headers={"accept": "application/json"})
-        if not httpx.codes.is_success(r.status_code):
-            raise click.ClickException(f"puuids-http-json {r.status_code}: {r.text}")
-
-        players = [player["puuid"] for player in r.json()["players"]]
-
-    status_code, datas = await RiotAPI(RiotGame.tft).get_matches_list(
-        [puuid],
-        0,
-        end_time.strftime("%s") if end_time else None,
-        start_time.strftime("%s"),
-        count_game,
-    )
-    data = datas[0]
+        try:
+            players = await load_roster(puuids_http_json)
+        except httpx.HTTPStatusError as e:
+            raise click.ClickException(
+                f"puuids-http-json {e.response.status_code}: {e.response.text}"
+            )
+        except httpx.HTTPError as e:
+            raise click.ClickException(f"puuids-http-json {e}")
+        except (OSError, ValueError) as e:
+            raise click.BadParameter(str(e), param_hint="'--puuids-http-json'")
 
-    if not httpx.codes.is_success(status_code):
-        raise click.ClickException(
-            f"{data.error.status_code}: {data.error.message['status']['message']}"
+    # Without PUUID, match lists of the roster players are fetched
+    roster = list(puuids)
+    if not roster:
+        if roster_file:
+            roster.extend(read_roster_file(roster_file))
+        roster.extend(players)
+    roster = list(dict.fromkeys(roster))
+    if not roster:
+        raise click.UsageError(
+            "Missing argument 'PUUID', --roster-file or --puuids-http-json players"
         )
 
-    if len(data.data) == 0:
-        click.secho("No match found", fg="green")
-    else:
+    region = get_settings().TFT_API_ROUTING
+    watermarks = await get_watermarks(roster, region)
+
+    # Players are grouped by start time, match lists are still fetched concurrently
+    start_times = {}
+    for player in roster:
+        player_start_time = int(start_time.strftime("%s"))
+        if since_last and player in watermarks:
+            player_start_time = max(
+                player_start_time,
+                calendar.timegm(watermarks[player].game_datetime.utctimetuple()),
+            )
+        start_times.setdefault(player_start_time, []).append(player)
+
+    riot_api = RiotAPI(RiotGame.tft)
+    end = end_time.strftime("%s") if end_time else None
+    # The latest match imported is listed again, it starts at the watermark
+    excluded = {}
+    if since_last:
+        excluded = {
+            player: watermark.match_id for player, watermark in watermarks.items()
+        }
+    skipped = set()
+
+    async def save_matches(matches_id: List[str]) -> None:
         payloads = []
-        for match_id in data.data:
+        for match_id in matches_id:
             payloads.append(
                 GameSaveIn_Pydantic(
                     event=event,
@@ -147,14 +417,15 @@ async def import_matches_tft(
                 )
             )
 
-        status_code, matches = await RiotAPI(RiotGame.tft).save_tft_games(
+        # Failed matches are reported one by one and listed again on the next import
+        _, matches = await riot_api.save_tft_games(
             payloads, min_player=min_player, players=players
         )
-
-        if not httpx.codes.is_success(status_code) and status_code != 409:
-            raise click.ClickException(
-                f"{status_code}: {matches.json()['error']}", fg="yellow"
-            )
+        skipped.update(
+            match_id
+            for match_id, data in zip(matches_id, matches)
+            if data.error is not None and data.error.status_code == 200
+        )
 
         for data in matches:
             if data.error is None:
@@ -164,12 +435,198 @@ async def import_matches_tft(
                     f"{data.error.status_code}: {data.error.message}", fg="yellow"
                 )
 
+    if count_game <= MATCH_LIST_PAGE_SIZE:
+        datas = {}
+        for group, (_, group_datas) in zip(
+            start_times.values(),
+            await asyncio.gather(
+                *[
+                    riot_api.get_matches_list(
+                        group, 0, end, str(group_start_time), count_game
+                    )
+                    for group_start_time, group in start_times.items()
+                ]
+            ),
+        ):
+            datas.update(zip(group, group_datas))
+        datas = [datas[player] for player in roster]
+
+        for player, data in zip(roster, datas):
+            if data.data and player in excluded:
+                data.data = [
+                    match_id for match_id in data.data if match_id != excluded[player]
+                ]
+
+        report_matches_lists(roster, datas)
+        # Players of a lobby share its match, each match is fetched once
+        unique_matches_id = list(
+            dict.fromkeys(
+                match_id for data in datas if data.data for match_id in data.data
+            )
+        )
+        if unique_matches_id:
+            await save_matches(unique_matches_id)
+    else:
+        # Matches of a page are saved while the next pages are listed
+        datas = {}
+        unique_matches_id = set()
+        async for matches_id in iter_matches_pages(
+            riot_api, start_times, end, count_game, excluded, datas
+        ):
+            new = [
+                match_id
+                for match_id in dict.fromkeys(matches_id)
+                if match_id not in unique_matches_id
+            ]
+            unique_matches_id.update(new)
+            if new:
+                await save_matches(new)
+        datas = [datas[player] for player in roster]
+
+        report_matches_lists(roster, datas)
+
+    if len(unique_matches_id) == 0:
+        click.secho("No match found", fg="green")
+
+    await update_watermarks(region, roster, datas, watermarks, skipped)
+
+
+@click.command()
+@click.option(
+    "--api-key",
+    required=True,
+    help="API Key used to import matches",
+)
+@click.argument("puuids", metavar="[PUUID]...", nargs=-1)
+async def reset_import_watermarks(puuids: Tuple[str], api_key: str) -> None:
+    """Forget the latest match imported of players, every player without PUUID"""
+    if not await is_api_key_scope_valid(api_key, [Scope.write]):
+        raise click.BadParameter("Invalid API Key")
+
+    query = TFTImportWatermark.filter(region=get_settings().TFT_API_ROUTING)
+    if puuids:
+        query = query.filter(puuid__in=puuids)
+    count = await query.delete()
+
+    click.secho(f"{count} watermarks reset", fg="green")
+
+
+@click.command()
+@click.option(
+    "--event",
+    default=None,
+    help="Event name",
+)
+@click.option(
+    "--tournament",
+    default=None,
+    help="Tournament name",
+)
+@click.option(
+    "--stage",
+    default=None,
+    help="Stage name",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    help="Number of processes parsing and validating matches",
+)
+@click.option(
+    "--api-key",
+    required=True,
+    help="API Key used to import matches",
+)
+@click.argument("path", type=click.Path(exists=True))
+async def import_matches_tft_files(
+    path: str,
+    api_key: str,
+    workers: click.IntRange,
+    event: str,
+    tournament: str,
+    stage: str,
+) -> None:
+    """
+    Import Riot TFT match payloads from PATH, a directory of JSON or NDJSON
+    (one match per line) files, a tar archive of them or one file
+    """
+    if not await is_api_key_scope_valid(api_key, [Scope.write]):
+        raise click.BadParameter("Invalid API Key")
+
+    game_tags = await get_game_tags(event, tournament, stage)
+    riot_api = RiotAPI(RiotGame.tft)
+    saver = TFTBulkSaver()
+    counts = {"imported": 0, "saved": 0, "invalid": 0, "rows": 0}
+    start = time.perf_counter()
+    seen = set()
+    pending = []
+
+    async def save_pending() -> None:
+        known = await tft_known_matches.saved(
+            [g["metadata"]["match_id"] for g in pending]
+        )
+        games = [
+            (
+                GameSaveIn_Pydantic(
+                    event=event,
+                    tournament=tournament,
+                    stage=stage,
+                    id=g["metadata"]["match_id"],
+                ),
+                game_tags,
+                g,
+            )
+            for g in pending
+            if g["metadata"]["match_id"] not in known
+        ]
+        if games:
+            rows, saved = await riot_api.save_tft_payloads(saver, games)
+            counts["rows"] += rows
+            counts["imported"] += len(games) - len(saved)
+            known |= saved
+        counts["saved"] += len(known)
+
+        elapsed = time.perf_counter() - start
+        click.echo(
+            f"{counts['imported']} games imported, {counts['saved']} already saved, "
+            f"{counts['invalid']} invalid ({counts['rows'] / elapsed:.0f} rows/s)"
+        )
+
+    async for name, payload, error in parse_match_files(path, workers):
+        if error is not None:
+            counts["invalid"] += 1
+            click.secho(f"{name}: {error}", fg="yellow")
+            continue
+
+        match_id = payload["metadata"]["match_id"]
+        if match_id in seen:
+            counts["saved"] += 1
+            continue
+        seen.add(match_id)
+
+        pending.append(payload)
+        if len(pending) >= saver.batch_size:
+            await save_pending()
+            pending = []
+
+    if pending:
+        await save_pending()
+
+    click.secho(
+        f"{counts['imported']} games imported in {time.perf_counter() - start:.1f}s",
+        fg="green",
+    )
+
+
+cli.add_command(import_matches_tft_files)
 
 if (
     get_settings().TFT_API_KEY is not None
     and get_settings().TFT_API_ROUTING is not None
 ):
     cli.add_command(import_matches_tft)
+    cli.add_command(reset_import_watermarks)
 
 if __name__ == "__main__":
     cli(_anyio_backend="asyncio")
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from les_stats.client_api.riot import RiotAPI
+from les_stats.models.internal.job import Job, JobStatus
+from les_stats.schemas.client_api.data import DataResponse, ErrorResponse
+from les_stats.schemas.riot.game import GameSaveIn_Pydantic, RiotGame
+from les_stats.utils.chunks import chunks
+from les_stats.utils.config import get_settings
+
+logger = logging.getLogger("uvicorn")
+
+
+class JobQueue:
+    """
+    Game save jobs persisted in database and processed by a pool of async workers.
+
+    Results are saved after each batch of games so a job can be followed while
+    it runs, jobs left pending or running by a stopped app are resumed on start.
+    A job whose processing raises is marked failed.
+    """
+
+    def __init__(self) -> None:
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self, workers: int = None) -> None:
+        if self._workers:
+            return
+
+        # Only one app processes jobs, running ones were interrupted by a stop
+        await Job.filter(status=JobStatus.running).update(status=JobStatus.pending)
+
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._work())
+            for _ in range(workers or get_settings().JOB_WORKERS)
+        ]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, game: RiotGame, matches: List[GameSaveIn_Pydantic]) -> Job:
+        job = await Job.create(
+            game=game,
+            matches=jsonable_encoder(matches),
+            results=[None] * len(matches),
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+                if job is None:
+                    try:
+                        await asyncio.wait_for(
+                            self._wakeup.wait(), get_settings().JOB_POLL_INTERVAL
+                        )
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                try:
+                    await self.process(job)
+                except Exception:
+                    logger.exception(f"Job {job.id} failed")
+                    await Job.filter(id=job.id).update(status=JobStatus.failed)
+            except Exception:
+                # Keep processing jobs through database failures, a job left
+                # running is resumed on the next start
+                logger.exception("Job worker failed")
+                await asyncio.sleep(get_settings().JOB_POLL_INTERVAL)
+
+    async def _claim(self) -> Optional[Job]:
+        """Oldest pending job, marked as running"""
+        while True:
+            job = (
+                await Job.filter(status=JobStatus.pending)
+                .order_by("created_at")
+                .first()
+            )
+            if job is None:
+                return None
+
+            if await Job.filter(id=job.id, status=JobStatus.pending).update(
+                status=JobStatus.running
+            ):
+                job.status = JobStatus.running
+                return job
+
+    async def process(self, job: Job) -> None:
+        save_games = getattr(RiotAPI(job.game), f"save_{job.game.value}_games")
+        pending = [index for index, result in enumerate(job.results) if result is None]
+
+        for indexes in chunks(pending, get_settings().TFT_SAVE_BATCH_SIZE):
+            matches = [GameSaveIn_Pydantic(**job.matches[index]) for index in indexes]
+            try:
+                http_code, data = await save_games(matches)
+            except Exception as e:
+                logger.exception(f"Job {job.id} failed to save games")
+                http_code = 500
+                data = [
+                    DataResponse(
+                        error=ErrorResponse(
+                            status_code=500, message=f"Game {match.id} not saved: {e}"
+                        )
+                    )
+                    for match in matches
+                ]
+
+            for index, result in zip(indexes, data):
+                job.results[index] = jsonable_encoder(result)
+            if job.http_code is None:
+                job.http_code = http_code
+            elif job.http_code != http_code:
+                job.http_code = 207
+            await job.save(update_fields=["results", "http_code", "updated_at"])
+
+        job.status = JobStatus.done
+        await job.save(update_fields=["status", "updated_at"])
+
+
+job_queue = JobQueue()
@@ -0,0 +1,118 @@
+import hashlib
+import math
+from typing import Iterable, Iterator, Optional, Set
+
+from tortoise.models import Model
+
+from les_stats.models.tft.game import TFTGame
+from les_stats.utils.chunks import chunks
+from les_stats.utils.config import get_settings
+
+
+class BloomFilter:
+    """Set membership with false positives at error_rate once capacity keys are added"""
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        # Double hashing, every position is derived from two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class KnownMatchIndex:
+    """
+    Bloom filter of the match ids of saved games, built from the database on
+    first use and kept current by the saves of this process.
+
+    A match missing from the filter is not saved, the few ids found in it are
+    checked against the database, so incoming batches of mostly known or mostly
+    new matches cost at most one query per chunk of known ids. Deleted games
+    can't be removed from the filter, they only count as stale entries and the
+    filter is rebuilt once live and stale entries exceed its capacity.
+    """
+
+    def __init__(self, model: Model) -> None:
+        self.model = model
+        self._filter: Optional[BloomFilter] = None
+        self._count = 0
+
+    async def load(self) -> None:
+        match_ids = await self.model.all().values_list("match_id", flat=True)
+        settings = get_settings()
+        bloom = BloomFilter(
+            max(settings.KNOWN_MATCH_CAPACITY, len(match_ids) * 2),
+            settings.KNOWN_MATCH_ERROR_RATE,
+        )
+        for match_id in match_ids:
+            bloom.add(match_id)
+        self._filter = bloom
+        self._count = len(match_ids)
+
+    def add(self, match_ids: Iterable[str]) -> None:
+        if self._filter is None:
+            return
+        for match_id in match_ids:
+            self._filter.add(match_id)
+            self._count += 1
+
+    def discard(self, match_ids: Iterable[str]) -> None:
+        if self._filter is None:
+            return
+        self._count += sum(1 for _ in match_ids)
+
+    def clear(self) -> None:
+        self._filter = None
+        self._count = 0
+
+    async def saved(self, match_ids: Iterable[str]) -> Set[str]:
+        """
+        :return: match ids among match_ids of saved games
+        """
+        if self._filter is None or self._count > self._filter.capacity:
+            await self.load()
+
+        candidates = [
+            match_id for match_id in set(match_ids) if match_id in self._filter
+        ]
+        return await self.confirm(candidates)
+
+    async def confirm(self, match_ids: Iterable[str]) -> Set[str]:
+        """
+        Look match ids up in the database, saved ones missing from the filter
+        (saved by another process) are added to it
+
+        :return: match ids among match_ids of saved games
+        """
+        saved = set()
+        for ids in chunks(list(set(match_ids))):
+            saved.update(
+                await self.model.filter(match_id__in=ids).values_list(
+                    "match_id", flat=True
+                )
+            )
+        if self._filter is not None:
+            self.add(match_id for match_id in saved if match_id not in self._filter)
+
+        return saved
+
+
+tft_known_matches = KnownMatchIndex(TFTGame)
@@ -0,0 +1,83 @@
+import json
+import os
+import tarfile
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+
+from les_stats.schemas.riot.tft import TFTMatchIn
+
+# (source name, file path to read or raw content)
+MatchSource = Tuple[str, Union[str, bytes]]
+
+JSON_EXTENSIONS = (".json",)
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+
+def _iter_ndjson(name: str, content: bytes) -> Iterator[MatchSource]:
+    for line_number, line in enumerate(content.splitlines(), start=1):
+        if line.strip():
+            yield f"{name}:{line_number}", line
+
+
+def iter_match_sources(path: str) -> Iterator[MatchSource]:
+    """
+    Riot match payloads of a directory (walked recursively), a tar archive,
+    an NDJSON file (one payload per line) or a JSON file
+    """
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file in sorted(files):
+                yield from iter_match_sources(os.path.join(root, file))
+    elif tarfile.is_tarfile(path):
+        with tarfile.open(path) as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                if member.name.endswith(JSON_EXTENSIONS):
+                    yield f"{path}:{member.name}", tar.extractfile(member).read()
+                elif member.name.endswith(NDJSON_EXTENSIONS):
+                    yield from _iter_ndjson(
+                        f"{path}:{member.name}", tar.extractfile(member).read()
+                    )
+    elif path.endswith(NDJSON_EXTENSIONS):
+        with open(path, "rb") as f:
+            yield from _iter_ndjson(path, f.read())
+    elif path.endswith(JSON_EXTENSIONS):
+        yield path, path
+
+
+def iter_match_source_chunks(path: str, size: int) -> Iterator[List[MatchSource]]:
+    chunk = []
+    for source in iter_match_sources(path):
+        chunk.append(source)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def parse_match_sources(
+    sources: List[MatchSource],
+) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    Load and validate Riot TFT match payloads, run in worker processes
+
+    :return: (source name, payload, None) or (source name, None, error) of each source
+    """
+    results = []
+    for name, content in sources:
+        try:
+            if isinstance(content, str):
+                with open(content, "rb") as f:
+                    content = f.read()
+            payload = json.loads(content)
+            TFTMatchIn.parse_obj(payload)
+        except (OSError, ValueError, ValidationError) as e:
+            results.append((name, None, str(e).replace("\n", " ")))
+            continue
+        results.append((name, payload, None))
+
+    return results
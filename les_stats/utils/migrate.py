@@ -0,0 +1,161 @@
+from typing import Awaitable, Callable, List, Tuple
+
+import asyncclick as click
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from les_stats.models.internal.migration import Migration
+from les_stats.utils.db import close_db, init_db
+from les_stats.utils.rollup import TFT_ROLLUPS, lock_tft_rollups
+
+
+async def create_index(
+    connection: BaseDBAsyncClient,
+    name: str,
+    table: str,
+    columns: List[str],
+    unique: bool = False,
+) -> None:
+    if connection.capabilities.dialect == "mysql":
+        # MySQL has no CREATE INDEX IF NOT EXISTS, migrations are only applied once
+        quote, if_not_exists = "`", ""
+    else:
+        quote, if_not_exists = '"', "IF NOT EXISTS "
+
+    columns = ", ".join(f"{quote}{column}{quote}" for column in columns)
+    index = "UNIQUE INDEX" if unique else "INDEX"
+    await connection.execute_script(
+        f"CREATE {index} {if_not_exists}{quote}{name}{quote} "
+        f"ON {quote}{table}{quote} ({columns})"
+    )
+
+
+TFT_TABLES = [
+    "tftgame",
+    "tftparticipant",
+    "tftcurrenttrait",
+    "tftcurrentunit",
+    "unit_item",
+    "participant_augment",
+]
+
+
+async def analyze(connection: BaseDBAsyncClient, tables: List[str]) -> None:
+    """Refresh the statistics the query planner uses to pick indexes"""
+    if connection.capabilities.dialect == "mysql":
+        await connection.execute_script(
+            "ANALYZE TABLE " + ", ".join(f"`{table}`" for table in tables)
+        )
+    else:
+        for table in tables:
+            await connection.execute_script(f'ANALYZE "{table}"')
+
+
+async def migration_0001_tft_indexes(connection: BaseDBAsyncClient) -> None:
+    """Indexes of the stat filters, joins and group by of TFT tables"""
+    for name, table, columns in [
+        (
+            "idx_tftgame_event_tournament_stage",
+            "tftgame",
+            ["event_id", "tournament_id", "stage_id"],
+        ),
+        ("idx_tftgame_game_datetime", "tftgame", ["game_datetime"]),
+        ("idx_tftparticipant_game", "tftparticipant", ["game_id"]),
+        ("idx_tftparticipant_player_game", "tftparticipant", ["player_id", "game_id"]),
+        ("idx_tftcurrenttrait_participant", "tftcurrenttrait", ["participant_id"]),
+        ("idx_tftcurrentunit_participant", "tftcurrentunit", ["participant_id"]),
+        ("idx_unit_item_unit", "unit_item", ["tftcurrentunit_id", "tftitem_id"]),
+        (
+            "idx_participant_augment_participant",
+            "participant_augment",
+            ["tftparticipant_id", "tftaugment_id"],
+        ),
+    ]:
+        await create_index(connection, name, table, columns)
+    await analyze(connection, TFT_TABLES)
+
+
+async def migration_0002_tft_rollup_unique(connection: BaseDBAsyncClient) -> None:
+    """One rollup row per group and key, concurrent saves could duplicate them"""
+    # Rebuilding merges the duplicated rows
+    await lock_tft_rollups(connection)
+    for rollup in TFT_ROLLUPS:
+        await rollup.rebuild(None, connection)
+
+    for rollup in TFT_ROLLUPS:
+        table = rollup.model._meta.db_table
+        columns = [f"{field}_id" for field in ("event", "tournament", "stage")]
+        columns += list(rollup.keys)
+        # Only enforced for fully set groups, rows with a NULL group column
+        # never collide and rely on lock_tft_rollups
+        await create_index(connection, f"uidx_{table}_group", table, columns, True)
+
+
+# (version, name, migration), append new migrations with the next version
+MIGRATIONS: List[Tuple[int, str, Callable[[BaseDBAsyncClient], Awaitable[None]]]] = [
+    (1, "tft_indexes", migration_0001_tft_indexes),
+    (2, "tft_rollup_unique", migration_0002_tft_rollup_unique),
+]
+
+
+async def get_pending_migrations() -> List[Tuple[int, str]]:
+    applied = set(await Migration.all().values_list("version", flat=True))
+    return [
+        (version, name) for version, name, _ in MIGRATIONS if version not in applied
+    ]
+
+
+async def upgrade_db() -> List[Tuple[int, str]]:
+    """
+    Apply pending migrations, generate_schemas only creates missing tables
+    :return: applied migrations
+    """
+    pending = await get_pending_migrations()
+    for version, name, migration in MIGRATIONS:
+        if (version, name) in pending:
+            async with in_transaction("default") as connection:
+                await migration(connection)
+                await Migration.create(version=version, name=name, using_db=connection)
+
+    return pending
+
+
+@click.group()
+async def migrate() -> None:
+    await init_db()
+
+
+@migrate.result_callback()
+async def process_result(result, **kwargs):
+    await close_db()
+
+
+@click.command()
+async def upgrade() -> None:
+    applied = await upgrade_db()
+
+    if len(applied) == 0:
+        click.secho("Database is up to date", fg="green")
+    for version, name in applied:
+        click.secho(f"Applied {version:04d}_{name}", fg="green")
+
+
+@click.command()
+async def status() -> None:
+    applied = {migration.version: migration for migration in await Migration.all()}
+    for version, name, _ in MIGRATIONS:
+        if version in applied:
+            click.secho(
+                f"{version:04d}_{name} applied at {applied[version].applied_at}",
+                fg="green",
+            )
+        else:
+            click.secho(f"{version:04d}_{name} pending", fg="yellow")
+
+
+migrate.add_command(upgrade)
+migrate.add_command(status)
+
+
+if __name__ == "__main__":
+    migrate(_anyio_backend="asyncio")
@@ -0,0 +1,375 @@
+import operator
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import asyncclick as click
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.functions import Count, Max, Min, Sum
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
+
+from les_stats.models.tft.game import (
+    TFTCurrentTrait,
+    TFTCurrentUnit,
+    TFTGame,
+    TFTParticipant,
+)
+from les_stats.models.tft.rollup import (
+    TFTRollupGame,
+    TFTRollupItem,
+    TFTRollupLock,
+    TFTRollupPlayer,
+    TFTRollupTrait,
+    TFTRollupUnit,
+)
+from les_stats.utils.cache import get_stat_cache
+from les_stats.utils.chunks import CHUNK_SIZE, chunks
+from les_stats.utils.db import close_db, init_db
+
+# (event, tournament, stage) a game is tagged with, None when not tagged
+GroupKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+GROUP_FIELDS = ("event_id", "tournament_id", "stage_id")
+
+
+def get_group_filter(group: GroupKey) -> Dict[str, Optional[str]]:
+    return dict(zip(("event", "tournament", "stage"), group))
+
+
+class Rollup:
+    """
+    Aggregate of a source table maintained per (event, tournament, stage).
+
+    :param model: rollup model storing the aggregates
+    :param source: model the aggregates are computed from
+    :param prefix: path from source to TFTGame
+    :param keys: rollup field -> source field the rows are grouped by
+    :param aggregates: rollup field -> (function, source field, merge function)
+    :param filters: source filters applied on top of the group filters
+    :param excludes: source excludes
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        source: Model,
+        prefix: str,
+        keys: Dict[str, str],
+        aggregates: Dict[str, Tuple[Any, str, Callable[[Any, Any], Any]]],
+        filters: Dict[str, Any] = None,
+        excludes: Dict[str, Any] = None,
+    ) -> None:
+        self.model = model
+        self.source = source
+        self.prefix = prefix
+        self.keys = keys
+        self.aggregates = aggregates
+        self.filters = filters or {}
+        self.excludes = excludes or {}
+        # Rows whose count drops to 0 have no game left
+        self.count = next(
+            field for field, (function, _, _) in aggregates.items() if function is Count
+        )
+
+    def key(self, row: Dict[str, Any]) -> Tuple[Any, ...]:
+        return tuple(row[field] for field in GROUP_FIELDS + tuple(self.keys))
+
+    def obj_key(self, obj: Model) -> Tuple[Any, ...]:
+        return tuple(getattr(obj, field) for field in GROUP_FIELDS + tuple(self.keys))
+
+    async def aggregate(
+        self,
+        connection: BaseDBAsyncClient,
+        excluded: Optional[List[str]] = None,
+        key_filters: Optional[Dict[str, Any]] = None,
+        **filters: Any,
+    ) -> List[Dict[str, Any]]:
+        """
+        :param excluded: match ids of games left out
+        :param key_filters: source filters on the key fields
+        :param filters: TFTGame filters
+        :return: rollup rows of the games matching filters
+        """
+        group_fields = {
+            field: f"{self.prefix}{field}" if self.prefix else field
+            for field in GROUP_FIELDS
+        }
+        source_fields = {**group_fields, **self.keys}
+        query = (
+            self.source.filter(
+                **self.filters,
+                **(key_filters or {}),
+                **{f"{self.prefix}{k}": v for k, v in filters.items()},
+            )
+            .using_db(connection)
+            .annotate(
+                **{
+                    f"rollup_{field}": function(source_field)
+                    for field, (function, source_field, _) in self.aggregates.items()
+                }
+            )
+            .group_by(*source_fields.values())
+        )
+        if self.excludes:
+            query = query.exclude(**self.excludes)
+        if excluded:
+            query = query.exclude(**{f"{self.prefix}match_id__in": excluded})
+
+        return [
+            {
+                **{field: row[source] for field, source in source_fields.items()},
+                **{field: row[f"rollup_{field}"] for field in self.aggregates},
+            }
+            for row in await query.values(
+                *source_fields.values(),
+                *[f"rollup_{field}" for field in self.aggregates],
+            )
+        ]
+
+    async def get_existing(
+        self, rows: List[Dict[str, Any]], connection: BaseDBAsyncClient
+    ) -> Dict[Tuple[Any, ...], Model]:
+        """
+        :return: saved rollup rows of the groups of rows by key
+        """
+        existing = {}
+        for group in {tuple(row[field] for field in GROUP_FIELDS) for row in rows}:
+            for obj in await self.model.filter(**get_group_filter(group)).using_db(
+                connection
+            ):
+                existing[self.obj_key(obj)] = obj
+
+        return existing
+
+    async def rebuild(
+        self, groups: Optional[Iterable[GroupKey]], connection: BaseDBAsyncClient
+    ) -> None:
+        """Recompute the rollup rows of groups, every group when groups is None"""
+        if groups is None:
+            await self.model.all().using_db(connection).delete()
+            rows = await self.aggregate(connection)
+        else:
+            rows = []
+            for group in groups:
+                group_filter = get_group_filter(group)
+                await self.model.filter(**group_filter).using_db(connection).delete()
+                rows += await self.aggregate(connection, **group_filter)
+
+        await self.model.bulk_create(
+            [self.model(**row) for row in rows],
+            batch_size=CHUNK_SIZE,
+            using_db=connection,
+        )
+
+    async def add(self, match_ids: List[str], connection: BaseDBAsyncClient) -> None:
+        """Merge aggregates of newly saved games into the rollup rows"""
+        for ids in chunks(match_ids):
+            rows = await self.aggregate(connection, match_id__in=ids)
+            existing = await self.get_existing(rows, connection)
+
+            created = []
+            updated = []
+            for row in rows:
+                obj = existing.get(self.key(row))
+                if obj is None:
+                    created.append(self.model(**row))
+                    continue
+                for field, (_, _, merge) in self.aggregates.items():
+                    setattr(obj, field, merge(getattr(obj, field), row[field]))
+                updated.append(obj)
+
+            if created:
+                await self.model.bulk_create(
+                    created, batch_size=CHUNK_SIZE, using_db=connection
+                )
+            if updated:
+                await self.model.bulk_update(
+                    updated,
+                    fields=list(self.aggregates),
+                    batch_size=CHUNK_SIZE,
+                    using_db=connection,
+                )
+
+    async def remove(self, match_ids: List[str], connection: BaseDBAsyncClient) -> None:
+        """
+        Subtract aggregates of games about to be deleted or retagged from the
+        rollup rows. Min/max can't be decremented, they are recomputed from the
+        games left only on the rows a removed game held them.
+        """
+        for ids in chunks(match_ids):
+            rows = await self.aggregate(connection, match_id__in=ids)
+            existing = await self.get_existing(rows, connection)
+
+            deleted = []
+            updated = []
+            # group -> rows whose min/max are recomputed by key
+            stale: Dict[GroupKey, Dict[Tuple[Any, ...], Model]] = {}
+            for row in rows:
+                key = self.key(row)
+                obj = existing.get(key)
+                if obj is None:
+                    continue
+                if getattr(obj, self.count) <= row[self.count]:
+                    deleted.append(obj.pk)
+                    continue
+                for field, (_, _, merge) in self.aggregates.items():
+                    if merge is operator.add:
+                        setattr(obj, field, getattr(obj, field) - row[field])
+                    elif getattr(obj, field) == row[field]:
+                        stale.setdefault(key[: len(GROUP_FIELDS)], {})[key] = obj
+                updated.append(obj)
+
+            for group, objs in stale.items():
+                key_filters = {}
+                if self.keys:
+                    field, source = next(iter(self.keys.items()))
+                    key_filters[f"{source}__in"] = list(
+                        {getattr(obj, field) for obj in objs.values()}
+                    )
+                for row in await self.aggregate(
+                    connection,
+                    excluded=match_ids,
+                    key_filters=key_filters,
+                    **get_group_filter(group),
+                ):
+                    obj = objs.get(self.key(row))
+                    if obj is None:
+                        continue
+                    for field, (_, _, merge) in self.aggregates.items():
+                        if merge is not operator.add:
+                            setattr(obj, field, row[field])
+
+            if deleted:
+                await self.model.filter(id__in=deleted).using_db(connection).delete()
+            if updated:
+                await self.model.bulk_update(
+                    updated,
+                    fields=list(self.aggregates),
+                    batch_size=CHUNK_SIZE,
+                    using_db=connection,
+                )
+
+
+TFT_ROLLUPS = [
+    Rollup(
+        TFTRollupGame,
+        TFTGame,
+        "",
+        {},
+        {
+            "games": (Count, "match_id", operator.add),
+            "game_length_sum": (Sum, "game_length", operator.add),
+            "game_length_min": (Min, "game_length", min),
+            "game_length_max": (Max, "game_length", max),
+        },
+    ),
+    Rollup(
+        TFTRollupTrait,
+        TFTCurrentTrait,
+        "participant__game__",
+        {"trait_id": "trait_id", "tier": "tier_current"},
+        {"count": (Count, "id", operator.add)},
+        filters={"tier_current__gt": 0},
+    ),
+    Rollup(
+        TFTRollupUnit,
+        TFTCurrentUnit,
+        "participant__game__",
+        {"unit_id": "unit_id", "tier": "tier"},
+        {"count": (Count, "id", operator.add)},
+    ),
+    Rollup(
+        TFTRollupItem,
+        TFTCurrentUnit,
+        "participant__game__",
+        {"item_id": "items__id"},
+        {"count": (Count, "id", operator.add)},
+        excludes={"items__id": None},
+    ),
+    Rollup(
+        TFTRollupPlayer,
+        TFTParticipant,
+        "game__",
+        {"player_id": "player_id"},
+        {
+            "games": (Count, "id", operator.add),
+            "placement_sum": (Sum, "placement", operator.add),
+            "placement_min": (Min, "placement", min),
+            "placement_max": (Max, "placement", max),
+            "players_eliminated_sum": (Sum, "players_eliminated", operator.add),
+            "players_eliminated_min": (Min, "players_eliminated", min),
+            "players_eliminated_max": (Max, "players_eliminated", max),
+            "last_round_sum": (Sum, "last_round", operator.add),
+            "last_round_min": (Min, "last_round", min),
+            "last_round_max": (Max, "last_round", max),
+            "damage_sum": (Sum, "total_damage_to_players", operator.add),
+            "damage_min": (Min, "total_damage_to_players", min),
+            "damage_max": (Max, "total_damage_to_players", max),
+        },
+    ),
+]
+
+
+async def lock_tft_rollups(connection: BaseDBAsyncClient) -> None:
+    """
+    Lock the TFT rollups until the transaction of connection ends. Rollup rows
+    are read, merged and written back, concurrent updates would be lost. It is
+    also the only guard against duplicated rows of groups with a NULL column,
+    which the unique indexes do not catch.
+    """
+    lock = (
+        await TFTRollupLock.select_for_update().using_db(connection).get_or_none(id=1)
+    )
+    if lock is None:
+        # A concurrent first lock waits on the insert then fails on the primary key
+        await TFTRollupLock.create(id=1, using_db=connection)
+
+
+async def add_tft_games(match_ids: List[str], connection: BaseDBAsyncClient) -> None:
+    """Add newly saved games to the TFT rollups"""
+    await lock_tft_rollups(connection)
+    for rollup in TFT_ROLLUPS:
+        await rollup.add(match_ids, connection)
+
+
+async def remove_tft_games(match_ids: List[str], connection: BaseDBAsyncClient) -> None:
+    """Remove games about to be deleted or retagged from the TFT rollups"""
+    await lock_tft_rollups(connection)
+    for rollup in TFT_ROLLUPS:
+        await rollup.remove(match_ids, connection)
+
+
+async def rebuild_tft_groups(groups: Optional[Set[GroupKey]] = None) -> None:
+    """
+    Recompute the TFT rollups of groups from the games tables.
+
+    :param groups: (event, tournament, stage) to recompute, every group when None
+    """
+    async with in_transaction("default") as connection:
+        await lock_tft_rollups(connection)
+        for rollup in TFT_ROLLUPS:
+            await rollup.rebuild(groups, connection)
+
+
+@click.group()
+async def rollup() -> None:
+    await init_db()
+
+
+@rollup.result_callback()
+async def process_result(result, **kwargs):
+    await close_db()
+
+
+@click.command()
+async def rebuild() -> None:
+    await rebuild_tft_groups()
+    get_stat_cache().clear()
+
+    click.secho("TFT stat rollups rebuilt", fg="green")
+
+
+rollup.add_command(rebuild)
+
+
+if __name__ == "__main__":
+    rollup(_anyio_backend="asyncio")
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import asyncclick as click
+
+from les_stats.client_api.registry import client_registry
+from les_stats.utils.config import get_settings
+
+
+def parse_roster(content: str) -> List[str]:
+    """
+    :param content: json like {"players": [{"puuid": ...}]}
+    """
+    try:
+        return [player["puuid"] for player in json.loads(content)["players"]]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid roster")
+
+
+def read_roster_file(path: str) -> List[str]:
+    """
+    :param path: json file like puuids-http-json ({"players": [{"puuid": ...}]}) or one PUUID per line
+    """
+    with open(path, "r") as f:
+        content = f.read()
+
+    if path.endswith(".json"):
+        try:
+            return parse_roster(content)
+        except ValueError:
+            raise click.BadParameter(
+                "Invalid roster file", param_hint="'--roster-file'"
+            )
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+
+def _cache_path(url: str) -> str:
+    digest = hashlib.sha256(url.encode()).hexdigest()
+    return os.path.join(get_settings().ROSTER_CACHE_PATH, f"{digest}.json")
+
+
+def _read_cache(url: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_cache_path(url), "r") as f:
+            return json.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_cache(url: str, entry: Dict[str, Any]) -> None:
+    path = _cache_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.tmp", "w") as f:
+        f.write(json.dumps(entry))
+    os.replace(f"{path}.tmp", path)
+
+
+async def load_roster(source: str) -> List[str]:
+    """
+    PUUIDs of a roster json ({"players": [{"puuid": ...}]}) from an http(s) URL
+    or a local file (path or file:// URL).
+
+    Downloaded rosters are kept on disk with their ETag / Last-Modified, they
+    are only downloaded again when the server reports a change.
+
+    :raise httpx.HTTPError: roster could not be downloaded
+    :raise ValueError: invalid roster
+    """
+    url = urlparse(source)
+    if url.scheme not in ["http", "https"]:
+        with open(url.path if url.scheme == "file" else source, "r") as f:
+            return parse_roster(f.read())
+
+    cached = _read_cache(source)
+    headers = {"accept": "application/json"}
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    resp = await client_registry.get(url.netloc).get(source, headers=headers)
+    if resp.status_code == 304 and cached is not None:
+        return cached["players"]
+    resp.raise_for_status()
+
+    players = parse_roster(resp.text)
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    # A roster without validators can't be revalidated, it is downloaded every time
+    if etag or last_modified:
+        _write_cache(
+            source,
+            {"etag": etag, "last_modified": last_modified, "players": players},
+        )
+
+    return players
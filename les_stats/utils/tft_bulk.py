@@ -0,0 +1,418 @@
+import datetime
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pypika import Table
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.transactions import in_transaction
+
+from les_stats.metrics.tft.metrics import (
+    metric_tft_save_batch_processing_seconds,
+    metric_tft_save_rows_per_second,
+    metric_tft_save_rows_total,
+)
+from les_stats.models.tft.game import (
+    TFTAugment,
+    TFTCompanion,
+    TFTCurrentTrait,
+    TFTCurrentUnit,
+    TFTGame,
+    TFTItem,
+    TFTParticipant,
+    TFTPlayer,
+    TFTTrait,
+    TFTUnit,
+)
+from les_stats.schemas.riot.game import RiotHost, get_match_host
+from les_stats.utils.chunks import CHUNK_SIZE, chunks
+from les_stats.utils.config import get_settings
+from les_stats.utils.rollup import add_tft_games
+
+# Columns of a current unit, read back to find the id of each unit inserted
+UNIT_KEY = ["participant_id", "unit_id", "name", "chosen", "rarity", "tier"]
+
+# (model, key field) of TFT reference rows shared by every game
+DIMENSIONS = [
+    (TFTCompanion, "content_id"),
+    (TFTAugment, "name"),
+    (TFTTrait, "name"),
+    (TFTUnit, "character_id"),
+    (TFTItem, "id"),
+]
+
+
+class TFTDimensionCache:
+    """
+    Keys of the TFT reference rows known to exist (item names for items),
+    shared by every saver of the process and loaded from the database on first use.
+
+    Savers only add rows once the transaction writing them is committed, so a
+    rolled back batch never leaves a key the database does not have.
+    """
+
+    def __init__(self) -> None:
+        self._rows: Optional[Dict[Any, Dict[Any, Any]]] = None
+
+    async def get(self, connection: BaseDBAsyncClient) -> Dict[Any, Dict[Any, Any]]:
+        if self._rows is None:
+            # Concurrent first uses may both load the tables, the result is the same
+            rows = {}
+            for model, key in DIMENSIONS:
+                rows[model] = dict(
+                    await model.all()
+                    .using_db(connection)
+                    .values_list(key, "name" if model is TFTItem else key)
+                )
+            if self._rows is None:
+                self._rows = rows
+        return self._rows
+
+    def update(self, rows: Dict[Any, Dict[Any, Any]]) -> None:
+        if self._rows is None:
+            return
+        for model, values in rows.items():
+            self._rows[model].update(values)
+
+    def clear(self) -> None:
+        self._rows = None
+
+
+tft_dimension_cache = TFTDimensionCache()
+
+
+class TFTBulkSaver:
+    """
+    Persist Riot TFT match payloads batch by batch.
+
+    Players are resolved with one set-based lookup per batch, the other
+    dimension rows (companions, augments, traits, units, items) through the
+    process-wide dimension cache, fact rows are written with bulk inserts, and
+    every batch is written in one transaction.
+    """
+
+    def __init__(self, batch_size: int = None) -> None:
+        self.batch_size = batch_size or get_settings().TFT_SAVE_BATCH_SIZE
+
+    async def save_batch(
+        self, games: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]]
+    ) -> int:
+        """
+        :param games: list of (Riot match payload, game tags) where game tags maps event/tournament/stage to its object
+        :return: number of rows written
+        """
+        start = time.perf_counter()
+        written = {}
+
+        async with in_transaction("default") as connection:
+            written["tftgame"] = await self._create_games(games, connection)
+
+            participants = [
+                (g["metadata"]["match_id"], p)
+                for g, _ in games
+                for p in g["info"]["participants"]
+            ]
+
+            dimensions_written, dimensions = await self._resolve_dimensions(
+                participants, connection
+            )
+            written.update(dimensions_written)
+            players_id = await self._get_players_id(participants, connection)
+
+            await TFTParticipant.bulk_create(
+                [
+                    TFTParticipant(
+                        gold_left=p["gold_left"],
+                        last_round=p["last_round"],
+                        level=p["level"],
+                        placement=p["placement"],
+                        players_eliminated=p["players_eliminated"],
+                        time_eliminated=p["time_eliminated"],
+                        total_damage_to_players=p["total_damage_to_players"],
+                        companion_id=p["companion"]["content_ID"],
+                        player_id=players_id[(p["puuid"], get_match_host(match_id))],
+                        game_id=match_id,
+                    )
+                    for match_id, p in participants
+                ],
+                batch_size=CHUNK_SIZE,
+                using_db=connection,
+            )
+            written["tftparticipant"] = len(participants)
+
+            participants_id = {}
+            for match_ids in chunks([g["metadata"]["match_id"] for g, _ in games]):
+                for row in (
+                    await TFTParticipant.filter(game_id__in=match_ids)
+                    .using_db(connection)
+                    .values("id", "game_id", "player_id")
+                ):
+                    participants_id[(row["game_id"], row["player_id"])] = row["id"]
+
+            participant_rows = [
+                (
+                    participants_id[
+                        (
+                            match_id,
+                            players_id[(p["puuid"], get_match_host(match_id))],
+                        )
+                    ],
+                    p,
+                )
+                for match_id, p in participants
+            ]
+
+            written["participant_augment"] = await self._insert_through(
+                TFTParticipant,
+                "augments",
+                {
+                    (participant_id, a)
+                    for participant_id, p in participant_rows
+                    for a in p["augments"]
+                },
+                connection,
+            )
+
+            current_traits = [
+                TFTCurrentTrait(
+                    num_units=t["num_units"],
+                    style=t["style"],
+                    tier_current=t["tier_current"],
+                    tier_total=t["tier_total"],
+                    trait_id=t["name"],
+                    participant_id=participant_id,
+                )
+                for participant_id, p in participant_rows
+                for t in p["traits"]
+            ]
+            await TFTCurrentTrait.bulk_create(
+                current_traits, batch_size=CHUNK_SIZE, using_db=connection
+            )
+            written["tftcurrenttrait"] = len(current_traits)
+
+            units = [
+                (
+                    TFTCurrentUnit(
+                        chosen=u.get("chosen", ""),
+                        name=u["name"],
+                        rarity=u["rarity"],
+                        tier=u["tier"],
+                        unit_id=u["character_id"],
+                        participant_id=participant_id,
+                    ),
+                    u["items"],
+                )
+                for participant_id, p in participant_rows
+                for u in p["units"]
+            ]
+            current_units = [unit for unit, _ in units]
+            await TFTCurrentUnit.bulk_create(
+                current_units, batch_size=CHUNK_SIZE, using_db=connection
+            )
+            written["tftcurrentunit"] = len(current_units)
+
+            # bulk_create does not return generated ids, units are read back by
+            # their columns, identical units of a participant are interchangeable
+            units_id = {}
+            for ids in chunks(
+                [participant_id for participant_id, _ in participant_rows]
+            ):
+                for row in (
+                    await TFTCurrentUnit.filter(participant_id__in=ids)
+                    .using_db(connection)
+                    .values(*UNIT_KEY, "id")
+                ):
+                    units_id.setdefault(
+                        tuple(row[field] for field in UNIT_KEY), []
+                    ).append(row["id"])
+
+            unit_items = set()
+            for unit, items in units:
+                unit_id = units_id[
+                    tuple(getattr(unit, field) for field in UNIT_KEY)
+                ].pop()
+                unit_items.update((unit_id, item) for item in items)
+
+            written["unit_item"] = await self._insert_through(
+                TFTCurrentUnit, "items", unit_items, connection
+            )
+
+            await add_tft_games(
+                [g["metadata"]["match_id"] for g, _ in games], connection
+            )
+
+        tft_dimension_cache.update(dimensions)
+
+        elapsed = time.perf_counter() - start
+        rows = sum(written.values())
+        for table, count in written.items():
+            metric_tft_save_rows_total.labels(table).inc(count)
+        metric_tft_save_batch_processing_seconds.observe(elapsed)
+        if elapsed > 0:
+            metric_tft_save_rows_per_second.set(rows / elapsed)
+
+        return rows
+
+    async def _create_games(
+        self,
+        games: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]],
+        connection: BaseDBAsyncClient,
+    ) -> int:
+        objs = []
+        for g, game_tags in games:
+            metadata = g["metadata"]
+            info = g["info"]
+            objs.append(
+                TFTGame(
+                    match_id=metadata["match_id"],
+                    data_version=metadata["data_version"],
+                    game_datetime=datetime.datetime.utcfromtimestamp(
+                        int(str(info["game_datetime"])[:-3])
+                    ),
+                    game_length=info["game_length"],
+                    game_version=info["game_version"],
+                    queue_id=info["queue_id"],
+                    tft_set_number=info["tft_set_number"],
+                    tft_game_type=info["tft_game_type"],
+                    tft_set_core_name=info.get("tft_set_core_name", ""),
+                    event=game_tags.get("event"),
+                    tournament=game_tags.get("tournament"),
+                    stage=game_tags.get("stage"),
+                )
+            )
+        await TFTGame.bulk_create(objs, batch_size=CHUNK_SIZE, using_db=connection)
+
+        return len(objs)
+
+    async def _resolve_dimensions(
+        self,
+        participants: List[Tuple[str, Dict[str, Any]]],
+        connection: BaseDBAsyncClient,
+    ) -> Tuple[Dict[str, int], Dict[Any, Dict[Any, Any]]]:
+        """
+        Insert the reference rows missing from the dimension cache and update
+        changed item names
+
+        :return: rows written per table, rows to add to the cache once committed
+        """
+        companions = {}
+        augments = set()
+        traits = set()
+        units = set()
+        items = {}
+        for _, p in participants:
+            companions.setdefault(
+                p["companion"]["content_ID"],
+                (p["companion"]["skin_ID"], p["companion"]["species"]),
+            )
+            augments.update(p["augments"])
+            traits.update(t["name"] for t in p["traits"])
+            for u in p["units"]:
+                units.add(u["character_id"])
+                for i in range(0, len(u["items"])):
+                    if "itemNames" in u:
+                        items[u["items"][i]] = u["itemNames"][i]
+                    else:
+                        items.setdefault(u["items"][i], None)
+
+        known = await tft_dimension_cache.get(connection)
+        written = {}
+        rows = {}
+        for model, values, build in [
+            (
+                TFTCompanion,
+                companions,
+                lambda k: TFTCompanion(
+                    content_id=k, skin_id=companions[k][0], species=companions[k][1]
+                ),
+            ),
+            (TFTAugment, augments, lambda k: TFTAugment(name=k)),
+            (TFTTrait, traits, lambda k: TFTTrait(name=k)),
+            (TFTUnit, units, lambda k: TFTUnit(character_id=k)),
+            (TFTItem, items, lambda k: TFTItem(id=k, name=items[k] or "")),
+        ]:
+            missing = [k for k in values if k not in known[model]]
+            if missing:
+                # Another process may have inserted them since the cache was loaded
+                await model.bulk_create(
+                    [build(k) for k in missing],
+                    batch_size=CHUNK_SIZE,
+                    ignore_conflicts=True,
+                    using_db=connection,
+                )
+            written[model._meta.db_table] = len(missing)
+            rows[model] = {
+                k: (items[k] or "") if model is TFTItem else k for k in missing
+            }
+
+        for item_id, name in items.items():
+            if (
+                item_id in known[TFTItem]
+                and name is not None
+                and known[TFTItem][item_id] != name
+            ):
+                await TFTItem.filter(id=item_id).using_db(connection).update(name=name)
+                rows[TFTItem][item_id] = name
+
+        return written, rows
+
+    async def _get_players_id(
+        self,
+        participants: List[Tuple[str, Dict[str, Any]]],
+        connection: BaseDBAsyncClient,
+    ) -> Dict[Tuple[str, RiotHost], int]:
+        players = {
+            (p["puuid"], get_match_host(match_id)) for match_id, p in participants
+        }
+
+        players_id = await self._fetch_players_id(players, connection)
+        missing = [
+            TFTPlayer(puuid=puuid, region=region)
+            for puuid, region in players
+            if (puuid, region) not in players_id
+        ]
+        if missing:
+            await TFTPlayer.bulk_create(
+                missing,
+                batch_size=CHUNK_SIZE,
+                ignore_conflicts=True,
+                using_db=connection,
+            )
+            players_id = await self._fetch_players_id(players, connection)
+
+        return players_id
+
+    async def _fetch_players_id(
+        self, players: Iterable[Tuple[str, RiotHost]], connection: BaseDBAsyncClient
+    ) -> Dict[Tuple[str, RiotHost], int]:
+        players_id = {}
+        for puuids in chunks(list({puuid for puuid, _ in players})):
+            for row in (
+                await TFTPlayer.filter(puuid__in=puuids)
+                .using_db(connection)
+                .values("id", "puuid", "region")
+            ):
+                players_id[(row["puuid"], RiotHost(row["region"]))] = row["id"]
+
+        return players_id
+
+    async def _insert_through(
+        self,
+        model: Any,
+        field_name: str,
+        rows: Iterable[Tuple[Any, Any]],
+        connection: BaseDBAsyncClient,
+    ) -> int:
+        field = model._meta.fields_map[field_name]
+        through_table = Table(field.through)
+        rows = list(rows)
+
+        for chunk in chunks(rows):
+            query = connection.query_class.into(through_table).columns(
+                through_table[field.backward_key],
+                through_table[field.forward_key],
+            )
+            for row in chunk:
+                query = query.insert(*row)
+            await connection.execute_query(str(query))
+
+        return len(rows)
@@ -0,0 +1,385 @@
+import asyncio
+import calendar
+import logging
+import time
+from typing import List, Optional, Set, Tuple
+
+import asyncclick as click
+import httpx
+
+from les_stats.client_api.ratelimit import rate_limiter
+from les_stats.client_api.registry import client_registry
+from les_stats.client_api.riot import GameSaveIn_Pydantic, RiotAPI, RiotGame
+from les_stats.metrics.tft.metrics import (
+    metric_tft_watch_backlog,
+    metric_tft_watch_cycle_seconds,
+    metric_tft_watch_interval_seconds,
+    metric_tft_watch_saved_total,
+)
+from les_stats.models.internal.auth import Scope
+from les_stats.utils.auth import is_api_key_scope_valid
+from les_stats.utils.config import get_settings
+from les_stats.utils.db import close_db, init_db
+from les_stats.utils.import_match import (
+    get_game_tags,
+    get_watermarks,
+    update_watermarks,
+)
+from les_stats.utils.known_matches import tft_known_matches
+from les_stats.utils.roster import read_roster_file
+
+logger = logging.getLogger("uvicorn")
+
+# Share of the application rate limit the match lists of a cycle may use,
+# the rest is left to the API and imports
+WATCH_RATE_SHARE = 0.5
+
+
+class TFTMatchWatcher:
+    """
+    Poll the match lists of a roster and save their new TFT matches.
+
+    Match lists start at the import watermark of each player so a cycle only
+    lists recent matches, matches which failed to save are listed again until
+    they are saved. Cycles run every min_interval while matches come in
+    (the next round is likely in progress until active_window after the last
+    one found), then back off exponentially up to max_interval.
+    """
+
+    def __init__(
+        self,
+        roster: List[str],
+        start_time: int,
+        event: Optional[str] = None,
+        tournament: Optional[str] = None,
+        stage: Optional[str] = None,
+        min_player: int = 1,
+        min_interval: float = None,
+        max_interval: float = None,
+        active_window: float = None,
+    ) -> None:
+        settings = get_settings()
+        self.roster = list(dict.fromkeys(roster))
+        self.start_time = start_time
+        self.event = event
+        self.tournament = tournament
+        self.stage = stage
+        self.min_player = min_player
+        self.min_interval = min_interval or settings.TFT_WATCH_MIN_INTERVAL
+        self.max_interval = max_interval or settings.TFT_WATCH_MAX_INTERVAL
+        self.active_window = (
+            settings.TFT_WATCH_ACTIVE_WINDOW if active_window is None else active_window
+        )
+        self.region = settings.TFT_API_ROUTING
+        self.interval = self.min_interval
+        self._last_activity: Optional[float] = None
+        # Listed matches not to save (not enough roster players), they are not fetched again
+        self._skipped: Set[str] = set()
+
+    async def poll(self) -> Tuple[int, int]:
+        """
+        List the matches of the roster and save the new ones
+
+        :return: number of matches saved, number of new matches left to save
+        """
+        start = time.perf_counter()
+        riot_api = RiotAPI(RiotGame.tft)
+        watermarks = await get_watermarks(self.roster, self.region)
+
+        start_times = {}
+        for player in self.roster:
+            player_start_time = self.start_time
+            if player in watermarks:
+                player_start_time = max(
+                    player_start_time,
+                    calendar.timegm(watermarks[player].game_datetime.utctimetuple()),
+                )
+            start_times.setdefault(player_start_time, []).append(player)
+
+        # Every page down to the watermark, a backlog bigger than a page is not skipped
+        datas = {}
+        for group, (_, group_datas) in zip(
+            start_times.values(),
+            await asyncio.gather(
+                *[
+                    riot_api.get_all_matches_list(group, None, str(group_start_time))
+                    for group_start_time, group in start_times.items()
+                ]
+            ),
+        ):
+            datas.update(zip(group, group_datas))
+        datas = [datas[player] for player in self.roster]
+
+        listed = set()
+        for player, data in zip(self.roster, datas):
+            if data.error is not None:
+                logger.warning(
+                    f"TFT watch {player} {data.error.status_code}: {data.error.message}"
+                )
+                continue
+            # The latest match imported is listed again, it starts at the watermark
+            listed.update(
+                match_id
+                for match_id in data.data
+                if player not in watermarks or match_id != watermarks[player].match_id
+            )
+
+        self._skipped &= listed
+        listed -= self._skipped
+        new = sorted(listed - await tft_known_matches.saved(listed))
+
+        saved = 0
+        backlog = 0
+        if new:
+            _, results = await riot_api.save_tft_games(
+                [
+                    GameSaveIn_Pydantic(
+                        event=self.event,
+                        tournament=self.tournament,
+                        stage=self.stage,
+                        id=match_id,
+                    )
+                    for match_id in new
+                ],
+                min_player=self.min_player,
+                # Matches are listed from a roster player, one is always in game
+                players=self.roster if self.min_player > 1 else [],
+            )
+            for match_id, result in zip(new, results):
+                if result.error is None:
+                    saved += 1
+                elif result.error.status_code == 200:
+                    self._skipped.add(match_id)
+                elif result.error.status_code != 409:
+                    backlog += 1
+                    logger.warning(
+                        f"TFT watch {match_id} {result.error.status_code}: {result.error.message}"
+                    )
+
+        # Watermarks stay before the matches left to save, they are listed and retried next cycle
+        await update_watermarks(
+            self.region, self.roster, datas, watermarks, self._skipped
+        )
+
+        metric_tft_watch_saved_total.inc(saved)
+        metric_tft_watch_backlog.set(backlog)
+        metric_tft_watch_cycle_seconds.observe(time.perf_counter() - start)
+
+        return saved, backlog
+
+    def next_interval(self, saved: int, backlog: int) -> float:
+        """
+        :return: seconds to wait before the next cycle
+        """
+        now = time.monotonic()
+        if saved or backlog:
+            self._last_activity = now
+
+        if (
+            self._last_activity is not None
+            and now - self._last_activity < self.active_window
+        ):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+
+        host = httpx.URL(RiotAPI(RiotGame.tft).build_url(self.region, "/")).host
+        interval = max(
+            self.interval,
+            rate_limiter.interval(host, len(self.roster)) / WATCH_RATE_SHARE,
+        )
+        metric_tft_watch_interval_seconds.set(interval)
+
+        return interval
+
+    async def cycle(self) -> Tuple[int, int]:
+        """
+        Poll, a failed cycle is logged and counts as idle
+
+        :return: number of matches saved, number of new matches left to save
+        """
+        try:
+            return await self.poll()
+        except Exception:
+            # Keep watching through database or network failures
+            logger.exception("TFT watch cycle failed")
+            return 0, 0
+
+    async def run(self) -> None:
+        while True:
+            saved, backlog = await self.cycle()
+            await asyncio.sleep(self.next_interval(saved, backlog))
+
+
+class TFTWatchService:
+    """TFT match watcher running in the app, set up by LES_STATS_TFT_WATCH_* settings"""
+
+    def __init__(self) -> None:
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        settings = get_settings()
+        if self._task is not None or not settings.TFT_WATCH_ROSTER_FILE:
+            return
+        if settings.TFT_API_KEY is None or settings.TFT_API_ROUTING is None:
+            logger.warning("TFT watch disabled, TFT API key and routing are not set")
+            return
+
+        try:
+            roster = read_roster_file(settings.TFT_WATCH_ROSTER_FILE)
+            await get_game_tags(
+                settings.TFT_WATCH_EVENT,
+                settings.TFT_WATCH_TOURNAMENT,
+                settings.TFT_WATCH_STAGE,
+            )
+        except (OSError, click.ClickException) as e:
+            logger.error(f"TFT watch disabled, {e}")
+            return
+
+        watcher = TFTMatchWatcher(
+            roster,
+            int(time.time()),
+            event=settings.TFT_WATCH_EVENT,
+            tournament=settings.TFT_WATCH_TOURNAMENT,
+            stage=settings.TFT_WATCH_STAGE,
+        )
+        self._task = asyncio.create_task(watcher.run())
+        logger.info(f"TFT watch running on {len(watcher.roster)} players")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+tft_watch_service = TFTWatchService()
+
+
+@click.group()
+async def watch() -> None:
+    await init_db()
+
+
+@watch.result_callback()
+async def process_result(result, **kwargs):
+    await client_registry.aclose()
+    await close_db()
+
+
+@click.command()
+@click.option(
+    "--event",
+    default=None,
+    help="Event name",
+)
+@click.option(
+    "--tournament",
+    default=None,
+    help="Tournament name",
+)
+@click.option(
+    "--stage",
+    default=None,
+    help="Stage name",
+)
+@click.option(
+    "--min-player",
+    type=click.IntRange(min=1, max=8),
+    default=1,
+    help="Minimum number of roster players that must be in game",
+)
+@click.option(
+    "--start-time",
+    type=click.DateTime(formats=["%Y-%m-%d %H:%M:%S"]),
+    default=None,
+    help="Game must start after start-time (default now), players continue from the latest match imported",
+)
+@click.option(
+    "--min-interval",
+    type=click.FloatRange(min=1),
+    default=None,
+    help="Seconds between cycles while matches come in (default LES_STATS_TFT_WATCH_MIN_INTERVAL)",
+)
+@click.option(
+    "--max-interval",
+    type=click.FloatRange(min=1),
+    default=None,
+    help="Maximum seconds between cycles when idle (default LES_STATS_TFT_WATCH_MAX_INTERVAL)",
+)
+@click.option(
+    "--once",
+    is_flag=True,
+    default=False,
+    help="Run one cycle and exit",
+)
+@click.option(
+    "--api-key",
+    required=True,
+    help="API Key used to import matches",
+)
+@click.option(
+    "--roster-file",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Players to watch without PUUID, a json file like puuids-http-json or one PUUID per line",
+)
+@click.argument("puuids", metavar="[PUUID]...", nargs=-1)
+async def tft(
+    puuids: Tuple[str],
+    roster_file: str,
+    api_key: str,
+    once: bool,
+    max_interval: float,
+    min_interval: float,
+    start_time: click.DateTime,
+    min_player: click.IntRange,
+    event: str,
+    tournament: str,
+    stage: str,
+) -> None:
+    """Save new TFT matches of players as they are played"""
+    settings = get_settings()
+    if settings.TFT_API_KEY is None or settings.TFT_API_ROUTING is None:
+        raise click.ClickException(
+            "LES_STATS_TFT_API_KEY and LES_STATS_TFT_API_ROUTING must be set"
+        )
+
+    if not await is_api_key_scope_valid(api_key, [Scope.write]):
+        raise click.BadParameter("Invalid API Key")
+
+    await get_game_tags(event, tournament, stage)
+
+    roster = list(puuids)
+    if not roster and roster_file:
+        roster = read_roster_file(roster_file)
+    if not roster:
+        raise click.UsageError("Missing argument 'PUUID' or --roster-file")
+
+    watcher = TFTMatchWatcher(
+        roster,
+        int(start_time.strftime("%s")) if start_time else int(time.time()),
+        event=event,
+        tournament=tournament,
+        stage=stage,
+        min_player=min_player,
+        min_interval=min_interval,
+        max_interval=max_interval,
+    )
+    while True:
+        saved, backlog = await watcher.cycle()
+        click.echo(f"{saved} matches saved, {backlog} left to save")
+        if once:
+            break
+
+        interval = watcher.next_interval(saved, backlog)
+        click.echo(f"Next cycle in {interval:.0f}s")
+        await asyncio.sleep(interval)
+
+
+watch.add_command(tft)
+
+
+if __name__ == "__main__":
+    watch(_anyio_backend="asyncio")
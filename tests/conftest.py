@@ -5,8 +5,12 @@ from asgi_lifespan import LifespanManager
 from asyncclick.testing import CliRunner
 from tortoise.contrib.test import finalizer, initializer
 
+from les_stats.client_api.cache import response_cache
 from les_stats.main import create_app
+from les_stats.utils.cache import get_stat_cache
 from les_stats.utils.db import close_db, init_db
+from les_stats.utils.known_matches import tft_known_matches
+from les_stats.utils.tft_bulk import tft_dimension_cache
 from tests.utils import CustomClient
 
 app = create_app()
@@ -17,9 +21,17 @@ def anyio_backend():
     return "asyncio"
 
 
+@pytest.fixture(autouse=True)
+def clear_caches() -> None:
+    response_cache.clear()
+    tft_dimension_cache.clear()
+    tft_known_matches.clear()
+
+
 @pytest.fixture()
 async def client() -> Generator:
     await init_db()
+    get_stat_cache().clear()
     async with LifespanManager(app):
         async with CustomClient(app=app, base_url="http://testserver") as c:
             yield c
@@ -9,3 +9,4 @@ os.environ["LES_STATS_TFT_API_KEY"] = "API_KEY"
 os.environ["LES_STATS_TFT_API_ROUTING"] = "euw1"
 os.environ["LES_STATS_LOL_API_KEY"] = "API_KEY"
 os.environ["LES_STATS_LOL_API_ROUTING"] = "euw1"
+os.environ["LES_STATS_RETRY_BACKOFF_BASE"] = "0.01"
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+from asyncclick.testing import CliRunner
+from pytest_httpx import HTTPXMock
+
+from les_stats.models.tft.game import TFTCurrentUnit, TFTGame
+from les_stats.utils.archive import MatchArchive, get_match_archive, reprocess
+from les_stats.utils.config import reload_settings
+from tests.utils import (
+    TFT_MATCHES_ID,
+    CustomClient,
+    get_tft_match,
+    get_tft_rollups,
+    save_tft_matches,
+)
+
+
+@pytest.fixture
+def archive_path(monkeypatch, tmp_path):
+    monkeypatch.setenv("LES_STATS_TFT_ARCHIVE_PATH", str(tmp_path))
+    reload_settings()
+    yield str(tmp_path)
+    monkeypatch.undo()
+    reload_settings()
+
+
+def test_match_archive(tmp_path):
+    archive = MatchArchive(str(tmp_path), 1)
+    payloads = [get_tft_match(match_id) for match_id in TFT_MATCHES_ID]
+
+    assert archive.append(payloads) == 2
+    assert archive.append(payloads) == 0
+    assert len(archive) == 2
+    assert sorted(os.listdir(tmp_path)) == [
+        "index",
+        "lock",
+        "segment-000001.zz",
+        "segment-000002.zz",
+    ]
+
+    other = MatchArchive(str(tmp_path), 1)
+    assert other.get(TFT_MATCHES_ID[1]) == payloads[1]
+    assert other.get("EUW1_1") is None
+    assert dict(other.iter()) == dict(zip(TFT_MATCHES_ID, payloads))
+
+    assert archive.append([{"metadata": {"match_id": "EUW1_1"}}]) == 1
+    assert "EUW1_1" in other
+    assert other.get("EUW1_1") == {"metadata": {"match_id": "EUW1_1"}}
+
+
+def test_match_archive_partial_index_line(tmp_path):
+    archive = MatchArchive(str(tmp_path), 1024)
+    archive.append([get_tft_match(TFT_MATCHES_ID[0])])
+    with open(os.path.join(tmp_path, "index"), "a") as f:
+        f.write(f"{TFT_MATCHES_ID[1]}\t1")
+
+    assert MatchArchive(str(tmp_path), 1024).match_ids() == [TFT_MATCHES_ID[0]]
+
+
+@pytest.mark.asyncio
+async def test_archive_save(
+    archive_path: str, client: CustomClient, httpx_mock: HTTPXMock
+):
+    await save_tft_matches(client, httpx_mock)
+
+    archive = get_match_archive()
+    assert get_match_archive() is archive
+    assert sorted(archive.match_ids()) == TFT_MATCHES_ID
+    assert archive.get(TFT_MATCHES_ID[0]) == get_tft_match(TFT_MATCHES_ID[0])
+
+
+@pytest.mark.asyncio
+async def test_archive_reprocess_cli(
+    archive_path: str,
+    runner: CliRunner,
+    client: CustomClient,
+    httpx_mock: HTTPXMock,
+):
+    await save_tft_matches(client, httpx_mock)
+    rollups = await get_tft_rollups()
+    units = await TFTCurrentUnit.all().count()
+    await TFTCurrentUnit.all().delete()
+
+    result = await runner.invoke(reprocess, [])
+    assert result.exit_code == 0
+    assert result.output == "2 TFT games reprocessed\n"
+    assert await TFTCurrentUnit.all().count() == units
+    assert await TFTGame.filter(event_id="event").count() == 1
+    assert await get_tft_rollups() == rollups
+
+    await TFTGame.filter(match_id=TFT_MATCHES_ID[1]).delete()
+    result = await runner.invoke(reprocess, [TFT_MATCHES_ID[1]])
+    assert result.exit_code == 0
+    assert result.output == "0 TFT games reprocessed\n"
+
+
+@pytest.mark.asyncio
+async def test_archive_reprocess_cli_disabled(runner: CliRunner, client: CustomClient):
+    result = await runner.invoke(reprocess, [])
+    assert result.exit_code == 1
+    assert "LES_STATS_TFT_ARCHIVE_PATH is not set" in result.output
@@ -0,0 +1,216 @@
+import time
+
+import pytest
+from fastapi import Request, Response
+from pytest_httpx import HTTPXMock
+
+from les_stats.models.internal.auth import Scope
+from les_stats.models.internal.event import Event
+from les_stats.utils.cache import (
+    FileCacheBackend,
+    MemoryCacheBackend,
+    NoCacheBackend,
+    cache_response,
+    get_group_tags,
+    get_stat_cache,
+    invalidate_groups,
+)
+from les_stats.utils.config import reload_settings
+from tests.utils import CustomClient, save_tft_match
+
+URL = "/tft/stat/games/time?event=event"
+
+
+@pytest.mark.parametrize(
+    ("backend",),
+    (
+        ("memory",),
+        ("file",),
+    ),
+)
+def test_cache_backend(tmp_path, backend: str):
+    if backend == "memory":
+        cache = MemoryCacheBackend(60, 2)
+    else:
+        cache = FileCacheBackend(60, str(tmp_path))
+
+    cache.set("a", '"a"', b"a", ["event", "stage"])
+    cache.set("b", '"b"', b"b", ["event"])
+    assert cache.get("a") == ('"a"', b"a")
+    assert cache.get("b") == ('"b"', b"b")
+    assert cache.get("c") is None
+
+    cache.invalidate(["stage"])
+    assert cache.get("a") is None
+    assert cache.get("b") == ('"b"', b"b")
+
+    cache.clear()
+    assert cache.get("b") is None
+
+
+@pytest.mark.parametrize(
+    ("backend",),
+    (
+        ("memory",),
+        ("file",),
+    ),
+)
+def test_cache_backend_generation(tmp_path, backend: str):
+    if backend == "memory":
+        cache = MemoryCacheBackend(60, 2)
+    else:
+        cache = FileCacheBackend(60, str(tmp_path))
+
+    generation = cache.get_generation(["event", "stage"])
+    cache.invalidate(["other"])
+    assert cache.get_generation(["event", "stage"]) == generation
+    cache.invalidate(["stage"])
+    assert cache.get_generation(["event", "stage"]) != generation
+
+    generation = cache.get_generation(["event", "stage"])
+    cache.clear()
+    assert cache.get_generation(["event", "stage"]) != generation
+
+
+def test_get_stat_cache(monkeypatch):
+    assert isinstance(get_stat_cache(), MemoryCacheBackend)
+    assert get_stat_cache() is get_stat_cache()
+
+    monkeypatch.setenv("LES_STATS_STAT_CACHE_BACKEND", "none")
+    reload_settings()
+    assert isinstance(get_stat_cache(), NoCacheBackend)
+    monkeypatch.undo()
+    reload_settings()
+
+
+def test_cache_backend_expire(tmp_path):
+    for cache in [MemoryCacheBackend(0, 2), FileCacheBackend(0, str(tmp_path))]:
+        cache.set("a", '"a"', b"a", [])
+        time.sleep(0.01)
+        assert cache.get("a") is None
+
+
+def test_memory_cache_backend_lru():
+    cache = MemoryCacheBackend(60, 2)
+    cache.set("a", '"a"', b"a", ["event"])
+    cache.set("b", '"b"', b"b", ["event"])
+    cache.get("a")
+    cache.set("c", '"c"', b"c", ["event"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_invalidate_groups():
+    stat_cache = get_stat_cache()
+    stat_cache.clear()
+    for group in [
+        ("event", None, None),
+        (None, None, None),
+        ("event", "tournament", None),
+        ("other", None, None),
+        (None, "other", None),
+    ]:
+        stat_cache.set(str(group), '""', b"", get_group_tags(*group))
+
+    invalidate_groups({("event", "tournament", "stage")})
+
+    assert stat_cache.get(str(("event", None, None))) is None
+    assert stat_cache.get(str((None, None, None))) is None
+    assert stat_cache.get(str(("event", "tournament", None))) is None
+    assert stat_cache.get(str(("other", None, None))) is not None
+    assert stat_cache.get(str((None, "other", None))) is not None
+    stat_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_cache_etag(client: CustomClient, httpx_mock: HTTPXMock):
+    await Event.create(name="event")
+    await save_tft_match(client, httpx_mock, "EUW1_5781372307", "event")
+
+    response = await client.test_api("GET", URL, Scope.read)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    cached_response = await client.test_api("GET", URL, Scope.read)
+    assert cached_response.status_code == 200
+    assert cached_response.headers["etag"] == etag
+    assert cached_response.json() == response.json()
+
+    for if_none_match in [etag, f"W/{etag}", f'"other", {etag}', "*"]:
+        response = await client.request(
+            "GET",
+            URL,
+            headers={
+                "x-api-key": cached_response.request.headers["x-api-key"],
+                "if-none-match": if_none_match,
+            },
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    response = await client.request(
+        "GET",
+        URL,
+        headers={
+            "x-api-key": cached_response.request.headers["x-api-key"],
+            "if-none-match": '"other"',
+        },
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_cache_invalidation(client: CustomClient, httpx_mock: HTTPXMock):
+    await Event.create(name="event")
+    await save_tft_match(client, httpx_mock, "EUW1_5781372307", "event")
+
+    response = await client.test_api("GET", URL, Scope.read)
+    sum_time = response.json()["data"]["sum_time"]
+
+    await save_tft_match(client, httpx_mock, "EUW1_5979031153", "event")
+    response = await client.test_api("GET", URL, Scope.read)
+    assert response.json()["data"]["sum_time"] != sum_time
+
+    await client.test_api(
+        "PUT",
+        "/tft/game/matches/save",
+        Scope.write,
+        json=[{"id": "EUW1_5979031153"}],
+    )
+    response = await client.test_api("GET", URL, Scope.read)
+    assert response.json()["data"]["sum_time"] == sum_time
+
+    await client.test_api("DELETE", "/internal/event/event", Scope.write)
+    response = await client.test_api("GET", URL, Scope.read)
+    assert response.json()["data"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("invalidated",),
+    (
+        (False,),
+        (True,),
+    ),
+)
+async def test_cache_invalidated_while_building(invalidated: bool):
+    stat_cache = get_stat_cache()
+    stat_cache.clear()
+
+    @cache_response
+    async def get_stat(request: Request, response: Response, event: str):
+        # A game of the event is saved while the stat is computed
+        if invalidated:
+            invalidate_groups({(event, None, None)})
+        return {"data": event}
+
+    request = Request(
+        {"type": "http", "path": "/stat", "query_string": b"", "headers": []}
+    )
+    response = await get_stat(request, response=Response(), event="event")
+
+    assert response.body == b'{"data":"event"}'
+    assert (stat_cache.get("/stat?") is None) == invalidated
@@ -2,12 +2,18 @@ from typing import List
 
 import pytest
 from asyncclick.testing import CliRunner
+from tortoise.expressions import F
 
+from les_stats.models.internal.auth import Api, ApiKeyVersion, Scope
 from les_stats.utils.auth import (
     API_KEY_SIZE_MAX,
     API_KEY_SIZE_MIN,
+    ApiKeyCache,
+    api_key_cache,
     create_api_key,
     delete_api_key,
+    get_digest,
+    is_api_key_scope_valid,
     list_api_key,
 )
 from tests.utils import CustomClient
@@ -122,3 +128,47 @@ async def test_list_api_key(
         assert "No API Key exist" in result.output
     else:
         assert result.output == output
+
+
+def test_api_key_cache():
+    cache = ApiKeyCache(ttl=60, maxsize=2, version_interval=5)
+
+    cache.set("a", Scope.read)
+    cache.set("b", Scope.write)
+    assert cache.get("a") == Scope.read
+    cache.set("c", Scope.read)
+    assert cache.get("b") is None
+    assert cache.get("a") == Scope.read
+    assert cache.get("c") == Scope.read
+
+    cache.clear()
+    assert cache.get("a") is None
+
+    cache = ApiKeyCache(ttl=0, maxsize=2, version_interval=5)
+    cache.set("a", Scope.read)
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_delete_api_key_invalidate_cache(runner: CliRunner, client: CustomClient):
+    await Api.create(name="test", api_key=get_digest("key"), scope=Scope.write)
+    assert await is_api_key_scope_valid("key", [Scope.write])
+
+    await runner.invoke(delete_api_key, ["test"])
+
+    assert not await is_api_key_scope_valid("key", [Scope.write])
+
+
+@pytest.mark.asyncio
+async def test_api_key_deleted_by_other_process(client: CustomClient, monkeypatch):
+    await Api.create(name="test", api_key=get_digest("key"), scope=Scope.write)
+    assert await is_api_key_scope_valid("key", [Scope.write])
+
+    # Deleted by the auth command of another process, the local cache is untouched
+    await Api.filter(name="test").delete()
+    await ApiKeyVersion.filter(id=1).update(version=F("version") + 1)
+
+    # The version is only read again once the check interval passed
+    assert await is_api_key_scope_valid("key", [Scope.write])
+    monkeypatch.setattr(api_key_cache, "_version_expire", 0.0)
+    assert not await is_api_key_scope_valid("key", [Scope.write])
@@ -1,3 +1,6 @@
+import asyncio
+import calendar
+import json
 import os
 from datetime import datetime
 from typing import Dict
@@ -11,9 +14,16 @@ from les_stats.models.internal.auth import Api, Scope
 from les_stats.models.internal.event import Event
 from les_stats.models.internal.stage import Stage
 from les_stats.models.internal.tournament import Tournament
+from les_stats.models.tft.game import TFTGame
+from les_stats.models.tft.watermark import TFTImportWatermark
+from les_stats.schemas.client_api.data import DataResponse
 from les_stats.utils.auth import API_KEY_SIZE_MAX, get_digest
 from les_stats.utils.config import get_settings
-from les_stats.utils.import_match import import_matches_tft
+from les_stats.utils.import_match import (
+    import_matches_tft,
+    iter_matches_pages,
+    reset_import_watermarks,
+)
 from tests.utils import CustomClient, get_json_response
 
 MOCKED_DATA_FOLDER = "riot/tft/"
@@ -61,7 +71,7 @@ async def tortoise_init_db(runner: CliRunner, client: CustomClient) -> None:
             None,
             {"test": False},
             2,
-            "Error: Missing argument 'PUUID'.",
+            "Error: Missing option '--start-time'.",
         ),
         (
             {"value": ""},
@@ -77,7 +87,7 @@ async def tortoise_init_db(runner: CliRunner, client: CustomClient) -> None:
             None,
             {"test": False},
             2,
-            "Error: Missing argument 'PUUID'.",
+            "Error: Missing option '--start-time'.",
         ),
         (
             {
@@ -95,7 +105,7 @@ async def tortoise_init_db(runner: CliRunner, client: CustomClient) -> None:
             None,
             {"test": False},
             2,
-            "Usage: import-matches-tft [OPTIONS] PUUID\nTry 'import-matches-tft --help' for help.\n\nError: Missing option '--start-time'.\n",
+            "Usage: import-matches-tft [OPTIONS] [PUUID]...\nTry 'import-matches-tft --help' for help.\n\nError: Missing option '--start-time'.\n",
         ),
         (
             {
@@ -113,7 +123,7 @@ async def tortoise_init_db(runner: CliRunner, client: CustomClient) -> None:
             None,
             {"test": False},
             2,
-            "Usage: import-matches-tft [OPTIONS] PUUID\nTry 'import-matches-tft --help' for help.\n\nError: Missing option '--start-time'.\n",
+            "Usage: import-matches-tft [OPTIONS] [PUUID]...\nTry 'import-matches-tft --help' for help.\n\nError: Missing option '--start-time'.\n",
         ),
         (
             {
@@ -131,7 +141,7 @@ async def tortoise_init_db(runner: CliRunner, client: CustomClient) -> None:
             None,
             {"test": False},
             2,
-            "Usage: import-matches-tft [OPTIONS] PUUID\nTry 'import-matches-tft --help' for help.\n\nError: Missing option '--api-key'.\n",
+            "Usage: import-matches-tft [OPTIONS] [PUUID]...\nTry 'import-matches-tft --help' for help.\n\nError: Missing option '--api-key'.\n",
         ),
         (
             {
@@ -149,7 +159,7 @@ async def tortoise_init_db(runner: CliRunner, client: CustomClient) -> None:
             None,
             {"test": False},
             2,
-            "Usage: import-matches-tft [OPTIONS] PUUID\nTry 'import-matches-tft --help' for help.\n\nError: Missing option '--api-key'.\n",
+            "Usage: import-matches-tft [OPTIONS] [PUUID]...\nTry 'import-matches-tft --help' for help.\n\nError: Missing option '--api-key'.\n",
         ),
         (
             {
@@ -203,7 +213,7 @@ async def tortoise_init_db(runner: CliRunner, client: CustomClient) -> None:
             None,
             {"test": False},
             2,
-            "Usage: import-matches-tft [OPTIONS] PUUID\nTry 'import-matches-tft --help' for help.\n\nError: Invalid value: Invalid API Key\n",
+            "Usage: import-matches-tft [OPTIONS] [PUUID]...\nTry 'import-matches-tft --help' for help.\n\nError: Invalid value: Invalid API Key\n",
         ),
         (
             {
@@ -510,3 +520,343 @@ async def test_import_matches_tft(
     if rc != 0:
         assert result.exception
     assert message in str(result.output)
+
+
+@pytest.mark.parametrize(("roster_format",), (("json",), ("txt",)))
+@pytest.mark.asyncio
+async def test_import_matches_tft_roster(
+    runner: CliRunner,
+    client: CustomClient,
+    httpx_mock: HTTPXMock,
+    tortoise_init_db: None,
+    tmp_path,
+    roster_format: str,
+):
+    start_time = "2022-11-15 09:17:00"
+    players = {
+        "player_a": ["EUW1_5781372307", "EUW1_5979031153"],
+        "player_b": ["EUW1_5979031153"],
+        "player_c": None,
+    }
+
+    roster_file = os.path.join(tmp_path, f"roster.{roster_format}")
+    with open(roster_file, "w") as f:
+        if roster_format == "json":
+            f.write(json.dumps({"players": [{"puuid": p} for p in players]}))
+        else:
+            f.write("\n".join(list(players) + ["player_a", ""]))
+
+    for player, matches in players.items():
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/{player}/ids"
+            f"?start=0&count=20&startTime={int(datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S').timestamp())}",
+            status_code=200 if matches is not None else 400,
+            json=matches
+            if matches is not None
+            else {"status": {"message": "Bad Request", "status_code": 400}},
+        )
+    for match_id in players["player_a"]:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+            status_code=200,
+            json=get_json_response(
+                os.path.join(MOCKED_DATA_FOLDER, "match", match_id + ".json")
+            ),
+        )
+
+    result = await runner.invoke(
+        import_matches_tft,
+        [
+            "--api-key",
+            "w" * API_KEY_SIZE_MAX,
+            "--start-time",
+            start_time,
+            "--roster-file",
+            roster_file,
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert result.output == (
+        "player_c 400: Bad Request\n"
+        "3 players, 2 unique matches out of 3 (1 fetches saved)\n"
+        "Game EUW1_5781372307 saved\n"
+        "Game EUW1_5979031153 saved\n"
+    )
+    for match_id in players["player_a"]:
+        assert (
+            len(
+                httpx_mock.get_requests(
+                    url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}"
+                )
+            )
+            == 1
+        )
+
+
+@pytest.mark.asyncio
+async def test_import_matches_tft_no_roster(
+    runner: CliRunner, client: CustomClient, tortoise_init_db: None
+):
+    result = await runner.invoke(
+        import_matches_tft,
+        ["--api-key", "w" * API_KEY_SIZE_MAX, "--start-time", "2022-11-15 09:17:00"],
+    )
+
+    assert result.exit_code == 2
+    assert (
+        "Error: Missing argument 'PUUID', --roster-file or --puuids-http-json players"
+        in result.output
+    )
+
+
+@pytest.mark.asyncio
+async def test_import_matches_tft_since_last(
+    runner: CliRunner,
+    client: CustomClient,
+    httpx_mock: HTTPXMock,
+    tortoise_init_db: None,
+):
+    start_time = "2022-07-01 00:00:00"
+    matches_id = ["EUW1_5979031153", "EUW1_5781372307"]
+    url = f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/player_a/ids?start=0&count=20"
+    cli_params = [
+        "--api-key",
+        "w" * API_KEY_SIZE_MAX,
+        "--start-time",
+        start_time,
+        "--since-last",
+        "player_a",
+    ]
+
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{url}&startTime={int(datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S').timestamp())}",
+        status_code=200,
+        json=matches_id,
+    )
+    for match_id in matches_id:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+            status_code=200,
+            json=get_json_response(
+                os.path.join(MOCKED_DATA_FOLDER, "match", match_id + ".json")
+            ),
+        )
+    result = await runner.invoke(import_matches_tft, cli_params)
+    assert result.exit_code == 0
+
+    watermark = await TFTImportWatermark.get(
+        puuid="player_a", region=get_settings().TFT_API_ROUTING
+    )
+    assert watermark.match_id == "EUW1_5979031153"
+    assert calendar.timegm(watermark.game_datetime.utctimetuple()) == 1658354772
+
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{url}&startTime=1658354772",
+        status_code=200,
+        json=["EUW1_5979031153"],
+    )
+    result = await runner.invoke(import_matches_tft, cli_params)
+    assert result.exit_code == 0
+    assert result.output == "No match found\n"
+
+    result = await runner.invoke(
+        reset_import_watermarks, ["--api-key", "w" * API_KEY_SIZE_MAX, "player_b"]
+    )
+    assert result.output == "0 watermarks reset\n"
+    result = await runner.invoke(
+        reset_import_watermarks, ["--api-key", "w" * API_KEY_SIZE_MAX]
+    )
+    assert result.exit_code == 0
+    assert result.output == "1 watermarks reset\n"
+    assert await TFTImportWatermark.all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_import_matches_tft_since_last_failed_match(
+    runner: CliRunner,
+    client: CustomClient,
+    httpx_mock: HTTPXMock,
+    tortoise_init_db: None,
+):
+    start_time = "2022-07-01 00:00:00"
+    matches_id = ["EUW1_5979031153", "EUW1_5781372307"]
+    url = f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/player_a/ids?start=0&count=20"
+    url = f"{url}&startTime={int(datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S').timestamp())}"
+    match_url = "https://{}.api.riotgames.com/tft/match/v1/matches/{}"
+    cli_params = [
+        "--api-key",
+        "w" * API_KEY_SIZE_MAX,
+        "--start-time",
+        start_time,
+        "--since-last",
+        "player_a",
+    ]
+
+    httpx_mock.add_response(method="GET", url=url, status_code=200, json=matches_id)
+    httpx_mock.add_response(
+        method="GET",
+        url=match_url.format(RiotAPI.get_region(matches_id[0]), matches_id[0]),
+        status_code=200,
+        json=get_json_response(
+            os.path.join(MOCKED_DATA_FOLDER, "match", matches_id[0] + ".json")
+        ),
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=match_url.format(RiotAPI.get_region(matches_id[1]), matches_id[1]),
+        status_code=500,
+        json={"status": {"message": "Internal server error", "status_code": 500}},
+    )
+    result = await runner.invoke(import_matches_tft, cli_params)
+    assert result.exit_code == 0
+
+    # The latest match is saved but the older one failed, it must be listed again
+    assert await TFTImportWatermark.all().count() == 0
+
+    httpx_mock.reset(assert_all_responses_were_requested=False)
+    httpx_mock.add_response(method="GET", url=url, status_code=200, json=matches_id)
+    httpx_mock.add_response(
+        method="GET",
+        url=match_url.format(RiotAPI.get_region(matches_id[1]), matches_id[1]),
+        status_code=200,
+        json=get_json_response(
+            os.path.join(MOCKED_DATA_FOLDER, "match", matches_id[1] + ".json")
+        ),
+    )
+    result = await runner.invoke(import_matches_tft, cli_params)
+    assert result.exit_code == 0
+    assert f"Game {matches_id[1]} saved\n" in result.output
+
+    watermark = await TFTImportWatermark.get(
+        puuid="player_a", region=get_settings().TFT_API_ROUTING
+    )
+    assert watermark.match_id == matches_id[0]
+
+
+@pytest.mark.asyncio
+async def test_import_matches_tft_paginated(
+    runner: CliRunner,
+    client: CustomClient,
+    httpx_mock: HTTPXMock,
+    tortoise_init_db: None,
+):
+    start_time = "2022-07-01 00:00:00"
+    matches_id = ["EUW1_5979031153", "EUW1_5781372307"]
+
+    httpx_mock.add_response(
+        method="GET",
+        url=f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/player_a/ids"
+        f"?start=0&count=100&startTime={int(datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S').timestamp())}",
+        status_code=200,
+        json=matches_id,
+    )
+    for match_id in matches_id:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+            status_code=200,
+            json=get_json_response(
+                os.path.join(MOCKED_DATA_FOLDER, "match", match_id + ".json")
+            ),
+        )
+
+    result = await runner.invoke(
+        import_matches_tft,
+        [
+            "--api-key",
+            "w" * API_KEY_SIZE_MAX,
+            "--start-time",
+            start_time,
+            "--count-game",
+            "500",
+            "player_a",
+        ],
+    )
+    assert result.exit_code == 0
+    assert result.output == "Game EUW1_5979031153 saved\nGame EUW1_5781372307 saved\n"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("status_code",),
+    (
+        (404,),
+        (500,),
+    ),
+)
+async def test_import_matches_tft_page_failed(
+    runner: CliRunner,
+    client: CustomClient,
+    httpx_mock: HTTPXMock,
+    tortoise_init_db: None,
+    status_code: int,
+):
+    start_time = "2022-07-01 00:00:00"
+    matches_id = ["EUW1_5979031153", "EUW1_5781372307"]
+
+    httpx_mock.add_response(
+        method="GET",
+        url=f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/player_a/ids"
+        f"?start=0&count=100&startTime={int(datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S').timestamp())}",
+        status_code=200,
+        json=matches_id,
+    )
+    for match_id in matches_id:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+            status_code=status_code,
+            json={"status": {"message": "Error", "status_code": status_code}},
+        )
+
+    result = await runner.invoke(
+        import_matches_tft,
+        [
+            "--api-key",
+            "w" * API_KEY_SIZE_MAX,
+            "--start-time",
+            start_time,
+            "--count-game",
+            "500",
+            "--since-last",
+            "player_a",
+        ],
+    )
+    # Every match of the page is reported, the failed ones are listed again next time
+    assert result.exit_code == 0
+    assert result.output.count(f"{status_code}: ") == len(matches_id)
+    assert await TFTGame.all().count() == 0
+    assert await TFTImportWatermark.all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_iter_matches_pages():
+    listed = asyncio.Event()
+
+    class RiotAPIPages:
+        async def iter_matches_list(self, puuid, end_time, start_time, limit):
+            yield 200, DataResponse(data=[f"{puuid}_1", "EUW1_1"])
+            # The next page only comes once the first one was handed over
+            await listed.wait()
+            yield 200, DataResponse(data=[f"{puuid}_2"])
+
+    datas = {}
+    pages = []
+
+    async def consume() -> None:
+        async for matches_id in iter_matches_pages(
+            RiotAPIPages(), {0: ["player_a"]}, None, 200, {"player_a": "EUW1_1"}, datas
+        ):
+            pages.append(matches_id)
+            listed.set()
+
+    await asyncio.wait_for(consume(), 5)
+
+    assert pages == [["player_a_1"], ["player_a_2"]]
+    assert datas["player_a"].data == ["player_a_1", "player_a_2"]
@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import tarfile
+
+import pytest
+from asyncclick.testing import CliRunner
+
+from les_stats.models.internal.auth import Api, Scope
+from les_stats.models.internal.event import Event
+from les_stats.models.tft.game import TFTGame, TFTParticipant
+from les_stats.utils.auth import API_KEY_SIZE_MAX, get_digest
+from les_stats.utils.import_match import import_matches_tft_files
+from les_stats.utils.match_files import iter_match_sources, parse_match_sources
+from tests.utils import TFT_MATCHES_ID, CustomClient, get_tft_match
+
+MOCKED_DATA_FOLDER = os.path.join(
+    os.path.dirname(__file__), "mocked_data", "riot", "tft", "match"
+)
+API_KEY = "w" * API_KEY_SIZE_MAX
+
+
+@pytest.fixture(scope="function")
+@pytest.mark.asyncio
+async def tortoise_init_db(runner: CliRunner, client: CustomClient) -> None:
+    await Api.create(name="write", api_key=get_digest(API_KEY), scope=Scope.write)
+    await Api.create(
+        name="read", api_key=get_digest("r" * API_KEY_SIZE_MAX), scope=Scope.read
+    )
+
+
+@pytest.fixture
+def matches_path(tmp_path) -> str:
+    path = os.path.join(tmp_path, "matches")
+    os.makedirs(os.path.join(path, "day"))
+    for folder, match_id in zip([path, os.path.join(path, "day")], TFT_MATCHES_ID):
+        shutil.copy(os.path.join(MOCKED_DATA_FOLDER, f"{match_id}.json"), folder)
+    with open(os.path.join(path, "invalid.json"), "w") as f:
+        f.write(json.dumps({"metadata": {"match_id": "EUW1_1"}}))
+    with open(os.path.join(path, "README.md"), "w") as f:
+        f.write("ignored")
+
+    return path
+
+
+def test_iter_match_sources(matches_path: str, tmp_path):
+    assert [name for name, _ in iter_match_sources(matches_path)] == [
+        os.path.join(matches_path, f"{TFT_MATCHES_ID[0]}.json"),
+        os.path.join(matches_path, "invalid.json"),
+        os.path.join(matches_path, "day", f"{TFT_MATCHES_ID[1]}.json"),
+    ]
+
+    ndjson_path = os.path.join(tmp_path, "matches.ndjson")
+    with open(ndjson_path, "w") as f:
+        f.write(
+            "\n".join(
+                json.dumps(get_tft_match(match_id)) for match_id in TFT_MATCHES_ID
+            )
+            + "\n\n"
+        )
+    tar_path = os.path.join(tmp_path, "matches.tar.gz")
+    with tarfile.open(tar_path, "w:gz") as tar:
+        tar.add(matches_path, arcname="matches")
+        tar.add(ndjson_path, arcname="matches.ndjson")
+
+    assert [name for name, _ in iter_match_sources(ndjson_path)] == [
+        f"{ndjson_path}:1",
+        f"{ndjson_path}:2",
+    ]
+    assert len(list(iter_match_sources(tar_path))) == 5
+
+
+def test_parse_match_sources(matches_path: str):
+    results = parse_match_sources(list(iter_match_sources(matches_path)))
+
+    assert [
+        payload["metadata"]["match_id"] for _, payload, _ in results if payload
+    ] == [
+        TFT_MATCHES_ID[0],
+        TFT_MATCHES_ID[1],
+    ]
+    assert results[1][1] is None
+    assert "info" in results[1][2]
+
+
+@pytest.mark.parametrize(("workers",), ((1,), (2,)))
+@pytest.mark.asyncio
+async def test_import_matches_tft_files(
+    tortoise_init_db, runner: CliRunner, matches_path: str, workers: int
+):
+    await Event.create(name="event")
+
+    result = await runner.invoke(
+        import_matches_tft_files,
+        [
+            "--api-key",
+            API_KEY,
+            "--event",
+            "event",
+            "--workers",
+            str(workers),
+            matches_path,
+        ],
+    )
+    assert result.exit_code == 0
+    assert "invalid.json: 3 validation errors for TFTMatchIn" in result.output
+    assert "2 games imported, 0 already saved, 1 invalid" in result.output
+    assert await TFTGame.filter(event_id="event").count() == 2
+    assert await TFTParticipant.all().count() == 16
+
+    result = await runner.invoke(
+        import_matches_tft_files, ["--api-key", API_KEY, "--workers", "1", matches_path]
+    )
+    assert result.exit_code == 0
+    assert "0 games imported, 2 already saved, 1 invalid" in result.output
+    assert await TFTGame.filter(event_id="event").count() == 2
+
+
+@pytest.mark.parametrize(
+    ("params", "message"),
+    (
+        (["--api-key", "r" * API_KEY_SIZE_MAX], "Invalid API Key"),
+        (["--api-key", API_KEY, "--event", "event"], "Event event does not exist"),
+        (["--api-key", API_KEY, "--stage", "stage"], "Stage stage does not exist"),
+    ),
+)
+@pytest.mark.asyncio
+async def test_import_matches_tft_files_error(
+    tortoise_init_db, runner: CliRunner, matches_path: str, params, message: str
+):
+    result = await runner.invoke(import_matches_tft_files, params + [matches_path])
+    assert result.exit_code != 0
+    assert message in result.output
+    assert await TFTGame.all().count() == 0
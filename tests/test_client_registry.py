@@ -0,0 +1,17 @@
+import pytest
+
+from les_stats.client_api.registry import ClientRegistry
+
+
+@pytest.mark.asyncio
+async def test_client_registry():
+    registry = ClientRegistry()
+
+    client = registry.get("euw1.api.riotgames.com")
+    assert registry.get("euw1.api.riotgames.com") is client
+    assert registry.get("europe.api.riotgames.com") is not client
+
+    await registry.aclose()
+    assert client.is_closed
+    assert registry.get("euw1.api.riotgames.com") is not client
+    await registry.aclose()
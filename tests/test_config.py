@@ -4,7 +4,7 @@ import pytest
 from pydantic import HttpUrl
 from pydantic.error_wrappers import ValidationError
 
-from les_stats.utils.config import Settings
+from les_stats.utils.config import Settings, get_settings, reload_settings
 
 
 @pytest.mark.parametrize(
@@ -81,3 +81,19 @@ def test_settings_sentry_dsn(value: str, error: bool):
             assert s.SENTRY_DSN is None
         else:
             assert s.SENTRY_DSN == value
+
+
+def test_get_settings_cached(monkeypatch):
+    settings = get_settings()
+    assert get_settings() is settings
+
+    monkeypatch.setenv("LES_STATS_APP_PORT", "8080")
+    assert get_settings().APP_PORT == settings.APP_PORT
+
+    new_settings = reload_settings()
+    assert new_settings is not settings
+    assert new_settings.APP_PORT == 8080
+    assert get_settings() is new_settings
+
+    monkeypatch.undo()
+    reload_settings()
@@ -0,0 +1,158 @@
+import asyncio
+import uuid
+from typing import Any, Dict, List, Union
+
+import pytest
+from pytest_httpx import HTTPXMock
+from tortoise.exceptions import OperationalError
+
+from les_stats.models.internal.auth import Scope
+from les_stats.models.internal.job import Job, JobStatus
+from les_stats.models.tft.game import TFTGame
+from les_stats.schemas.riot.game import RiotGame
+from les_stats.utils.config import reload_settings
+from les_stats.utils.jobs import job_queue
+from tests.utils import TFT_MATCHES_ID, CustomClient, mock_tft_match
+
+NAMESPACE = "/tft/game/"
+
+
+async def wait_job(job_id: uuid.UUID) -> None:
+    await job_queue.start(1)
+    try:
+        for _ in range(100):
+            if (await Job.get(id=job_id)).status in [JobStatus.done, JobStatus.failed]:
+                return
+            await asyncio.sleep(0.02)
+        raise TimeoutError(f"Job {job_id} not done")
+    finally:
+        await job_queue.stop()
+
+
+@pytest.mark.parametrize(
+    ("method", "endpoint", "json", "scopes"),
+    (
+        ("POST", "jobs", [{"id": "test"}], [Scope.write]),
+        ("GET", f"jobs/{uuid.uuid4()}", {}, [Scope.write, Scope.read]),
+    ),
+)
+@pytest.mark.asyncio
+async def test_jobs_scopes(
+    client: CustomClient,
+    method: str,
+    endpoint: str,
+    json: Union[Dict[str, Any], List[Dict[str, Any]]],
+    scopes: List[Scope],
+):
+    await client.test_api_scope(method, f"{NAMESPACE}{endpoint}", scopes, json=json)
+
+
+@pytest.mark.asyncio
+async def test_job(client: CustomClient, httpx_mock: HTTPXMock):
+    mock_tft_match(httpx_mock, TFT_MATCHES_ID[0])
+    mock_tft_match(httpx_mock, "EUW1_5979031153NotExist", 404)
+
+    response = await client.test_api(
+        "POST",
+        f"{NAMESPACE}jobs",
+        Scope.write,
+        json=[{"id": TFT_MATCHES_ID[0]}, {"id": "EUW1_5979031153NotExist"}],
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pending"
+    assert job["http_code"] is None
+    assert job["results"] == [None, None]
+
+    await wait_job(job["id"])
+
+    response = await client.test_api("GET", f"{NAMESPACE}jobs/{job['id']}", Scope.read)
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "done"
+    assert job["http_code"] == 207
+    assert job["matches"][0]["id"] == TFT_MATCHES_ID[0]
+    assert job["results"][0] == {
+        "data": f"Game {TFT_MATCHES_ID[0]} saved",
+        "error": None,
+    }
+    assert job["results"][1]["data"] is None
+    assert job["results"][1]["error"]["status_code"] == 404
+    assert await TFTGame.filter(match_id=TFT_MATCHES_ID[0]).exists()
+
+
+@pytest.mark.asyncio
+async def test_job_resume(client: CustomClient, httpx_mock: HTTPXMock):
+    mock_tft_match(httpx_mock, TFT_MATCHES_ID[1])
+    saved = {"data": f"Game {TFT_MATCHES_ID[0]} saved", "error": None}
+    job = await Job.create(
+        game=RiotGame.tft,
+        status=JobStatus.running,
+        matches=[{"id": match_id} for match_id in TFT_MATCHES_ID],
+        results=[saved, None],
+        http_code=200,
+    )
+
+    await wait_job(job.id)
+
+    await job.refresh_from_db()
+    assert job.results == [
+        saved,
+        {"data": f"Game {TFT_MATCHES_ID[1]} saved", "error": None},
+    ]
+    assert job.http_code == 200
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_job_failed(client: CustomClient, httpx_mock: HTTPXMock, monkeypatch):
+    monkeypatch.setenv("LES_STATS_JOB_POLL_INTERVAL", "0.01")
+    reload_settings()
+    mock_tft_match(httpx_mock, TFT_MATCHES_ID[1])
+    jobs = [
+        await Job.create(
+            game=RiotGame.tft,
+            matches=[{"id": match_id}],
+            results=[None],
+        )
+        for match_id in TFT_MATCHES_ID
+    ]
+
+    calls = {"claim": 0, "process": 0}
+    claim, process = job_queue._claim, job_queue.process
+
+    async def failing_claim():
+        calls["claim"] += 1
+        if calls["claim"] == 1:
+            raise OperationalError("database is locked")
+        return await claim()
+
+    async def failing_process(job: Job):
+        calls["process"] += 1
+        if calls["process"] == 1:
+            raise OperationalError("database is locked")
+        await process(job)
+
+    monkeypatch.setattr(job_queue, "_claim", failing_claim)
+    monkeypatch.setattr(job_queue, "process", failing_process)
+    try:
+        # The worker keeps going after the claim and the first job failed
+        await wait_job(jobs[1].id)
+    finally:
+        monkeypatch.undo()
+        reload_settings()
+
+    for job in jobs:
+        await job.refresh_from_db()
+    assert [job.status for job in jobs] == [JobStatus.failed, JobStatus.done]
+    assert jobs[1].results == [
+        {"data": f"Game {TFT_MATCHES_ID[1]} saved", "error": None}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_job_not_found(client: CustomClient):
+    job_id = uuid.uuid4()
+    response = await client.test_api("GET", f"{NAMESPACE}jobs/{job_id}", Scope.read)
+    assert response.status_code == 404
+    assert response.json() == {"detail": f"Job {job_id} not found"}
@@ -0,0 +1,77 @@
+import pytest
+
+from les_stats.client_api.riot import RiotAPI, RiotGame
+from les_stats.models.tft.game import TFTGame
+from les_stats.schemas.riot.game import GameSaveIn_Pydantic
+from les_stats.utils.known_matches import BloomFilter, tft_known_matches
+from les_stats.utils.tft_bulk import TFTBulkSaver
+from tests.utils import CustomClient, copy_tft_match
+
+
+def test_bloom_filter():
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"EUW1_{i}")
+
+    assert all(f"EUW1_{i}" in bloom for i in range(1000))
+    false_positives = sum(f"NA1_{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+
+
+@pytest.mark.asyncio
+async def test_known_matches_saved(
+    client: CustomClient, monkeypatch: pytest.MonkeyPatch
+):
+    await TFTBulkSaver().save_batch(
+        [(copy_tft_match("EUW1_1"), {}), (copy_tft_match("EUW1_2"), {})]
+    )
+    probed = []
+    confirm = tft_known_matches.confirm
+
+    async def probe(match_ids):
+        match_ids = list(match_ids)
+        probed.extend(match_ids)
+        return await confirm(match_ids)
+
+    monkeypatch.setattr(tft_known_matches, "confirm", probe)
+
+    saved = await tft_known_matches.saved(["EUW1_1", "EUW1_2", "EUW1_3", "EUW1_4"])
+
+    assert saved == {"EUW1_1", "EUW1_2"}
+    # New matches are not looked up in the database
+    assert sorted(probed) == ["EUW1_1", "EUW1_2"]
+
+
+@pytest.mark.asyncio
+async def test_known_matches_save_delete(client: CustomClient):
+    riot_api = RiotAPI(RiotGame.tft)
+    await tft_known_matches.load()
+
+    await riot_api.save_tft_payloads(
+        TFTBulkSaver(),
+        [(GameSaveIn_Pydantic(id="EUW1_1"), {}, copy_tft_match("EUW1_1"))],
+    )
+    assert await tft_known_matches.saved(["EUW1_1"]) == {"EUW1_1"}
+
+    await riot_api.delete_tft_games(["EUW1_1"])
+    assert await tft_known_matches.saved(["EUW1_1"]) == set()
+
+
+@pytest.mark.asyncio
+async def test_known_matches_saved_by_other_process(client: CustomClient):
+    await tft_known_matches.load()
+    # Saved without going through the index of this process
+    await TFTBulkSaver().save_batch([(copy_tft_match("EUW1_1"), {})])
+
+    rows, saved = await RiotAPI(RiotGame.tft).save_tft_payloads(
+        TFTBulkSaver(),
+        [
+            (GameSaveIn_Pydantic(id="EUW1_1"), {}, copy_tft_match("EUW1_1")),
+            (GameSaveIn_Pydantic(id="EUW1_2"), {}, copy_tft_match("EUW1_2")),
+        ],
+    )
+
+    assert saved == {"EUW1_1"}
+    assert rows > 0
+    assert await TFTGame.filter(match_id__in=["EUW1_1", "EUW1_2"]).count() == 2
+    assert await tft_known_matches.saved(["EUW1_1", "EUW1_2"]) == {"EUW1_1", "EUW1_2"}
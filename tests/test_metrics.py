@@ -0,0 +1,39 @@
+import pytest
+from prometheus_client import REGISTRY
+
+from les_stats.metrics.main import init_metrics
+from les_stats.models.internal.event import Event
+from les_stats.models.tft.game import TFTGame
+from tests.utils import CustomClient
+
+
+@pytest.mark.asyncio
+async def test_init_metrics(client: CustomClient):
+    event = await Event.create(name="metric_event")
+    for match_id, game_event in [
+        ("EUW1_1", event),
+        ("EUW1_2", event),
+        ("EUW1_3", None),
+    ]:
+        await TFTGame.create(
+            match_id=match_id,
+            data_version="",
+            game_datetime=0,
+            game_length=0.0,
+            game_version="",
+            queue_id=0,
+            tft_set_number=0,
+            tft_game_type="",
+            event=game_event,
+        )
+
+    await init_metrics()
+
+    labels = {"game": "tft", "tournament": "None", "stage": "None"}
+    assert (
+        REGISTRY.get_sample_value("les_stats_game", {**labels, "event": "metric_event"})
+        == 2
+    )
+    assert REGISTRY.get_sample_value("les_stats_game", {**labels, "event": "None"}) == 1
+    assert REGISTRY.get_sample_value("les_stats_event_total") == 1
+    assert REGISTRY.get_sample_value("les_stats_init_metrics_seconds") > 0
@@ -0,0 +1,48 @@
+import pytest
+from asyncclick.testing import CliRunner
+from tortoise import connections
+
+from les_stats.models.internal.migration import Migration
+from les_stats.utils.migrate import MIGRATIONS, status, upgrade, upgrade_db
+from tests.utils import CustomClient
+
+
+@pytest.mark.asyncio
+async def test_upgrade_db(client: CustomClient):
+    applied = await upgrade_db()
+    assert applied == [(version, name) for version, name, _ in MIGRATIONS]
+    assert await Migration.all().count() == len(MIGRATIONS)
+
+    _, indexes = await connections.get("default").execute_query(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tftgame'"
+    )
+    assert "idx_tftgame_event_tournament_stage" in [index["name"] for index in indexes]
+
+    _, indexes = await connections.get("default").execute_query(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tftrollupplayer'"
+    )
+    assert "uidx_tftrollupplayer_group" in [index["name"] for index in indexes]
+
+    assert await upgrade_db() == []
+    assert await Migration.all().count() == len(MIGRATIONS)
+
+
+@pytest.mark.asyncio
+async def test_migrate_cli(runner: CliRunner, client: CustomClient):
+    result = await runner.invoke(status, [])
+    assert result.exit_code == 0
+    assert result.output == "0001_tft_indexes pending\n0002_tft_rollup_unique pending\n"
+
+    result = await runner.invoke(upgrade, [])
+    assert result.exit_code == 0
+    assert result.output == "Applied 0001_tft_indexes\nApplied 0002_tft_rollup_unique\n"
+
+    result = await runner.invoke(upgrade, [])
+    assert result.exit_code == 0
+    assert result.output == "Database is up to date\n"
+
+    result = await runner.invoke(status, [])
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0].startswith("0001_tft_indexes applied at ")
+    assert lines[1].startswith("0002_tft_rollup_unique applied at ")
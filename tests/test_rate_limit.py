@@ -0,0 +1,77 @@
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from les_stats.client_api.ratelimit import RateLimiter, parse_rate_limit
+from les_stats.client_api.riot import RiotAPI, RiotGame
+from les_stats.utils.config import get_settings
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    (
+        (None, []),
+        ("", []),
+        ("20:1", [(20, 1)]),
+        ("20:1,100:120", [(20, 1), (100, 120)]),
+    ),
+)
+def test_parse_rate_limit(header: str, expected: list):
+    assert parse_rate_limit(header) == expected
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_learn_limits():
+    limiter = RateLimiter()
+
+    assert await limiter.acquire("euw1", "match") < 0.05
+    limiter.update(
+        "euw1",
+        "match",
+        httpx.Response(
+            200,
+            headers={
+                "X-App-Rate-Limit": "20:1,100:120",
+                "X-App-Rate-Limit-Count": "1:1,1:120",
+                "X-Method-Rate-Limit": "10:1",
+                "X-Method-Rate-Limit-Count": "10:1",
+            },
+        ),
+    )
+
+    assert await limiter.acquire("euw1", "match") >= 0.05
+    assert await limiter.acquire("euw1", "summoner") < 0.05
+    assert await limiter.acquire("na1", "match") < 0.05
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_retry_after():
+    limiter = RateLimiter()
+
+    limiter.update(
+        "euw1",
+        "match",
+        httpx.Response(
+            429, headers={"Retry-After": "0.1", "X-Rate-Limit-Type": "application"}
+        ),
+    )
+
+    assert await limiter.acquire("euw1", "summoner") >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_requeue_rate_limited_request(httpx_mock: HTTPXMock):
+    url = f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/summoner/v1/summoners/by-puuid/test"
+    httpx_mock.add_response(
+        method="GET",
+        url=url,
+        status_code=429,
+        headers={"Retry-After": "0", "X-Rate-Limit-Type": "method"},
+        json={},
+    )
+    httpx_mock.add_response(method="GET", url=url, status_code=200, json={})
+
+    http_code, datas = await RiotAPI(RiotGame.tft).get_summoners_name(["test"])
+
+    assert http_code == 200
+    assert len(httpx_mock.get_requests()) == 2
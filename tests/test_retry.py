@@ -0,0 +1,78 @@
+import pytest
+from pytest_httpx import HTTPXMock
+
+from les_stats.client_api.retry import RetryBudget, get_backoff
+from les_stats.client_api.riot import RiotAPI, RiotGame
+from les_stats.utils.config import get_settings
+
+URL = f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/summoner/v1/summoners/by-puuid/test"
+
+
+def test_retry_budget():
+    budget = RetryBudget(2)
+
+    assert budget.spend()
+    assert budget.spend()
+    assert not budget.spend()
+
+
+@pytest.mark.parametrize("attempt", (1, 2, 3, 10))
+def test_get_backoff(attempt: int):
+    assert 0 <= get_backoff(attempt, 0.5, 2) <= min(2, 0.5 * 2 ** (attempt - 1))
+
+
+@pytest.mark.parametrize("status_code", (500, 502, 503, 504))
+@pytest.mark.asyncio
+async def test_retry_transient_error(httpx_mock: HTTPXMock, status_code: int):
+    httpx_mock.add_response(method="GET", url=URL, status_code=status_code, json={})
+    httpx_mock.add_response(method="GET", url=URL, status_code=200, json={})
+
+    http_code, _ = await RiotAPI(RiotGame.tft).get_summoners_name(["test"])
+
+    assert http_code == 200
+    assert len(httpx_mock.get_requests()) == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_give_up(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="GET", url=URL, status_code=503, json={})
+
+    http_code, datas = await RiotAPI(RiotGame.tft).get_summoners_name(["test"])
+
+    assert http_code == 503
+    assert datas[0].error.status_code == 503
+    assert len(httpx_mock.get_requests()) == get_settings().RETRY_MAX_ATTEMPTS + 1
+
+
+@pytest.mark.asyncio
+async def test_no_retry_client_error(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="GET", url=URL, status_code=404, json={})
+
+    http_code, _ = await RiotAPI(RiotGame.tft).get_summoners_name(["test"])
+
+    assert http_code == 404
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_no_retry_not_idempotent(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="POST", url=URL, status_code=503, json={})
+    riot_api = RiotAPI(RiotGame.tft)
+
+    resps = await riot_api.make_request([riot_api.build_request("POST", URL)])
+
+    assert resps[0].status_code == 503
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_shared(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="GET", status_code=503, json={})
+    riot_api = RiotAPI(RiotGame.tft)
+
+    await riot_api.make_request(
+        [riot_api.build_request("GET", URL), riot_api.build_request("GET", URL + "2")],
+        retries=1,
+    )
+
+    assert len(httpx_mock.get_requests()) == 3
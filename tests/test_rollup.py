@@ -0,0 +1,128 @@
+from typing import List
+
+import pytest
+from asyncclick.testing import CliRunner
+from pytest_httpx import HTTPXMock
+from tortoise.exceptions import IntegrityError
+
+from les_stats.models.internal.auth import Scope
+from les_stats.models.internal.event import Event
+from les_stats.models.internal.stage import Stage
+from les_stats.models.internal.tournament import Tournament
+from les_stats.models.tft.rollup import TFTRollupGame, TFTRollupPlayer
+from les_stats.utils.rollup import rebuild, rebuild_tft_groups
+from tests.utils import (
+    TFT_MATCHES_ID,
+    TFT_ROLLUPS,
+    CustomClient,
+    get_tft_rollups,
+    save_tft_matches,
+)
+
+NAMESPACE = "/tft/game/"
+
+
+@pytest.mark.parametrize(
+    ("events", "games"),
+    (
+        (["event", None], [1, 1]),
+        (["event", "event"], [2]),
+    ),
+)
+@pytest.mark.asyncio
+async def test_rollup_save(
+    client: CustomClient,
+    httpx_mock: HTTPXMock,
+    events: List[str],
+    games: List[int],
+):
+    await save_tft_matches(client, httpx_mock, events)
+
+    rollups = await get_tft_rollups()
+    assert [row["games"] for row in rollups["TFTRollupGame"]] == games
+    assert sum(row["games"] for row in rollups["TFTRollupPlayer"]) == 16
+
+    await rebuild_tft_groups()
+    assert await get_tft_rollups() == rollups
+
+
+@pytest.mark.asyncio
+async def test_rollup_update(client: CustomClient, httpx_mock: HTTPXMock):
+    await save_tft_matches(client, httpx_mock)
+
+    await client.test_api(
+        "PUT",
+        f"{NAMESPACE}matches/save",
+        Scope.write,
+        json=[{"id": TFT_MATCHES_ID[1], "event": "event"}],
+    )
+
+    rollups = await get_tft_rollups()
+    assert [(row["event_id"], row["games"]) for row in rollups["TFTRollupGame"]] == [
+        ("event", 2)
+    ]
+
+    await rebuild_tft_groups()
+    assert await get_tft_rollups() == rollups
+
+
+@pytest.mark.asyncio
+async def test_rollup_delete(client: CustomClient, httpx_mock: HTTPXMock):
+    await save_tft_matches(client, httpx_mock)
+
+    await client.test_api(
+        "DELETE", f"{NAMESPACE}matches/save", Scope.write, json=[TFT_MATCHES_ID[0]]
+    )
+
+    rollups = await get_tft_rollups()
+    assert [(row["event_id"], row["games"]) for row in rollups["TFTRollupGame"]] == [
+        (None, 1)
+    ]
+    assert await TFTRollupPlayer.filter(event="event").count() == 0
+
+    await rebuild_tft_groups()
+    assert await get_tft_rollups() == rollups
+
+
+@pytest.mark.asyncio
+async def test_rollup_delete_from_group(client: CustomClient, httpx_mock: HTTPXMock):
+    await save_tft_matches(client, httpx_mock, ["event", "event"])
+
+    for match_id in TFT_MATCHES_ID:
+        await client.test_api(
+            "DELETE", f"{NAMESPACE}matches/save", Scope.write, json=[match_id]
+        )
+
+        # Min/max held by the deleted game are recomputed from the game left
+        rollups = await get_tft_rollups()
+        await rebuild_tft_groups()
+        assert await get_tft_rollups() == rollups
+
+    assert rollups == {model.__name__: [] for model in TFT_ROLLUPS}
+
+
+@pytest.mark.asyncio
+async def test_rollup_unique(client: CustomClient):
+    event = await Event.create(name="event")
+    tournament = await Tournament.create(name="tournament")
+    stage = await Stage.create(name="stage")
+    group = {"event": event, "tournament": tournament, "stage": stage}
+
+    await TFTRollupGame.create(**group, game_length_min=0, game_length_max=0)
+    with pytest.raises(IntegrityError):
+        await TFTRollupGame.create(**group, game_length_min=0, game_length_max=0)
+    assert await TFTRollupGame.filter(event=event).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_rollup_rebuild_cli(
+    runner: CliRunner, client: CustomClient, httpx_mock: HTTPXMock
+):
+    await save_tft_matches(client, httpx_mock)
+    rollups = await get_tft_rollups()
+    await TFTRollupGame.all().delete()
+
+    result = await runner.invoke(rebuild, [])
+    assert result.exit_code == 0
+    assert result.output == "TFT stat rollups rebuilt\n"
+    assert await get_tft_rollups() == rollups
@@ -0,0 +1,100 @@
+import json
+import os
+from typing import AsyncGenerator
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from les_stats.client_api.registry import client_registry
+from les_stats.utils.config import get_settings
+from les_stats.utils.roster import load_roster
+
+URL = "https://lyon-esport.fr/players"
+ROSTER = {"players": [{"puuid": "player_a"}, {"puuid": "player_b"}]}
+
+
+@pytest.fixture(autouse=True)
+async def roster_cache(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> AsyncGenerator[None, None]:
+    monkeypatch.setattr(get_settings(), "ROSTER_CACHE_PATH", str(tmp_path / "rosters"))
+    yield
+    await client_registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_load_roster_file(tmp_path):
+    path = os.path.join(tmp_path, "roster.json")
+    with open(path, "w") as f:
+        f.write(json.dumps(ROSTER))
+
+    assert await load_roster(path) == ["player_a", "player_b"]
+    assert await load_roster(f"file://{path}") == ["player_a", "player_b"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("validator", "conditional_header"),
+    (
+        ("ETag", "If-None-Match"),
+        ("Last-Modified", "If-Modified-Since"),
+    ),
+)
+async def test_load_roster_revalidated(
+    httpx_mock: HTTPXMock, validator: str, conditional_header: str
+):
+    value = '"v1"' if validator == "ETag" else "Wed, 21 Oct 2015 07:28:00 GMT"
+    httpx_mock.add_response(
+        method="GET", url=URL, json=ROSTER, headers={validator: value}
+    )
+    assert await load_roster(URL) == ["player_a", "player_b"]
+
+    httpx_mock.add_response(
+        method="GET",
+        url=URL,
+        status_code=304,
+        match_headers={conditional_header: value},
+    )
+    assert await load_roster(URL) == ["player_a", "player_b"]
+
+
+@pytest.mark.asyncio
+async def test_load_roster_changed(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="GET", url=URL, json=ROSTER, headers={"ETag": '"v1"'}
+    )
+    await load_roster(URL)
+
+    httpx_mock.add_response(
+        method="GET",
+        url=URL,
+        json={"players": [{"puuid": "player_c"}]},
+        headers={"ETag": '"v2"'},
+        match_headers={"If-None-Match": '"v1"'},
+    )
+    assert await load_roster(URL) == ["player_c"]
+
+
+@pytest.mark.asyncio
+async def test_load_roster_without_validator(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="GET", url=URL, json=ROSTER)
+    await load_roster(URL)
+    await load_roster(URL)
+
+    assert all(
+        "If-None-Match" not in request.headers
+        and "If-Modified-Since" not in request.headers
+        for request in httpx_mock.get_requests()
+    )
+
+
+@pytest.mark.asyncio
+async def test_load_roster_error(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="GET", url=URL, status_code=404, json="Not found")
+    with pytest.raises(httpx.HTTPStatusError):
+        await load_roster(URL)
+
+    httpx_mock.add_response(method="GET", url=URL, json={"players": "player_a"})
+    with pytest.raises(ValueError):
+        await load_roster(URL)
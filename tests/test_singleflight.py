@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+from pytest_httpx import HTTPXMock
+
+from les_stats.client_api.riot import RiotAPI, RiotGame
+from les_stats.client_api.singleflight import SingleFlight
+
+URL = "https://europe.api.riotgames.com/tft/match/v1/matches/EUW1_1"
+
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    single_flight = SingleFlight()
+    calls = []
+
+    async def func():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    results = await asyncio.gather(
+        single_flight.do("key", func), single_flight.do("key", func)
+    )
+
+    assert results == [(1, False), (1, True)]
+    # The key is released once the call is done
+    assert await single_flight.do("key", func) == (2, False)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_error():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        raise ValueError("error")
+
+    results = await asyncio.gather(
+        single_flight.do("key", func),
+        single_flight.do("key", func),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_single_flight_cancelled_caller():
+    single_flight = SingleFlight()
+
+    async def func():
+        await asyncio.sleep(0.01)
+        return "result"
+
+    first = asyncio.ensure_future(single_flight.do("key", func))
+    second = asyncio.ensure_future(single_flight.do("key", func))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == ("result", True)
+
+
+@pytest.mark.asyncio
+async def test_request_coalesced(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="GET", url=URL, json={"metadata": {}})
+    labels = {"endpoint": "tft-match.getMatch", "game": str(RiotGame.tft)}
+    before = REGISTRY.get_sample_value("les_stats_request_coalesced_total", labels) or 0
+
+    results = await asyncio.gather(
+        RiotAPI(RiotGame.tft).get_matches(["EUW1_1"]),
+        RiotAPI(RiotGame.tft).get_matches(["EUW1_1", "EUW1_1"]),
+    )
+
+    assert len(httpx_mock.get_requests()) == 1
+    assert results[0][1][0].data == {"metadata": {}}
+    assert [r.data for r in results[1][1]] == [{"metadata": {}}, {"metadata": {}}]
+    assert (
+        REGISTRY.get_sample_value("les_stats_request_coalesced_total", labels)
+        == before + 2
+    )
+
+
+@pytest.mark.asyncio
+async def test_request_not_coalesced_not_idempotent(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="POST", url=URL, json={})
+    riot_api = RiotAPI(RiotGame.tft)
+
+    await riot_api.make_request([riot_api.build_request("POST", URL)] * 2)
+
+    assert len(httpx_mock.get_requests()) == 2
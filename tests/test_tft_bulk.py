@@ -0,0 +1,116 @@
+import pytest
+
+from les_stats.models.tft.game import (
+    TFTAugment,
+    TFTCompanion,
+    TFTCurrentUnit,
+    TFTGame,
+    TFTItem,
+    TFTTrait,
+    TFTUnit,
+)
+from les_stats.utils import tft_bulk
+from les_stats.utils.tft_bulk import TFTBulkSaver, tft_dimension_cache
+from tests.utils import TFT_MATCHES_ID, CustomClient, copy_tft_match, get_tft_match
+
+DIMENSIONS = [TFTCompanion, TFTAugment, TFTTrait, TFTUnit, TFTItem]
+
+
+@pytest.mark.asyncio
+async def test_dimension_cache_steady_state(
+    client: CustomClient, monkeypatch: pytest.MonkeyPatch
+):
+    await TFTBulkSaver().save_batch([(get_tft_match(TFT_MATCHES_ID[1]), {})])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("dimension table queried")
+
+    for model in DIMENSIONS:
+        for method in ["all", "filter", "bulk_create"]:
+            monkeypatch.setattr(model, method, fail)
+
+    await TFTBulkSaver().save_batch([(copy_tft_match("EUW1_1"), {})])
+
+    monkeypatch.undo()
+    assert await TFTGame.all().count() == 2
+
+
+@pytest.mark.asyncio
+async def test_dimension_cache_loaded_from_db(client: CustomClient):
+    await TFTTrait.create(name="Set7_Existing")
+
+    await TFTBulkSaver().save_batch([(get_tft_match(TFT_MATCHES_ID[1]), {})])
+
+    rows = await tft_dimension_cache.get(None)
+    assert "Set7_Existing" in rows[TFTTrait]
+    assert set(rows[TFTUnit]) == set(
+        await TFTUnit.all().values_list("character_id", flat=True)
+    )
+
+
+@pytest.mark.asyncio
+async def test_dimension_cache_item_name(client: CustomClient):
+    await TFTBulkSaver().save_batch([(get_tft_match(TFT_MATCHES_ID[1]), {})])
+
+    match = copy_tft_match("EUW1_1")
+    units = [u for p in match["info"]["participants"] for u in p["units"]]
+    item_id = next(u["items"][0] for u in units if u["items"])
+    for u in units:
+        u["itemNames"] = [
+            "TFT_Item_Renamed" if i == item_id else name
+            for i, name in zip(u["items"], u["itemNames"])
+        ]
+    await TFTBulkSaver().save_batch([(match, {})])
+
+    item = await TFTItem.get(id=item_id)
+    assert item.name == "TFT_Item_Renamed"
+    assert (await tft_dimension_cache.get(None))[TFTItem][item.id] == item.name
+
+
+@pytest.mark.asyncio
+async def test_dimension_cache_rollback(
+    client: CustomClient, monkeypatch: pytest.MonkeyPatch
+):
+    await TFTBulkSaver().save_batch([(get_tft_match(TFT_MATCHES_ID[1]), {})])
+
+    match = copy_tft_match("EUW1_1")
+    match["info"]["participants"][0]["traits"][0]["name"] = "Set7_RolledBack"
+
+    async def fail(*args, **kwargs):
+        raise ValueError("error")
+
+    monkeypatch.setattr(tft_bulk, "add_tft_games", fail)
+    with pytest.raises(ValueError):
+        await TFTBulkSaver().save_batch([(match, {})])
+    monkeypatch.undo()
+
+    assert "Set7_RolledBack" not in (await tft_dimension_cache.get(None))[TFTTrait]
+    assert not await TFTTrait.exists(name="Set7_RolledBack")
+
+    await TFTBulkSaver().save_batch([(match, {})])
+
+    assert await TFTTrait.exists(name="Set7_RolledBack")
+    assert "Set7_RolledBack" in (await tft_dimension_cache.get(None))[TFTTrait]
+
+
+@pytest.mark.asyncio
+async def test_save_identical_units(client: CustomClient):
+    match = get_tft_match(TFT_MATCHES_ID[1])
+    participant = match["info"]["participants"][0]
+    unit = {**participant["units"][0], "items": [], "itemNames": []}
+    participant["units"] = [
+        {**unit, "items": [1], "itemNames": ["TFT_Item_1"]},
+        {**unit, "items": [2, 3], "itemNames": ["TFT_Item_2", "TFT_Item_3"]},
+        participant["units"][0],
+    ]
+
+    await TFTBulkSaver().save_batch([(match, {})])
+
+    units = await TFTCurrentUnit.filter(
+        participant__player__puuid=participant["puuid"],
+        unit_id=unit["character_id"],
+        tier=unit["tier"],
+    ).prefetch_related("items")
+    assert sorted(sorted(item.id for item in u.items) for u in units) == sorted(
+        [[1], [2, 3], sorted(participant["units"][2]["items"])]
+    )
@@ -5,7 +5,7 @@ import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 
-from les_stats.client_api.riot import RiotAPI
+from les_stats.client_api.riot import GameSaveIn_Pydantic, RiotAPI, RiotGame
 from les_stats.models.internal.auth import Scope
 from les_stats.models.internal.event import Event
 from les_stats.models.internal.stage import Stage
@@ -142,6 +142,68 @@ async def test_get_matches_from_summoners(
             assert datas[i]["error"]["message"] is not None
 
 
+def add_match_list_pages(httpx_mock: HTTPXMock, puuid: str, pages: List[int]):
+    for page, size in enumerate(pages):
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/{puuid}/ids"
+            f"?start={page * 100}&count=100&startTime=1",
+            status_code=200,
+            json=[f"EUW1_{page * 100 + i}" for i in range(size)],
+        )
+
+
+@pytest.mark.asyncio
+async def test_get_matches_from_summoners_all(
+    client: CustomClient, httpx_mock: HTTPXMock
+):
+    add_match_list_pages(httpx_mock, "player_a", [100, 100, 30])
+    add_match_list_pages(httpx_mock, "player_b", [0])
+
+    response = await client.test_api(
+        "GET",
+        f"{NAMESPACE}match-list?all=true&start_time=1&puuid=player_a&puuid=player_b",
+        Scope.read,
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [
+        {"data": [f"EUW1_{i}" for i in range(230)], "error": None},
+        {"data": [], "error": None},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_matches_list(httpx_mock: HTTPXMock):
+    for start, count in [(0, 100), (100, 50)]:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/player/ids"
+            f"?start={start}&count={count}",
+            status_code=200,
+            json=[f"EUW1_{start + i}" for i in range(count)],
+        )
+
+    pages = [
+        data.data
+        async for _, data in RiotAPI(RiotGame.tft).iter_matches_list(
+            "player", limit=150
+        )
+    ]
+    assert [len(page) for page in pages] == [100, 50]
+
+    httpx_mock.reset(assert_all_responses_were_requested=False)
+    httpx_mock.add_response(
+        method="GET",
+        url=f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/player/ids?start=0&count=100",
+        status_code=400,
+        json={"status": {"message": "Bad Request", "status_code": 400}},
+    )
+    http_code, datas = await RiotAPI(RiotGame.tft).get_all_matches_list(["player"])
+    assert http_code == 400
+    assert datas[0].error.status_code == 400
+
+
 @pytest.mark.parametrize(
     (
         "infos",
@@ -866,3 +928,152 @@ async def test_delete_matches(
             assert datas[i]["data"] is None
             assert datas[i]["error"]["status_code"] == infos[i]["http_code"]
             assert datas[i]["error"]["message"] is not None
+
+
+@pytest.mark.asyncio
+async def test_save_matches_batch(client: CustomClient, httpx_mock: HTTPXMock):
+    for match_id in ["EUW1_5781372307", "EUW1_5979031153"]:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+            status_code=200,
+            json=get_json_response(
+                os.path.join(MOCKED_DATA_FOLDER, match_id + ".json")
+            ),
+        )
+
+    response = await client.test_api(
+        "POST",
+        f"{NAMESPACE}matches/save",
+        Scope.write,
+        json=[
+            {"id": "EUW1_5781372307"},
+            {"id": "EUW1_5979031153"},
+            {"id": "EUW1_5781372307"},
+        ],
+    )
+
+    assert response.status_code == 207
+    datas = response.json()
+    assert datas[0]["data"] == "Game EUW1_5781372307 saved"
+    assert datas[1]["data"] == "Game EUW1_5979031153 saved"
+    assert datas[2]["error"]["status_code"] == 409
+
+    for match_id in ["EUW1_5781372307", "EUW1_5979031153"]:
+        game = await TFTGame.get(match_id=match_id).prefetch_related("participant")
+        assert len(game.participant) == 8
+
+
+@pytest.mark.asyncio
+async def test_save_matches_already_saved(client: CustomClient, httpx_mock: HTTPXMock):
+    for match_id in ["EUW1_5781372307", "EUW1_5979031153"]:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+            status_code=200,
+            json=get_json_response(
+                os.path.join(MOCKED_DATA_FOLDER, match_id + ".json")
+            ),
+        )
+
+    await RiotAPI(RiotGame.tft).save_tft_games(
+        [GameSaveIn_Pydantic(id="EUW1_5781372307")]
+    )
+    http_code, datas = await RiotAPI(RiotGame.tft).save_tft_games(
+        [
+            GameSaveIn_Pydantic(id="EUW1_5781372307"),
+            GameSaveIn_Pydantic(id="EUW1_5979031153"),
+        ],
+        concurrency=1,
+    )
+
+    assert http_code == 207
+    assert datas[0].error.status_code == 409
+    assert datas[1].data == "Game EUW1_5979031153 saved"
+
+
+@pytest.mark.asyncio
+async def test_save_matches_transport_error(
+    client: CustomClient, httpx_mock: HTTPXMock
+):
+    for match_id in ["EUW1_5781372307", "EUW1_5979031153"]:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+            status_code=200,
+            json=get_json_response(
+                os.path.join(MOCKED_DATA_FOLDER, match_id + ".json")
+            ),
+        )
+    httpx_mock.add_exception(
+        httpx.ConnectError("Connection refused"),
+        url="https://europe.api.riotgames.com/tft/match/v1/matches/EUW1_1",
+    )
+
+    http_code, datas = await RiotAPI(RiotGame.tft).save_tft_games(
+        [
+            GameSaveIn_Pydantic(id="EUW1_5781372307"),
+            GameSaveIn_Pydantic(id="EUW1_1"),
+            GameSaveIn_Pydantic(id="EUW1_5979031153"),
+        ],
+        concurrency=3,
+    )
+
+    # The other matches are fetched concurrently and still saved
+    assert http_code == 207
+    assert datas[0].data == "Game EUW1_5781372307 saved"
+    assert datas[1].error.status_code == 503
+    assert datas[2].data == "Game EUW1_5979031153 saved"
+    assert await TFTGame.all().count() == 2
+
+
+@pytest.mark.asyncio
+async def test_update_delete_matches_bulk(client: CustomClient):
+    await Event.create(name="event")
+    await Stage.create(name="stage")
+    matches_id = [f"EUW1_{i}" for i in range(0, 5)]
+    for match_id in matches_id:
+        await TFTGame.create(
+            match_id=match_id,
+            data_version="",
+            game_datetime=0,
+            game_length=0.0,
+            game_version="",
+            queue_id=0,
+            tft_set_number=0,
+            tft_game_type="",
+        )
+
+    response = await client.test_api(
+        "PUT",
+        f"{NAMESPACE}matches/save",
+        Scope.write,
+        json=[{"id": match_id, "event": "event"} for match_id in matches_id[:3]]
+        + [{"id": matches_id[3], "stage": "stage"}]
+        + [{"id": matches_id[4], "event": "notExist"}]
+        + [{"id": "EUW1_notExist", "event": "event"}],
+    )
+
+    assert response.status_code == 207
+    datas = response.json()
+    for i in range(0, 4):
+        assert datas[i]["data"] == f"Game {matches_id[i]} updated"
+    assert datas[4]["error"]["status_code"] == 404
+    assert datas[5]["error"]["status_code"] == 404
+    assert await TFTGame.filter(event="event").count() == 3
+    assert await TFTGame.filter(stage="stage").count() == 1
+    assert await TFTGame.filter(event=None, stage=None).count() == 1
+
+    response = await client.test_api(
+        "DELETE",
+        f"{NAMESPACE}matches/save",
+        Scope.write,
+        json=matches_id[:2] + matches_id[:1],
+    )
+
+    assert response.status_code == 207
+    datas = response.json()
+    assert datas[0]["data"] == f"Game {matches_id[0]} deleted"
+    assert datas[1]["data"] == f"Game {matches_id[1]} deleted"
+    assert datas[2]["error"]["status_code"] == 404
+    assert await TFTGame.filter(event="event").count() == 1
@@ -200,3 +200,22 @@ async def test_endpoints(
             else http_code
         )
         assert response.json() == expected_response
+
+
+@pytest.mark.asyncio
+async def test_tier_list_item_top(client: CustomClient, tortoise_init_db: None):
+    response = await client.test_api(
+        "GET", f"{NAMESPACE}tier-list/item?event=event&top=3", Scope.read
+    )
+    expected_response = get_json_response(
+        os.path.join(API_RESPONSE_DATA, "tier-list/item", "one.json")
+    )
+    expected_response["data"]["ranks"] = expected_response["data"]["ranks"][:3]
+
+    assert response.status_code == 200
+    assert response.json() == expected_response
+
+    response = await client.test_api(
+        "GET", f"{NAMESPACE}tier-list/item?top=0", Scope.read
+    )
+    assert response.status_code == 422
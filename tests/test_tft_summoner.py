@@ -3,9 +3,14 @@ from typing import Dict, List, Union
 
 import httpx
 import pytest
+from prometheus_client import REGISTRY
 from pytest_httpx import HTTPXMock
 
+from les_stats.client_api.cache import ResponseCache
 from les_stats.models.internal.auth import Scope
+from les_stats.schemas.client_api.data import DataResponse
+from les_stats.schemas.riot.game import RiotGame
+from les_stats.utils.config import get_settings
 from tests.utils import CustomClient, get_json_response
 
 NAMESPACE = "/tft/summoner/"
@@ -258,3 +263,67 @@ async def test_get_summoners_rank(
             assert datas[i]["data"] is None
             assert datas[i]["error"]["status_code"] == infos[i]["http_code"]
             assert datas[i]["error"]["message"] is not None
+
+
+@pytest.mark.asyncio
+async def test_summoners_cache(client: CustomClient, httpx_mock: HTTPXMock):
+    url = f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/summoner/v1/summoners/by-puuid"
+    httpx_mock.add_response(
+        method="GET", url=f"{url}/found", status_code=200, json={"name": "found"}
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{url}/not_found",
+        status_code=404,
+        json={"status": {"message": "Data not found", "status_code": 404}},
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{url}/error",
+        status_code=403,
+        json={"status": {"message": "Forbidden", "status_code": 403}},
+    )
+    labels = {"endpoint": "tft-summoner.getByPUUID", "game": str(RiotGame.tft)}
+    hits = REGISTRY.get_sample_value("les_stats_response_cache_hit_total", labels) or 0
+    misses = (
+        REGISTRY.get_sample_value("les_stats_response_cache_miss_total", labels) or 0
+    )
+
+    for _ in range(2):
+        response = await client.test_api(
+            "GET",
+            f"{NAMESPACE}by-puuid?encrypted_puuid=found&encrypted_puuid=not_found"
+            "&encrypted_puuid=error&encrypted_puuid=found",
+            Scope.read,
+        )
+        assert response.status_code == 207
+        datas = response.json()
+        assert datas[0] == datas[3] == {"data": {"name": "found"}, "error": None}
+        assert datas[1]["error"]["status_code"] == 404
+        assert datas[2]["error"]["status_code"] == 403
+
+    assert len(httpx_mock.get_requests(url=f"{url}/found")) == 1
+    assert len(httpx_mock.get_requests(url=f"{url}/not_found")) == 1
+    assert len(httpx_mock.get_requests(url=f"{url}/error")) == 2
+    assert (
+        REGISTRY.get_sample_value("les_stats_response_cache_hit_total", labels)
+        == hits + 3
+    )
+    assert (
+        REGISTRY.get_sample_value("les_stats_response_cache_miss_total", labels)
+        == misses + 5
+    )
+
+
+def test_response_cache():
+    cache = ResponseCache(2)
+    cache.set("a", 200, DataResponse(data="a"), 60)
+    cache.set("b", 200, DataResponse(data="b"), 60)
+    cache.set("expired", 404, DataResponse(data="expired"), -1)
+    assert cache.get("a") is None
+    assert cache.get("expired") is None
+
+    cache.set("c", 200, DataResponse(data="c"), 60)
+    assert cache.get("b") == (200, DataResponse(data="b"))
+    cache.get("b")[1].data = "changed"
+    assert cache.get("b") == (200, DataResponse(data="b"))
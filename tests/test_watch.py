@@ -0,0 +1,269 @@
+import asyncio
+import os
+import re
+from datetime import datetime
+
+import pytest
+from asyncclick.testing import CliRunner
+from pytest_httpx import HTTPXMock
+
+from les_stats.client_api.ratelimit import rate_limiter
+from les_stats.client_api.riot import RiotAPI
+from les_stats.models.internal.auth import Api, Scope
+from les_stats.models.tft.game import TFTGame
+from les_stats.models.tft.watermark import TFTImportWatermark
+from les_stats.utils.auth import API_KEY_SIZE_MAX, get_digest
+from les_stats.utils.config import get_settings
+from les_stats.utils.watch import TFTMatchWatcher, tft
+from tests.utils import CustomClient, get_json_response
+
+MOCKED_DATA_FOLDER = "riot/tft/"
+MATCHES_ID = ["EUW1_5979031153", "EUW1_5781372307"]
+START_TIME = "2022-07-01 00:00:00"
+URL = f"https://{get_settings().TFT_API_ROUTING}.api.riotgames.com/tft/match/v1/matches/by-puuid/player_a/ids?start=0&count=100"
+
+
+def get_start_time() -> int:
+    return int(datetime.strptime(START_TIME, "%Y-%m-%d %H:%M:%S").timestamp())
+
+
+def add_matches_responses(httpx_mock: HTTPXMock, lists: bool = True) -> None:
+    if lists:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"{URL}&startTime={get_start_time()}",
+            status_code=200,
+            json=MATCHES_ID,
+        )
+    for match_id in MATCHES_ID:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+            status_code=200,
+            json=get_json_response(
+                os.path.join(MOCKED_DATA_FOLDER, "match", match_id + ".json")
+            ),
+        )
+
+
+@pytest.mark.asyncio
+async def test_watch_poll(client: CustomClient, httpx_mock: HTTPXMock):
+    add_matches_responses(httpx_mock)
+    watcher = TFTMatchWatcher(["player_a"], get_start_time())
+
+    assert await watcher.poll() == (2, 0)
+    assert await TFTGame.all().count() == 2
+    watermark = await TFTImportWatermark.get(puuid="player_a")
+    assert watermark.match_id == "EUW1_5979031153"
+
+    # Only the match list is requested again, from the watermark
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{URL}&startTime=1658354772",
+        status_code=200,
+        json=["EUW1_5979031153"],
+    )
+    assert await watcher.poll() == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_watch_poll_backlog(client: CustomClient, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{URL}&startTime={get_start_time()}",
+        status_code=200,
+        json=["EUW1_1"],
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url="https://europe.api.riotgames.com/tft/match/v1/matches/EUW1_1",
+        status_code=404,
+        json={"status": {"message": "Data not found", "status_code": 404}},
+    )
+    watcher = TFTMatchWatcher(["player_a"], get_start_time())
+
+    assert await watcher.poll() == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_watch_poll_backlog_retried(client: CustomClient, httpx_mock: HTTPXMock):
+    match_url = "https://{}.api.riotgames.com/tft/match/v1/matches/{}"
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{URL}&startTime={get_start_time()}",
+        status_code=200,
+        json=MATCHES_ID,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=match_url.format(RiotAPI.get_region(MATCHES_ID[0]), MATCHES_ID[0]),
+        status_code=200,
+        json=get_json_response(
+            os.path.join(MOCKED_DATA_FOLDER, "match", MATCHES_ID[0] + ".json")
+        ),
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=match_url.format(RiotAPI.get_region(MATCHES_ID[1]), MATCHES_ID[1]),
+        status_code=500,
+        json={"status": {"message": "Internal server error", "status_code": 500}},
+    )
+    watcher = TFTMatchWatcher(["player_a"], get_start_time())
+
+    assert await watcher.poll() == (1, 1)
+    # The latest match is saved but the watermark stays before the failed one
+    assert await TFTImportWatermark.all().count() == 0
+
+    httpx_mock.reset(assert_all_responses_were_requested=False)
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{URL}&startTime={get_start_time()}",
+        status_code=200,
+        json=MATCHES_ID,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=match_url.format(RiotAPI.get_region(MATCHES_ID[1]), MATCHES_ID[1]),
+        status_code=200,
+        json=get_json_response(
+            os.path.join(MOCKED_DATA_FOLDER, "match", MATCHES_ID[1] + ".json")
+        ),
+    )
+
+    assert await watcher.poll() == (1, 0)
+    assert await TFTGame.all().count() == 2
+    watermark = await TFTImportWatermark.get(puuid="player_a")
+    assert watermark.match_id == MATCHES_ID[0]
+
+
+@pytest.mark.asyncio
+async def test_watch_poll_full_page(client: CustomClient, httpx_mock: HTTPXMock):
+    # More matches than a page since the start time, the oldest is on the second page
+    matches_id = [MATCHES_ID[0]] + [f"EUW1_{i}" for i in range(99)]
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{URL}&startTime={get_start_time()}",
+        status_code=200,
+        json=matches_id,
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{URL.replace('start=0', 'start=100')}&startTime={get_start_time()}",
+        status_code=200,
+        json=[MATCHES_ID[1]],
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=re.compile(
+            r"https://europe\.api\.riotgames\.com/tft/match/v1/matches/EUW1_\d{1,2}$"
+        ),
+        status_code=404,
+        json={"status": {"message": "Data not found", "status_code": 404}},
+    )
+    add_matches_responses(httpx_mock, lists=False)
+    watcher = TFTMatchWatcher(["player_a"], get_start_time())
+
+    assert await watcher.poll() == (2, 99)
+    assert await TFTGame.filter(match_id=MATCHES_ID[1]).exists()
+
+
+@pytest.mark.asyncio
+async def test_watch_poll_min_player(client: CustomClient, httpx_mock: HTTPXMock):
+    # Both players are only in the latest match
+    roster = get_json_response(
+        os.path.join(MOCKED_DATA_FOLDER, "match", MATCHES_ID[0] + ".json")
+    )["metadata"]["participants"][:2]
+    for player in roster:
+        httpx_mock.add_response(
+            method="GET",
+            url=f"{URL.replace('player_a', player)}&startTime={get_start_time()}",
+            status_code=200,
+            json=MATCHES_ID,
+        )
+    add_matches_responses(httpx_mock, lists=False)
+    watcher = TFTMatchWatcher(roster, get_start_time(), min_player=2)
+
+    assert await watcher.poll() == (1, 0)
+    # The match skipped on purpose doesn't hold the watermarks back
+    for player in roster:
+        watermark = await TFTImportWatermark.get(puuid=player)
+        assert watermark.match_id == MATCHES_ID[0]
+
+
+def test_watch_next_interval(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(rate_limiter, "interval", lambda host, requests: 0.0)
+    watcher = TFTMatchWatcher(
+        ["player_a"], 0, min_interval=10, max_interval=40, active_window=60
+    )
+
+    # Idle, the interval backs off
+    assert [watcher.next_interval(0, 0) for _ in range(3)] == [20, 40, 40]
+    # A match was found, fast polling while the next round is likely in progress
+    assert watcher.next_interval(1, 0) == 10
+    assert watcher.next_interval(0, 0) == 10
+
+    watcher.active_window = 0
+    assert watcher.next_interval(0, 0) == 20
+
+
+def test_watch_next_interval_rate_limit(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(rate_limiter, "interval", lambda host, requests: requests)
+    watcher = TFTMatchWatcher(
+        [f"player_{i}" for i in range(30)], 0, min_interval=10, max_interval=40
+    )
+
+    assert watcher.next_interval(1, 0) == 60
+
+
+@pytest.mark.asyncio
+async def test_watch_once(
+    runner: CliRunner, client: CustomClient, httpx_mock: HTTPXMock
+):
+    await Api.create(
+        name="write", api_key=get_digest("w" * API_KEY_SIZE_MAX), scope=Scope.write
+    )
+    add_matches_responses(httpx_mock)
+
+    result = await runner.invoke(
+        tft,
+        [
+            "--api-key",
+            "w" * API_KEY_SIZE_MAX,
+            "--start-time",
+            START_TIME,
+            "--once",
+            "player_a",
+        ],
+    )
+
+    assert result.exit_code == 0
+    assert result.output == "2 matches saved, 0 left to save\n"
+
+
+@pytest.mark.asyncio
+async def test_watch_cycle_failed(
+    runner: CliRunner,
+    client: CustomClient,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    await Api.create(
+        name="write", api_key=get_digest("w" * API_KEY_SIZE_MAX), scope=Scope.write
+    )
+    polls = []
+
+    async def poll(self):
+        polls.append(len(polls))
+        if len(polls) == 1:
+            raise OSError("Database unreachable")
+        if len(polls) == 3:
+            # Stop watching
+            raise asyncio.CancelledError
+        return 1, 0
+
+    monkeypatch.setattr(TFTMatchWatcher, "poll", poll)
+    monkeypatch.setattr(TFTMatchWatcher, "next_interval", lambda self, *args: 0)
+
+    # The first cycle failed, the watch keeps running the next ones
+    with pytest.raises(asyncio.CancelledError):
+        await runner.invoke(tft, ["--api-key", "w" * API_KEY_SIZE_MAX, "player_a"])
+    assert len(polls) == 3
@@ -1,13 +1,33 @@
 import json
 import os
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from httpx import AsyncClient
+from pytest_httpx import HTTPXMock
 
+from les_stats.client_api.riot import RiotAPI
 from les_stats.models.internal.auth import Api, Scope
+from les_stats.models.internal.event import Event
+from les_stats.models.tft.rollup import (
+    TFTRollupGame,
+    TFTRollupItem,
+    TFTRollupPlayer,
+    TFTRollupTrait,
+    TFTRollupUnit,
+)
 from les_stats.utils.auth import API_KEY_SIZE_MAX, get_digest
 
+TFT_MATCH_FOLDER = "riot/tft/match/"
+TFT_MATCHES_ID = ["EUW1_5781372307", "EUW1_5979031153"]
+TFT_ROLLUPS = [
+    TFTRollupGame,
+    TFTRollupTrait,
+    TFTRollupUnit,
+    TFTRollupItem,
+    TFTRollupPlayer,
+]
+
 
 class CustomClient(AsyncClient):
     async def test_api_scope(
@@ -62,3 +82,59 @@ def get_json_response(filename: str) -> Dict[Any, Any]:
     filename = re.sub("{.*}", "", filename)
     with open(os.path.join("tests/mocked_data/", filename), "r") as f:
         return json.loads(f.read())
+
+
+def get_tft_match(match_id: str) -> Dict[str, Any]:
+    return get_json_response(os.path.join(TFT_MATCH_FOLDER, match_id + ".json"))
+
+
+def copy_tft_match(match_id: str) -> Dict[str, Any]:
+    """Mocked TFT match payload under another match id"""
+    match = get_tft_match(TFT_MATCHES_ID[1])
+    match["metadata"]["match_id"] = match_id
+    return match
+
+
+def mock_tft_match(httpx_mock: HTTPXMock, match_id: str, status_code: int = 200):
+    httpx_mock.add_response(
+        method="GET",
+        url=f"https://{RiotAPI.get_region(match_id)}.api.riotgames.com/tft/match/v1/matches/{match_id}",
+        status_code=status_code,
+        json=get_tft_match(match_id),
+    )
+
+
+async def save_tft_match(
+    client: CustomClient,
+    httpx_mock: HTTPXMock,
+    match_id: str,
+    event: Optional[str] = None,
+) -> None:
+    mock_tft_match(httpx_mock, match_id)
+    await client.test_api(
+        "POST",
+        "/tft/game/matches/save",
+        Scope.write,
+        json=[{"id": match_id, "event": event}],
+    )
+
+
+async def save_tft_matches(
+    client: CustomClient, httpx_mock: HTTPXMock, events: List[str] = ["event", None]
+) -> None:
+    """Save TFT_MATCHES_ID tagged with events, the event "event" is created"""
+    await Event.create(name="event")
+    for match_id, event in zip(TFT_MATCHES_ID, events):
+        await save_tft_match(client, httpx_mock, match_id, event)
+
+
+async def get_tft_rollups() -> Dict[str, List[Dict[str, Any]]]:
+    """Rows of every TFT rollup without their id, in a stable order"""
+    rollups = {}
+    for model in TFT_ROLLUPS:
+        rows = await model.all().values()
+        for row in rows:
+            del row["id"]
+        rollups[model.__name__] = sorted(rows, key=lambda row: str(sorted(row.items())))
+
+    return rollups